@@ -0,0 +1 @@
+"""Benchmarks of the controller on synthetic graphs, see :py:mod:`benchmarks.run`."""
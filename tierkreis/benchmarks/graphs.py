@@ -0,0 +1,108 @@
+"""Graphs of a given size that each stress one part of the controller."""
+
+from typing import Callable, NamedTuple
+
+from tierkreis.builder import GraphBuilder
+from tierkreis.builtins.stubs import iadd, igt
+from tierkreis.controller.data.core import EmptyModel
+from tierkreis.controller.data.models import TKR
+
+from benchmarks.workers.bench_worker.stubs import add_one
+
+
+class Counter(NamedTuple):
+    acc: TKR[int]
+
+
+class CounterOutput(NamedTuple):
+    acc: TKR[int]
+    should_continue: TKR[bool]
+
+
+def increment() -> GraphBuilder[TKR[int], TKR[int]]:
+    g = GraphBuilder(TKR[int], TKR[int])
+    g.outputs(g.task(iadd(g.inputs, g.const(1))))
+    return g
+
+
+def worker_increment() -> GraphBuilder[TKR[int], TKR[int]]:
+    g = GraphBuilder(TKR[int], TKR[int])
+    g.outputs(g.task(add_one(g.inputs)))
+    return g
+
+
+def count_to(n: int) -> GraphBuilder[Counter, CounterOutput]:
+    g = GraphBuilder(Counter, CounterOutput)
+    acc = g.task(iadd(g.inputs.acc, g.const(1)))
+    g.outputs(CounterOutput(acc=acc, should_continue=g.task(igt(g.const(n), acc))))
+    return g
+
+
+def wide_map(n: int) -> GraphBuilder[EmptyModel, TKR[list[int]]]:
+    """Increment `n` elements in a map."""
+    g = GraphBuilder(EmptyModel, TKR[list[int]])
+    g.outputs(g.map(increment(), g.const(list(range(n)))))
+    return g
+
+
+def worker_map(n: int) -> GraphBuilder[EmptyModel, TKR[list[int]]]:
+    """Increment `n` elements in a map, in a worker rather than the builtins."""
+    g = GraphBuilder(EmptyModel, TKR[list[int]])
+    g.outputs(g.map(worker_increment(), g.const(list(range(n)))))
+    return g
+
+
+def deep_loop(n: int) -> GraphBuilder[EmptyModel, TKR[int]]:
+    """Count to `n` in a loop."""
+    g = GraphBuilder(EmptyModel, TKR[int])
+    g.outputs(g.loop(count_to(n), Counter(acc=g.const(0))).acc)
+    return g
+
+
+def add_ten() -> GraphBuilder[TKR[int], TKR[int]]:
+    g = GraphBuilder(TKR[int], TKR[int])
+    ten = g.loop(count_to(10), Counter(acc=g.const(0))).acc
+    g.outputs(g.task(iadd(g.inputs, ten)))
+    return g
+
+
+def nested(n: int) -> GraphBuilder[EmptyModel, TKR[list[int]]]:
+    """Map over `n` elements, each evaluating a graph with a loop of 10 iterations."""
+    body = GraphBuilder(TKR[int], TKR[int])
+    body.outputs(body.eval(add_ten(), body.inputs))
+
+    g = GraphBuilder(EmptyModel, TKR[list[int]])
+    g.outputs(g.map(body, g.const(list(range(n)))))
+    return g
+
+
+def builtin_chain(n: int) -> GraphBuilder[EmptyModel, TKR[int]]:
+    """Add one `n` times in a chain of builtin nodes."""
+    g = GraphBuilder(EmptyModel, TKR[int])
+    value = g.const(0)
+    for _ in range(n):
+        value = g.task(iadd(value, g.const(1)))
+    g.outputs(value)
+    return g
+
+
+GRAPHS: dict[str, Callable[[int], GraphBuilder]] = {
+    "wide_map": wide_map,
+    "worker_map": worker_map,
+    "deep_loop": deep_loop,
+    "nested": nested,
+    "builtin_chain": builtin_chain,
+}
+
+
+def expected_output(name: str, n: int) -> object:
+    """The output each graph should produce, to check the benchmarks ran correctly."""
+    match name:
+        case "wide_map" | "worker_map":
+            return list(range(1, n + 1))
+        case "deep_loop" | "builtin_chain":
+            return n
+        case "nested":
+            return list(range(10, n + 10))
+        case _:
+            raise ValueError(f"Unknown benchmark graph {name}.")
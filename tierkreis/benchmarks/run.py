@@ -0,0 +1,253 @@
+"""Run the benchmark graphs against the storage and executor backends.
+
+Each case runs in a fresh process, so that its peak RSS is its own.
+The peak RSS of the worker processes started by the shell and uv executors
+is not measured: they run behind a shell or `uv run` and are not waited for
+by the controller. `peak_rss_includes_workers` tells the cases apart.
+Ticks and started nodes are read from the trace of the workflow, see
+:py:mod:`tierkreis.controller.trace`; the throughput therefore includes the
+small cost of tracing, which is the same for every run being compared.
+
+Usage, from the `tierkreis` directory::
+
+    python -m benchmarks --backends in-memory file-shell \\
+        --graphs wide_map:1000 deep_loop:10000 -o results.json
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import platform
+import resource
+import tempfile
+from time import perf_counter
+from typing import Any
+from uuid import UUID, uuid4
+
+from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.controller import run_graph
+from tierkreis.controller.executor.builtins_executor import BuiltinsExecutor
+from tierkreis.controller.executor.in_memory_executor import InMemoryExecutor
+from tierkreis.controller.executor.protocol import ControllerExecutor
+from tierkreis.controller.executor.shell_executor import ShellExecutor
+from tierkreis.controller.executor.uv_executor import UvExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.trace import TraceEvent, read_trace
+from tierkreis.storage import read_outputs
+
+from benchmarks.graphs import GRAPHS, expected_output
+
+WORKERS_PATH = Path(__file__).parent / "workers"
+BACKENDS = ["in-memory", "file-shell", "file-uv"]
+IN_PROCESS_BACKENDS = ["in-memory"]
+"""Backends whose workers run in the controller process."""
+DEFAULT_CASES = [
+    "wide_map:1000",
+    "worker_map:100",
+    "deep_loop:1000",
+    "nested:100",
+    "builtin_chain:1000",
+]
+
+
+def backend(
+    name: str, workflow_id: UUID, tierkreis_dir: Path
+) -> tuple[ControllerStorage, ControllerExecutor]:
+    match name:
+        case "in-memory":
+            # The in-memory executor expects paths relative to the working directory.
+            os.chdir(tierkreis_dir)
+            storage = ControllerInMemoryStorage(workflow_id)
+            workers = InMemoryExecutor(WORKERS_PATH, storage)
+            return storage, BuiltinsExecutor(storage, workers)
+        case "file-shell":
+            storage = ControllerFileStorage(
+                workflow_id, tierkreis_directory=tierkreis_dir, do_cleanup=True
+            )
+            return storage, ShellExecutor(WORKERS_PATH, storage.workflow_dir)
+        case "file-uv":
+            storage = ControllerFileStorage(
+                workflow_id, tierkreis_directory=tierkreis_dir, do_cleanup=True
+            )
+            return storage, UvExecutor(WORKERS_PATH, storage.logs_path)
+        case _:
+            raise ValueError(f"Unknown backend {name}, expected one of {BACKENDS}.")
+
+
+def _syscalls() -> dict[str, int] | None:
+    """The read and write system calls of this process so far, on Linux."""
+    try:
+        with open("/proc/self/io") as fh:
+            counters = dict(line.split(": ") for line in fh.read().splitlines())
+    except (OSError, ValueError):
+        return None
+    return {"read": int(counters["syscr"]), "write": int(counters["syscw"])}
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def tick_latencies(events: list[TraceEvent], pid: int) -> list[float]:
+    """The time of each controller tick in milliseconds: a walk and its starts."""
+    ticks: list[float] = []
+    for event in events:
+        if event["pid"] != pid or event["cat"] != "controller":
+            continue
+        if event["name"] == "walk":
+            ticks.append(event["dur"] / 1000)
+        elif event["name"] == "start_nodes" and ticks:
+            ticks[-1] += event["dur"] / 1000
+    return ticks
+
+
+def run_case(
+    graph: str,
+    size: int,
+    backend_name: str,
+    tierkreis_dir: Path,
+    polling_interval_seconds: float,
+) -> dict[str, Any]:
+    """Run a single benchmark; called in a fresh process."""
+    # Builtins started as processes find the workflow through the environment.
+    os.environ[TKR_DIR_KEY] = str(tierkreis_dir)
+    g = GRAPHS[graph](size)
+    storage, executor = backend(backend_name, uuid4(), tierkreis_dir)
+    syscalls_before = _syscalls()
+
+    start = perf_counter()
+    run_graph(
+        storage,
+        executor,
+        g,
+        {},
+        n_iterations=10**9,
+        polling_interval_seconds=polling_interval_seconds,
+        trace=True,
+    )
+    wall_seconds = perf_counter() - start
+
+    syscalls_after = _syscalls()
+    syscalls = None
+    if syscalls_before is not None and syscalls_after is not None:
+        syscalls = {k: syscalls_after[k] - syscalls_before[k] for k in syscalls_after}
+
+    events = read_trace(storage.trace_path)
+    ticks = sorted(tick_latencies(events, os.getpid()))
+    nodes = sum(1 for e in events if e["cat"] == "controller" and e["name"] == "start")
+    output = read_outputs(g.get_data(), storage)
+    return {
+        "graph": graph,
+        "size": size,
+        "backend": backend_name,
+        "ok": output == expected_output(graph, size),
+        "wall_seconds": wall_seconds,
+        "ticks": len(ticks),
+        "tick_latency_ms": {
+            "mean": sum(ticks) / len(ticks),
+            "p50": _percentile(ticks, 0.5),
+            "p95": _percentile(ticks, 0.95),
+            "max": ticks[-1],
+        }
+        if ticks
+        else None,
+        "nodes": nodes,
+        "nodes_per_second": nodes / wall_seconds,
+        "controller_syscalls": syscalls,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_rss_includes_workers": backend_name in IN_PROCESS_BACKENDS,
+    }
+
+
+def run_benchmarks(
+    cases: list[tuple[str, int]],
+    backends: list[str],
+    tierkreis_dir: Path,
+    polling_interval_seconds: float = 0.01,
+) -> dict[str, Any]:
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for backend_name in backends:
+        for graph, size in cases:
+            with ProcessPoolExecutor(1, mp_context=context) as pool:
+                future = pool.submit(
+                    run_case,
+                    graph,
+                    size,
+                    backend_name,
+                    tierkreis_dir,
+                    polling_interval_seconds,
+                )
+                results.append(future.result())
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "notes": [
+            "peak_rss_mb is the peak RSS of the controller process, which runs"
+            " the workers if peak_rss_includes_workers; worker processes started"
+            " by the executors are not measured."
+        ],
+        "results": results,
+    }
+
+
+def _case(case: str) -> tuple[str, int]:
+    graph, _, size = case.partition(":")
+    if graph not in GRAPHS or not size.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"Expected <graph>:<size> with a graph in {list(GRAPHS)}, got {case}."
+        )
+    return graph, int(size)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measure the controller throughput on synthetic graphs.",
+    )
+    parser.add_argument(
+        "-g",
+        "--graphs",
+        nargs="*",
+        type=_case,
+        default=[_case(x) for x in DEFAULT_CASES],
+        help=f"Cases as <graph>:<size>, with graphs {list(GRAPHS)}.",
+    )
+    parser.add_argument(
+        "-b", "--backends", nargs="*", choices=BACKENDS, default=BACKENDS
+    )
+    parser.add_argument(
+        "-p",
+        "--polling-interval-seconds",
+        default=0.01,
+        type=float,
+        help="Set the controller tickrate.",
+    )
+    parser.add_argument(
+        "--tierkreis-dir",
+        default=None,
+        type=Path,
+        help="Where to keep the workflows, a temporary directory by default.",
+    )
+    parser.add_argument(
+        "-o", "--output", default=None, type=Path, help="Write the JSON report here."
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tierkreis_dir = (args.tierkreis_dir or Path(tmp_dir)).absolute()
+        report = run_benchmarks(
+            args.graphs, args.backends, tierkreis_dir, args.polling_interval_seconds
+        )
+
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
@@ -0,0 +1,14 @@
+from sys import argv
+
+from tierkreis import Worker
+
+worker = Worker("bench_worker")
+
+
+@worker.task()
+def add_one(value: int) -> int:
+    return value + 1
+
+
+if __name__ == "__main__":
+    worker.app(argv)
@@ -0,0 +1,3 @@
+#!/usr/bin/env bash
+
+exec python "$(dirname "$0")/main.py" "$@"
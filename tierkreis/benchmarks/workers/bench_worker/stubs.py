@@ -0,0 +1,17 @@
+"""Code generated from bench_worker namespace. Please do not edit."""
+
+from typing import NamedTuple
+
+from tierkreis.controller.data.models import TKR
+
+
+class add_one(NamedTuple):
+    value: TKR[int]  # fmt: skip
+
+    @staticmethod
+    def out() -> type[TKR[int]]:  # fmt: skip
+        return TKR[int]  # fmt: skip
+
+    @property
+    def namespace(self) -> str:
+        return "bench_worker"
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.graphs import GRAPHS
+from benchmarks.run import main, run_case
+from tierkreis.consts import TKR_DIR_KEY
+
+
+@pytest.mark.parametrize("graph", GRAPHS.keys())
+def test_benchmark_graphs(
+    graph: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # `run_case` expects a process of its own; restore what it changes.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(TKR_DIR_KEY, str(tmp_path))
+
+    result = run_case(graph, 3, "in-memory", tmp_path, 0)
+
+    assert result["ok"]
+    assert result["peak_rss_includes_workers"]
+    assert result["ticks"] > 0
+    assert result["nodes"] > 3
+    assert result["tick_latency_ms"]["max"] >= result["tick_latency_ms"]["p50"]
+
+
+def test_invalid_case() -> None:
+    with pytest.raises(SystemExit):
+        main(["--graphs", "wide_map"])
@@ -0,0 +1,98 @@
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tierkreis.controller.data.graph import Const
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage
+from tierkreis.worker.storage.sqlite import WorkerSQLiteStorage
+
+storage_classes = [
+    ControllerFileStorage,
+    ControllerInMemoryStorage,
+    ControllerSQLiteStorage,
+]
+storage_ids = ["FileStorage", "In-memory", "SQLite"]
+
+
+@pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
+def test_batch(storage_class: type[ControllerStorage], tmp_path: Path) -> None:
+    storage = storage_class(UUID(int=600), tierkreis_directory=tmp_path)  # type: ignore
+    storage.clean_graph_files()
+    storage.write_metadata(Loc())
+
+    touched: list[Path] = []
+    touch = storage.touch
+
+    def recording_touch(path: Path, is_dir: bool = False) -> None:
+        touched.append(path)
+        touch(path, is_dir)
+
+    storage.touch = recording_touch  # type: ignore
+    launched: list[Loc] = []
+    with storage.batch():
+        for i in range(3):
+            loc = Loc().N(i)
+            storage.write_node_def(loc, Const(i))
+            storage.write_worker_call_args(loc, "f", {}, ["value"])
+            with storage.batch():
+                storage.after_batch(lambda loc=loc: launched.append(loc))
+            storage.mark_node_finished(loc)
+            assert storage.is_node_finished(loc)
+        assert launched == []
+
+    assert launched == [Loc().N(0), Loc().N(1), Loc().N(2)]
+    assert touched.count(storage._metadata_path(Loc())) == 1
+
+    storage.after_batch(lambda: launched.append(Loc()))
+    assert launched[-1] == Loc()
+
+
+@pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
+def test_batch_raises(storage_class: type[ControllerStorage], tmp_path: Path) -> None:
+    """Nodes are not left started without being launched."""
+    storage = storage_class(UUID(int=602), tierkreis_directory=tmp_path)  # type: ignore
+    storage.clean_graph_files()
+    launched: list[Loc] = []
+
+    with pytest.raises(ValueError):
+        with storage.batch():
+            for i in range(2):
+                loc = Loc().N(i)
+                storage.write_node_def(loc, Const(i))
+                storage.after_batch(lambda loc=loc: launched.append(loc))
+            raise ValueError()
+
+    for i in range(2):
+        assert storage.is_node_started(Loc().N(i)) == (Loc().N(i) in launched)
+    if isinstance(storage, ControllerSQLiteStorage):
+        assert launched == []
+
+
+def test_sqlite_batch_is_a_transaction(tmp_path: Path) -> None:
+    storage = ControllerSQLiteStorage(UUID(int=601), tierkreis_directory=tmp_path)
+    worker_storage = WorkerSQLiteStorage(tmp_path)
+    path = storage._output_path(Loc().N(0), "value")
+    launched: list[Loc] = []
+
+    with pytest.raises(ValueError):
+        with storage.batch():
+            storage.write(path, b"1")
+            storage.after_batch(lambda: launched.append(Loc().N(0)))
+            assert storage.read(path) == b"1"
+            with pytest.raises(FileNotFoundError):
+                worker_storage.read_input(path.relative_to(tmp_path))
+            raise ValueError()
+
+    assert not storage.exists(path)
+    with pytest.raises(FileNotFoundError):
+        worker_storage.read_input(path.relative_to(tmp_path))
+    assert launched == []
+
+    with storage.batch():
+        storage.write(path, b"2")
+    assert worker_storage.read_input(path.relative_to(tmp_path)) == b"2"
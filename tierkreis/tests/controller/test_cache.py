@@ -0,0 +1,58 @@
+from pathlib import Path
+from uuid import UUID
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.cache import ResultCache
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.uv_executor import UvExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+
+registry_path = Path(__file__).parent.parent / "errors"
+
+
+def cached_graph(function_name: str) -> GraphData:
+    g = GraphData()
+    inputs = {"value": g.input("value")} if function_name == "cached_timestamp" else {}
+    value = g.func(f"failing_worker.{function_name}", inputs)
+    g.output({"value": value("value")})
+    return g
+
+
+def run(id: int, function_name: str, value: int, cache: ResultCache) -> bytes:
+    storage = ControllerFileStorage(UUID(int=id), name="result_cache")
+    storage.clean_graph_files()
+    executor = UvExecutor(registry_path, storage.logs_path)
+    run_graph(storage, executor, cached_graph(function_name), value, cache=cache)
+    assert storage.is_node_finished(Loc())
+    return storage.read_output(Loc(), "value")
+
+
+def test_result_cache(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+
+    first = run(1400, "cached_timestamp", 1, cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert run(1401, "cached_timestamp", 1, cache) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert run(1402, "cached_timestamp", 2, cache) != first
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_uncacheable_function(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path)
+
+    run(1403, "wont_fail", 1, cache)
+    run(1404, "wont_fail", 1, cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_evict_least_recently_used(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_bytes=0)
+
+    run(1405, "cached_timestamp", 1, cache)
+    assert list(tmp_path.iterdir()) == []
+    run(1406, "cached_timestamp", 1, cache)
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -0,0 +1,136 @@
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tests.controller.sample_graphdata import doubler_plus
+from tierkreis import Labels
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.builtins_executor import BuiltinsExecutor
+from tierkreis.controller.executor.shell_executor import ShellExecutor
+from tierkreis.controller.executor.uv_executor import UvExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.exceptions import TierkreisError
+from tierkreis.storage import read_outputs
+
+registry_path = Path(__file__).parent.parent / "errors"
+
+
+def adder() -> GraphData:
+    g = GraphData()
+    a = g.input("a")
+    b = g.input("b")
+    g.output({"value": g.func("builtins.iadd", {"a": a, "b": b})("value")})
+    return g
+
+
+def chunked_map(body: GraphData, n: int, chunk_size: int) -> GraphData:
+    """Map the body over `range(n)` in the first input, with 10 in the others."""
+    g = GraphData()
+    ns = g.func("builtins.unfold_values", {Labels.VALUE: g.const(list(range(n)))})
+    names = [x.name for x in body.nodes if x.type == "input"]
+    inputs = {k: ns("*") if k == names[0] else g.const(10) for k in names}
+    m = g.map(g.const(body), inputs, chunk_size=chunk_size)
+    folded = g.func("builtins.fold_values", {"values_glob": m("*")})
+    g.output({"value": folded(Labels.VALUE)})
+    return g
+
+
+@pytest.mark.parametrize(
+    "storage_class", [ControllerFileStorage, ControllerInMemoryStorage]
+)
+@pytest.mark.parametrize(
+    "body,expected",
+    [(adder(), list(range(10, 31))), (doubler_plus(), list(range(10, 51, 2)))],
+)
+def test_chunked_map(
+    storage_class: type[ControllerStorage],
+    body: GraphData,
+    expected: list[int],
+    tmp_path: Path,
+) -> None:
+    storage = storage_class(UUID(int=1600), tierkreis_directory=tmp_path)  # type: ignore
+    storage.clean_graph_files()
+    launches: list[Path] = []
+
+    class CountingExecutor(BuiltinsExecutor):
+        def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+            launches.append(worker_call_args_path)
+            super().run(launcher_name, worker_call_args_path)
+
+    graph = chunked_map(body, 21, 5)
+    run_graph(storage, CountingExecutor(storage), graph, {}, polling_interval_seconds=0)
+
+    assert read_outputs(graph, storage) == expected
+    map_calls = [p for p in launches if ".M" in str(p)]
+    if len(body.nodes) == 4:
+        # A single function body runs in one call per chunk.
+        assert len(map_calls) == 5
+    else:
+        assert len(map_calls) == 2 * 21
+
+
+def test_chunked_map_worker_invocations() -> None:
+    storage = ControllerFileStorage(UUID(int=1601), name="chunked_map")
+    storage.clean_graph_files()
+    launches: list[Path] = []
+
+    class CountingExecutor(UvExecutor):
+        def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+            launches.append(worker_call_args_path)
+            super().run(launcher_name, worker_call_args_path)
+
+    body = GraphData()
+    value = body.input("value")
+    timestamp = body.func("failing_worker.cached_timestamp", {"value": value})
+    body.output({"value": timestamp("value")})
+    graph = chunked_map(body, 7, 3)
+    executor = CountingExecutor(registry_path, storage.logs_path)
+    run_graph(storage, executor, graph, {}, polling_interval_seconds=0.1)
+
+    assert storage.is_node_finished(Loc())
+    assert len(launches) == 3
+    assert all(isinstance(x, int) for x in read_outputs(graph, storage))  # type: ignore
+
+
+def test_chunked_map_shell_launcher(tmp_path: Path) -> None:
+    """Shell launchers only run the first of fused calls, so they are not chunked."""
+    launcher = tmp_path / "cp_launcher"
+    launcher.write_text('#!/bin/sh\ncp "$input_value_file" "$output_value_file"\n')
+    launcher.chmod(0o755)
+    storage = ControllerFileStorage(UUID(int=1602), name="chunked_map_shell")
+    storage.clean_graph_files()
+    launches: list[Path] = []
+
+    class CountingExecutor(ShellExecutor):
+        def run(self, launcher_name: str, worker_call_args_path: Path) -> None:  # type: ignore[override]
+            launches.append(worker_call_args_path)
+            super().run(launcher_name, worker_call_args_path)
+
+    body = GraphData()
+    body.output(
+        {
+            "value": body.func("cp_launcher.copy", {"value": body.input("value")})(
+                "value"
+            )
+        }
+    )
+    graph = chunked_map(body, 4, 2)
+    executor = CountingExecutor(tmp_path, storage.workflow_dir)
+    run_graph(
+        storage, executor, graph, {}, n_iterations=1000, polling_interval_seconds=0.1
+    )
+
+    assert storage.is_node_finished(Loc())
+    assert read_outputs(graph, storage) == [0, 1, 2, 3]
+    assert len(launches) == 4
+
+
+def test_chunk_size_must_be_positive() -> None:
+    g = GraphData()
+    with pytest.raises(TierkreisError):
+        g.map(g.const(adder()), {"a": g.const(1), "b": g.const(2)}, chunk_size=0)
@@ -0,0 +1,116 @@
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tierkreis import Labels
+from tierkreis.controller import run_graph
+from tierkreis.controller.collector import OutputCollector
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.builtins_executor import BuiltinsExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.exceptions import TierkreisError
+from tierkreis.storage import read_outputs
+
+
+def loop_body() -> GraphData:
+    """Add one to `acc` until twice `acc` reaches 20, with twice `acc` in between."""
+    g = GraphData()
+    acc = g.input("acc")
+    new_acc = g.func("builtins.iadd", {"a": acc, "b": g.const(1)})("value")
+    twice = g.func("builtins.iadd", {"a": new_acc, "b": new_acc})("value")
+    should_continue = g.func("builtins.igt", {"a": g.const(20), "b": twice})("value")
+    g.output({"acc": new_acc, "should_continue": should_continue})
+    return g
+
+
+def map_body() -> GraphData:
+    g = GraphData()
+    x = g.input("x")
+    twice = g.func("builtins.iadd", {"a": x, "b": x})("value")
+    g.output({"value": g.func("builtins.iadd", {"a": twice, "b": g.const(1)})("value")})
+    return g
+
+
+def graph() -> GraphData:
+    g = GraphData()
+    loop = g.loop(g.const(loop_body()), {"acc": g.const(0)}, "should_continue")
+    xs = g.func("builtins.unfold_values", {Labels.VALUE: g.const([1, 2, 3])})
+    m = g.map(g.const(map_body()), {"x": xs("*")})
+    folded = g.func("builtins.fold_values", {"values_glob": m("*")})
+    g.output({"acc": loop("acc"), "values": folded(Labels.VALUE)})
+    return g
+
+
+LOOP = Loc().N(2)
+MAP = Loc().N(6)
+
+
+def run(storage: ControllerStorage, collector: OutputCollector) -> None:
+    storage.clean_graph_files()
+    run_graph(storage, BuiltinsExecutor(storage), graph(), {}, collector=collector)
+    assert read_outputs(graph(), storage) == {"acc": 10, "values": [3, 5, 7]}
+
+
+def has_output(storage: ControllerStorage, loc: Loc, port: str = "value") -> bool:
+    return storage.exists(storage._output_path(loc, port))
+
+
+@pytest.mark.parametrize(
+    "storage_class", [ControllerFileStorage, ControllerInMemoryStorage]
+)
+def test_collect_intermediate_outputs(
+    storage_class: type[ControllerStorage], tmp_path: Path
+) -> None:
+    storage = storage_class(UUID(int=2000), tierkreis_directory=tmp_path)  # type: ignore
+    collector = OutputCollector()
+    run(storage, collector)
+
+    assert collector.freed > 0
+    for k in range(10):
+        iteration = LOOP.L(k)
+        # The constants, the input and twice `acc` are only read inside the body.
+        assert not has_output(storage, iteration.N(1))
+        assert not has_output(storage, iteration.N(3))
+        assert not has_output(storage, iteration.N(4))
+        assert not has_output(storage, iteration.N(0), "acc")
+        assert has_output(storage, iteration.N(2))
+        assert has_output(storage, iteration, "acc")
+    for i in range(3):
+        assert not has_output(storage, MAP.M(i).N(1))
+        assert not has_output(storage, MAP.M(i).N(2))
+        assert has_output(storage, MAP.M(i).N(3))
+    # The top level graph is kept.
+    assert has_output(storage, Loc().N(1))
+    assert has_output(storage, Loc().N(4), "0")
+
+
+def test_keep_iterations(tmp_path: Path) -> None:
+    storage = ControllerFileStorage(UUID(int=2001), tierkreis_directory=tmp_path)
+    run(storage, OutputCollector(keep_iterations=2))
+
+    for k in range(8):
+        assert not storage.exists(storage._outputs_dir(LOOP.L(k)))
+        assert not storage.exists(storage._outputs_dir(LOOP.L(k).N(2)))
+        assert not storage.exists(storage._outputs_dir(LOOP.L(k).N(-1)))
+        assert storage.is_node_finished(LOOP.L(k))
+    for k in (8, 9):
+        assert has_output(storage, LOOP.L(k), "acc")
+        assert has_output(storage, LOOP.L(k).N(2))
+    assert storage.latest_loop_iteration(LOOP) == LOOP.L(9)
+
+
+def test_protect(tmp_path: Path) -> None:
+    storage = ControllerFileStorage(UUID(int=2002), tierkreis_directory=tmp_path)
+    run(storage, OutputCollector(keep_iterations=1, protect=[LOOP]))
+
+    for k in range(10):
+        assert has_output(storage, LOOP.L(k).N(3))
+        assert has_output(storage, LOOP.L(k), "acc")
+    assert not has_output(storage, MAP.M(0).N(1))
+
+    with pytest.raises(TierkreisError):
+        OutputCollector(keep_iterations=0)
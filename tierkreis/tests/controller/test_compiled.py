@@ -0,0 +1,77 @@
+import json
+from time import perf_counter
+from typing import Any, NamedTuple, Sequence
+
+import pytest
+
+from tierkreis.controller.data.compiled import compile_decoder, compile_encoder
+from tierkreis.controller.data.types import PType, bytes_from_ptype, ptype_from_bytes
+from tests.controller.test_types import (
+    DummyBaseModel,
+    DummyDictConvertible,
+    DummyListConvertible,
+    annotated_ptypes,
+)
+
+
+class Point(NamedTuple):
+    x: float
+    y: float
+    label: str
+
+
+class Tagged(NamedTuple):
+    point: Point
+    data: bytes
+    weights: list[complex]
+
+
+structs: Sequence[tuple[PType, Any]] = [
+    ([Point(1.0, 2.5, "a"), Point(-1.0, 0.0, "b")], list[Point]),
+    (Tagged(Point(0.0, 1.0, "c"), b"\x00\x01", [1j, 2 + 3j]), Tagged),
+    ({"a": [Point(1.0, 2.0, "d")]}, dict[str, list[Point]]),
+    ([1, None, 3], list[int | None]),
+    ([("a", 1)], list[tuple[str, int]]),
+    ([DummyBaseModel(a=1, b=b"x")], list[DummyBaseModel]),
+    (DummyDictConvertible(a=3), DummyDictConvertible | None),
+    (None, DummyListConvertible | None),
+    ({"one": 1, "bytes": b"asdf"}, None),
+    ([1, "two"], list[int]),  # Values that do not match the annotation.
+]
+
+
+@pytest.mark.parametrize("annotated_ptype", annotated_ptypes + structs)
+@pytest.mark.parametrize("encoding", ["json", "binary"])
+def test_compiled_matches_generic(
+    annotated_ptype: tuple[PType, Any], encoding: str
+) -> None:
+    ptype, annotation = annotated_ptype
+    bs = bytes_from_ptype(ptype, annotation, encoding=encoding)  # type: ignore
+    assert compile_encoder(annotation)(ptype, encoding) == bs  # type: ignore
+    assert compile_decoder(annotation)(bs) == ptype_from_bytes(bs, annotation)
+
+
+@pytest.mark.optional
+def test_compiled_decoder_benchmark() -> None:
+    points = [Point(float(i), float(-i), str(i)) for i in range(1_000_000)]
+    bs = bytes_from_ptype(points, list[Point])
+    decode = compile_decoder(list[Point])
+
+    start = perf_counter()
+    generic = ptype_from_bytes(bs, list[Point])
+    generic_seconds = perf_counter() - start
+
+    start = perf_counter()
+    compiled = decode(bs)
+    compiled_seconds = perf_counter() - start
+
+    start = perf_counter()
+    json.loads(bs)
+    loads_seconds = perf_counter() - start
+
+    print(
+        f"generic {generic_seconds:.2f}s, compiled {compiled_seconds:.2f}s,"
+        f" json.loads {loads_seconds:.2f}s"
+    )
+    assert compiled == generic
+    assert compiled_seconds < generic_seconds / 2
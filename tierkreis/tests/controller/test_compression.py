@@ -0,0 +1,147 @@
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import pytest
+
+from tierkreis import Labels
+from tierkreis.builtins.main import worker
+from tierkreis.consts import TKR_COMPRESSION_KEY, TKR_COMPRESSION_MIN_BYTES_KEY
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.compression import (
+    Compression,
+    ZlibCodec,
+    compress,
+    decompress,
+    default_compression,
+    is_compressed,
+)
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.data.types import bytes_from_ptype, ptype_from_bytes
+from tierkreis.controller.executor.builtins_executor import BuiltinsExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage
+from tierkreis.exceptions import TierkreisError
+from tierkreis.storage import read_outputs
+from tierkreis.worker.storage.filestorage import WorkerFileStorage
+
+large = bytes_from_ptype(list(range(2000)))
+
+
+def test_roundtrip() -> None:
+    compressed = compress(large, ZlibCodec())
+    assert is_compressed(compressed)
+    assert len(compressed) < len(large)
+    assert decompress(compressed) == large
+    assert decompress(large) == large
+    assert decompress(b"") == b""
+
+
+def test_thresholds(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(TKR_COMPRESSION_KEY, raising=False)
+    monkeypatch.delenv(TKR_COMPRESSION_MIN_BYTES_KEY, raising=False)
+    assert default_compression() is None
+    monkeypatch.setenv(TKR_COMPRESSION_KEY, "zlib")
+    assert default_compression() == Compression("zlib")
+    monkeypatch.setenv(TKR_COMPRESSION_MIN_BYTES_KEY, "100, body=0,counts=65536")
+    compression = default_compression()
+    assert compression is not None
+    assert compression.threshold("value") == 100
+    assert compression.threshold("body") == 0
+    assert compression.threshold("counts") == 65536
+
+    monkeypatch.setenv(TKR_COMPRESSION_MIN_BYTES_KEY, "body=small")
+    with pytest.raises(TierkreisError):
+        default_compression()
+    monkeypatch.setenv(TKR_COMPRESSION_KEY, "rar")
+    with pytest.raises(TierkreisError):
+        default_compression()
+
+
+def test_write_output(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(TKR_COMPRESSION_KEY, "zlib")
+    monkeypatch.setenv(TKR_COMPRESSION_MIN_BYTES_KEY, f"{len(large)},small=0")
+    storage = ControllerInMemoryStorage(UUID(int=2100))
+    storage.write_output(Loc(), "large", large)
+    storage.write_output(Loc(), "below", large[:-1])
+    storage.write_output(Loc(), "small", b"1")
+
+    assert is_compressed(storage.read(storage._output_path(Loc(), "large")))
+    assert storage.read(storage._output_path(Loc(), "below")) == large[:-1]
+    # Compressing a single byte only adds the header, so it is written raw.
+    assert storage.read(storage._output_path(Loc(), "small")) == b"1"
+    assert storage.read_output(Loc(), "large") == large
+
+    stats = storage.compression_stats
+    assert (stats.compressed, stats.skipped) == (1, 2)
+    assert stats.raw_bytes == len(large)
+    assert stats.ratio > 2
+
+
+def graph() -> GraphData:
+    g = GraphData()
+    xs = g.func("builtins.unfold_values", {Labels.VALUE: g.const(list(range(2000)))})
+    folded = g.func("builtins.fold_values", {"values_glob": xs("*")})
+    total = g.func("builtins.iadd", {"a": g.const(1), "b": g.const(2)})
+    g.output({"values": folded(Labels.VALUE), "total": total(Labels.VALUE)})
+    return g
+
+
+@pytest.mark.parametrize(
+    "storage_class",
+    [ControllerFileStorage, ControllerInMemoryStorage, ControllerSQLiteStorage],
+)
+def test_run_graph(
+    storage_class: type[ControllerStorage],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv(TKR_COMPRESSION_KEY, "zlib")
+    monkeypatch.setenv(TKR_COMPRESSION_MIN_BYTES_KEY, "1024")
+    storage = storage_class(UUID(int=2101), tierkreis_directory=tmp_path)  # type: ignore
+    storage.clean_graph_files()
+    executor = BuiltinsExecutor(storage)
+    run_graph(storage, executor, graph(), {})
+
+    assert read_outputs(graph(), storage) == {
+        "values": list(range(2000)),
+        "total": 3,
+    }
+    # The constant is written by the controller, the folded list by the worker.
+    assert is_compressed(storage.read(storage._output_path(Loc().N(0), "value")))
+    assert is_compressed(storage.read(storage._output_path(Loc(), "values")))
+    assert not is_compressed(storage.read(storage._output_path(Loc(), "total")))
+    assert storage.compression_stats.compressed > 0
+
+
+class _StorageWithoutStats:
+    def __init__(self, storage: WorkerFileStorage) -> None:
+        self._storage = storage
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "compression_stats":
+            raise AttributeError(name)
+        return getattr(self._storage, name)
+
+
+def test_worker_storage_without_stats(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(TKR_COMPRESSION_KEY, "zlib")
+    monkeypatch.setenv(TKR_COMPRESSION_MIN_BYTES_KEY, "0")
+    storage = ControllerFileStorage(UUID(int=2102), tierkreis_directory=tmp_path)
+    storage.write_output(Loc().N(0), "value-0", large)
+    call_args_path = storage.write_worker_call_args(
+        Loc().N(1), "fold_values", {"values_glob": (Loc().N(0), "*")}, ["value"]
+    )
+    worker_storage = _StorageWithoutStats(WorkerFileStorage(storage.tkr_dir))
+    monkeypatch.setattr(worker, "storage", worker_storage)
+    worker.run(call_args_path)
+
+    assert storage.is_node_finished(Loc().N(1))
+    assert ptype_from_bytes(storage.read_output(Loc().N(1), "value")) == [
+        list(range(2000))
+    ]
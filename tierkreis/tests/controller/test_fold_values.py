@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+
+from tierkreis.builtins.main import worker
+from tierkreis.consts import TKR_ENCODING_KEY
+from tierkreis.controller.data.binary import is_binary
+from tierkreis.controller.data.location import WorkerCallArgs
+from tierkreis.controller.data.types import bytes_from_ptype, ptype_from_bytes
+from tierkreis.worker.storage.filestorage import WorkerFileStorage
+from tierkreis.worker.storage.protocol import (
+    ListingWorkerStorage,
+    StreamingWorkerStorage,
+)
+
+values = [1, "two", [3.0, 4.5], {"five": b"\x05"}, None, 7 + 8j]
+
+
+def call_args(tmp_path: Path, inputs: dict[str, Path]) -> WorkerCallArgs:
+    (tmp_path / "outputs").mkdir()
+    return WorkerCallArgs(
+        function_name="",
+        inputs=inputs,
+        outputs={"value": tmp_path / "outputs" / "value"},
+        output_dir=tmp_path / "outputs",
+        done_path=tmp_path / "_done",
+        error_path=tmp_path / "_error",
+        logs_path=None,
+    )
+
+
+@pytest.fixture
+def storage(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> WorkerFileStorage:
+    storage = WorkerFileStorage(tmp_path)
+    monkeypatch.setattr(worker, "storage", storage)
+    return storage
+
+
+@pytest.mark.parametrize("encoding", ["json", "binary"])
+def test_fold_values(
+    tmp_path: Path,
+    storage: WorkerFileStorage,
+    monkeypatch: pytest.MonkeyPatch,
+    encoding: str,
+) -> None:
+    monkeypatch.setenv(TKR_ENCODING_KEY, encoding)
+    elements = tmp_path / "elements"
+    elements.mkdir()
+    # Mixed encodings and names that are not numbered 0 to n-1.
+    for i, v in enumerate(values):
+        encoded = bytes_from_ptype(v, encoding="binary" if i % 2 else "json")
+        (elements / f"value-{3 * i}").write_bytes(encoded)
+    (elements / "value-100").write_bytes(b"raw \xff bytes")
+    # Raw bytes that start like JSON.
+    (elements / "value-101").write_bytes(b"1abc")
+    (elements / "value-102").write_bytes(b"nope")
+
+    args = call_args(tmp_path, {"values_glob": elements / "*"})
+    worker.functions["fold_values"](args)
+
+    folded = (tmp_path / "outputs" / "value").read_bytes()
+    assert is_binary(folded) == (encoding == "binary")
+    assert ptype_from_bytes(folded) == values + [b"raw \xff bytes", b"1abc", b"nope"]
+
+
+def test_fold_values_in_order(tmp_path: Path, storage: WorkerFileStorage) -> None:
+    elements = tmp_path / "elements"
+    elements.mkdir()
+    for i in reversed(range(12)):
+        (elements / f"value-{i}").write_bytes(bytes_from_ptype(i))
+
+    args = call_args(tmp_path, {"values_glob": elements / "*"})
+    worker.functions["fold_values"](args)
+
+    folded = (tmp_path / "outputs" / "value").read_bytes()
+    assert folded == bytes_from_ptype(list(range(12)))
+
+
+@pytest.mark.parametrize("encoding", ["json", "binary"])
+def test_unfold_values(
+    tmp_path: Path,
+    storage: WorkerFileStorage,
+    monkeypatch: pytest.MonkeyPatch,
+    encoding: str,
+) -> None:
+    monkeypatch.setenv(TKR_ENCODING_KEY, encoding)
+    (tmp_path / "list").write_bytes(bytes_from_ptype(values, encoding=encoding))
+
+    args = call_args(tmp_path, {"value": tmp_path / "list"})
+    worker.functions["unfold_values"](args)
+
+    for i, v in enumerate(values):
+        element = (tmp_path / "outputs" / str(i)).read_bytes()
+        assert is_binary(element) == (encoding == "binary")
+        assert ptype_from_bytes(element) == v
+    assert len(list((tmp_path / "outputs").iterdir())) == len(values)
+
+
+def test_unfold_packed_values(
+    tmp_path: Path, storage: WorkerFileStorage, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(TKR_ENCODING_KEY, "binary")
+    (tmp_path / "list").write_bytes(bytes_from_ptype([1, -2, 300], encoding="binary"))
+
+    args = call_args(tmp_path, {"value": tmp_path / "list"})
+    worker.functions["unfold_values"](args)
+
+    outputs = [(tmp_path / "outputs" / str(i)).read_bytes() for i in range(3)]
+    assert [ptype_from_bytes(x) for x in outputs] == [1, -2, 300]
+
+
+class _MinimalStorage:
+    """Only the required members of `WorkerStorage`."""
+
+    def __init__(self, storage: WorkerFileStorage) -> None:
+        self.resolve = storage.resolve
+        self.read_call_args = storage.read_call_args
+        self.read_input = storage.read_input
+        self.write_output = storage.write_output
+        self.glob = storage.glob
+        self.mark_done = storage.mark_done
+        self.write_error = storage.write_error
+
+
+def test_fold_values_minimal_storage(
+    tmp_path: Path, storage: WorkerFileStorage, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    minimal = _MinimalStorage(storage)
+    assert not isinstance(minimal, StreamingWorkerStorage)
+    assert not isinstance(minimal, ListingWorkerStorage)
+    monkeypatch.setattr(worker, "storage", minimal)
+    elements = tmp_path / "elements"
+    elements.mkdir()
+    for i in range(3):
+        (elements / f"value-{i}").write_bytes(bytes_from_ptype(i))
+
+    args = call_args(tmp_path, {"values_glob": elements / "*"})
+    worker.functions["fold_values"](args)
+
+    folded = (tmp_path / "outputs" / "value").read_bytes()
+    assert ptype_from_bytes(folded) == [0, 1, 2]
@@ -0,0 +1,158 @@
+from pathlib import Path
+from uuid import UUID
+
+from tierkreis import Worker
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.fusion import fuse_chains
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.data.types import bytes_from_ptype
+from tierkreis.controller.executor.in_memory_executor import InMemoryExecutor
+from tierkreis.controller.executor.shell_executor import ShellExecutor
+from tierkreis.controller.executor.uv_executor import UvExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.worker.storage.filestorage import WorkerFileStorage
+
+registry_path = Path(__file__).parent.parent / "errors"
+
+
+def chain_graph() -> GraphData:
+    g = GraphData()
+    value = g.input("value")
+    a = g.func("failing_worker.cached_timestamp", {"value": value})("value")
+    b = g.func("failing_worker.cached_timestamp", {"value": a})("value")
+    c = g.func("failing_worker.cached_timestamp", {"value": b})("value")
+    g.output({"value": c})
+    return g
+
+
+def test_fuse_chains() -> None:
+    g = GraphData()
+    value = g.input("value")
+    a = g.func("w.f", {"value": value})("value")  # 1
+    b = g.func("w.f", {"value": a, "other": value})("value")  # 2
+    c = g.func("w.f", {"value": b})("value")  # 3
+    d = g.func("v.f", {"value": c})("value")  # 4: other launcher
+    e = g.func("v.f", {"value": d, "other": value})("value")  # 5: `value` not in 4
+    f = g.func("builtins.f", {"value": e})("value")  # 6
+    h = g.func("builtins.f", {"value": f})("value")  # 7
+    i = g.func("v.f", {"value": h})("value")  # 8: two consumers
+    g.output({"value": g.func("v.f", {"value": i})("value"), "i": i})
+    body = g.const(g.model_copy(deep=True))
+
+    fused = fuse_chains(g)
+    assert fused.fused == {1: [2, 3]}
+    assert fused.nodes[body[0]].value.fused == {1: [2, 3]}  # type: ignore
+    assert g.fused == {}
+    assert fuse_chains(g, exclude=()).fused == {1: [2, 3], 6: [7]}
+
+
+class CountingStorage(WorkerFileStorage):
+    def __init__(self, tierkreis_dir: Path) -> None:
+        super().__init__(tierkreis_dir)
+        self.reads: list[Path] = []
+
+    def read_input(self, path: Path) -> bytes:
+        self.reads.append(path)
+        return super().read_input(path)
+
+
+def test_worker_passes_values_in_memory() -> None:
+    storage = ControllerFileStorage(UUID(int=1500), name="fusion")
+    storage.clean_graph_files()
+    storage.write_output(Loc().N(0), "value", bytes_from_ptype([1, 2]))
+    locs = [Loc().N(i) for i in range(1, 4)]
+    fused = [
+        storage.write_worker_call_args(
+            loc, "double", {"value": (prev, "value")}, ["value"]
+        )
+        for prev, loc in zip(locs[:-1], locs[1:])
+    ]
+    head = storage.write_worker_call_args(
+        locs[0], "double", {"value": (Loc().N(0), "value")}, ["value"], fused
+    )
+
+    worker_storage = CountingStorage(storage.tkr_dir)
+    worker = Worker("fusion", worker_storage)
+
+    @worker.task()
+    def double(value: list[int]) -> list[int]:
+        return value + value
+
+    worker.run(head)
+
+    assert all(storage.is_node_finished(loc) for loc in locs)
+    assert storage.read_output(locs[-1], "value") == bytes_from_ptype([1, 2] * 8)
+    assert len(worker_storage.reads) == 1
+
+
+def test_fused_chain_runs_in_one_invocation() -> None:
+    storage = ControllerFileStorage(UUID(int=1501), name="fusion")
+    storage.clean_graph_files()
+    launches: list[Path] = []
+
+    class CountingExecutor(UvExecutor):
+        def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+            launches.append(worker_call_args_path)
+            super().run(launcher_name, worker_call_args_path)
+
+    executor = CountingExecutor(registry_path, storage.logs_path)
+    run_graph(storage, executor, fuse_chains(chain_graph()), 1)
+
+    assert storage.is_node_finished(Loc())
+    assert len(launches) == 1
+    timestamps = [storage.read_output(Loc().N(i), "value") for i in range(1, 4)]
+    assert timestamps == sorted(timestamps, key=int)
+
+
+def test_fused_chain_in_memory() -> None:
+    storage = ControllerInMemoryStorage(UUID(int=1503), name="fusion_in_memory")
+    launches: list[Path] = []
+
+    class CountingExecutor(InMemoryExecutor):
+        depth = 0
+
+        def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+            if self.depth == 0:
+                launches.append(worker_call_args_path)
+            self.depth += 1
+            try:
+                super().run(launcher_name, worker_call_args_path)
+            finally:
+                self.depth -= 1
+
+    executor = CountingExecutor(registry_path, storage)
+    run_graph(storage, executor, fuse_chains(chain_graph()), 1)
+
+    assert storage.is_node_finished(Loc())
+    assert len(launches) == 1
+    assert all(storage.is_node_finished(Loc().N(i)) for i in range(1, 4))
+
+
+def test_fused_chain_shell_launcher(tmp_path: Path) -> None:
+    """Shell launchers only run the first of fused calls, so chains start one by one."""
+    launcher = tmp_path / "cp_launcher"
+    launcher.write_text('#!/bin/sh\ncp "$input_value_file" "$output_value_file"\n')
+    launcher.chmod(0o755)
+    storage = ControllerFileStorage(UUID(int=1502), name="fusion_shell")
+    storage.clean_graph_files()
+    launches: list[Path] = []
+
+    class CountingExecutor(ShellExecutor):
+        def run(self, launcher_name: str, worker_call_args_path: Path) -> None:  # type: ignore[override]
+            launches.append(worker_call_args_path)
+            super().run(launcher_name, worker_call_args_path)
+
+    g = GraphData()
+    a = g.func("cp_launcher.copy", {"value": g.input("value")})("value")
+    g.output({"value": g.func("cp_launcher.copy", {"value": a})("value")})
+    fused = fuse_chains(g)
+    assert fused.fused == {1: [2]}
+
+    executor = CountingExecutor(tmp_path, storage.workflow_dir)
+    run_graph(storage, executor, fused, 7, polling_interval_seconds=0.1)
+
+    assert storage.is_node_finished(Loc())
+    assert storage.read_output(Loc(), "value") == b"7"
+    assert len(launches) == 2
@@ -1,6 +1,11 @@
+from collections import OrderedDict
+
 import pytest
+from tests.controller.sample_graphdata import simple_eval, simple_loop, simple_map
 from tierkreis.exceptions import TierkreisError
-from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data import graph
+from tierkreis.controller.data.graph import GraphData, graph_from_bytes
+from tierkreis.controller.data.types import bytes_from_ptype
 
 
 def test_only_one_output():
@@ -8,3 +13,18 @@ def test_only_one_output():
         g = GraphData()
         g.output({"one": g.const(1)})
         g.output({"two": g.const(2)})
+
+
+def test_graph_from_bytes_is_cached(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(graph, "GRAPH_CACHE_SIZE", 2)
+    monkeypatch.setattr(graph, "_graph_cache", OrderedDict())
+    bs = [bytes_from_ptype(simple_eval()), bytes_from_ptype(simple_loop())]
+
+    first = graph_from_bytes(bs[0])
+    assert len(first.nodes) == len(simple_eval().nodes)
+    assert graph_from_bytes(bytes(bs[0])) is first
+
+    graph_from_bytes(bs[1])
+    graph_from_bytes(bytes_from_ptype(simple_map()))
+    assert len(graph._graph_cache) == 2
+    assert graph_from_bytes(bs[0]) is not first
@@ -0,0 +1,40 @@
+from pathlib import Path
+from uuid import UUID
+
+from tierkreis.controller.data.graph import Const
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+
+
+def test_index() -> None:
+    storage = ControllerInMemoryStorage(UUID(int=700))
+    loc = Loc().N(0).M(1)
+    storage.write_node_def(loc, Const(1))
+    storage.write_output(loc, "a", b"1")
+    storage.write_output(loc, "b", b"2")
+    storage.link_outputs(Loc().N(1), "a", loc, "a")
+
+    assert storage.exists(storage._outputs_dir(loc))
+    assert storage.exists(storage.workflow_dir / str(loc))
+    assert not storage.exists(storage._done_path(loc))
+    assert storage.read_output_ports(loc) == ["a", "b"]
+    assert set(storage.list_subpaths(storage.workflow_dir)) == {
+        storage.workflow_dir / str(loc),
+        storage.workflow_dir / str(Loc().N(1)),
+    }
+
+    storage.delete(storage._outputs_dir(loc))
+    assert storage.is_node_started(loc)
+    assert storage.read_output_ports(loc) == []
+    assert not storage.exists(storage._outputs_dir(loc))
+    assert storage.read_output(Loc().N(1), "a") == b"1"
+
+    storage.delete(storage.workflow_dir / str(loc))
+    assert not storage.exists(storage.workflow_dir / str(loc))
+    assert storage.list_subpaths(storage.workflow_dir) == [
+        storage.workflow_dir / str(Loc().N(1))
+    ]
+
+    storage.clean_graph_files()
+    assert storage.files == {}
+    assert not storage.exists(Path())
@@ -203,3 +203,14 @@ def test_get_last_index(node_location: Loc, index: int) -> None:
 )
 def test_partial_paths(node_location: Loc, expected: list[Loc]):
     assert expected == node_location.partial_locs()
+
+
+@pytest.mark.parametrize(
+    "node_location", [node_location_1, node_location_2, node_location_3]
+)
+def test_derived_steps(node_location: Loc) -> None:
+    derived = [node_location.parent(), node_location.pop_first()[1]]
+    derived += node_location.partial_locs()
+    for loc in derived:
+        assert loc is not None
+        assert loc.steps() == Loc(str(loc)).steps()
@@ -9,6 +9,8 @@ from tierkreis.controller.executor.in_memory_executor import InMemoryExecutor
 from tierkreis.controller.executor.shell_executor import ShellExecutor
 from tierkreis.controller.storage.filestorage import ControllerFileStorage
 from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage
 from tierkreis.controller.data.graph import GraphData
 from tierkreis.storage import read_loop_trace
 
@@ -37,14 +39,18 @@ ids = [
     "loop_multiple_acc",
 ]
 
-storage_classes = [ControllerFileStorage, ControllerInMemoryStorage]
-storage_ids = ["FileStorage", "In-memory"]
+storage_classes = [
+    ControllerFileStorage,
+    ControllerInMemoryStorage,
+    ControllerSQLiteStorage,
+]
+storage_ids = ["FileStorage", "In-memory", "SQLite"]
 
 
 @pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
 @pytest.mark.parametrize("graph,output,name,id", params, ids=ids)
 def test_read_loop_trace(
-    storage_class: Type[ControllerFileStorage | ControllerInMemoryStorage],
+    storage_class: Type[ControllerStorage],
     graph: GraphData,
     output: Any,
     name: str,
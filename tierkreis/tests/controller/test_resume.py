@@ -29,7 +29,10 @@ from tests.controller.typed_graphdata import (
     gcd,
     typed_map_simple,
 )
+from tierkreis.consts import TKR_ENCODING_KEY
 from tierkreis.controller import run_graph
+from tierkreis.controller.data.binary import is_binary
+from tierkreis.controller.data.location import Loc
 from tierkreis.controller.data.types import PType
 from tierkreis.controller.executor.in_memory_executor import InMemoryExecutor
 from tierkreis.controller.executor.shell_executor import ShellExecutor
@@ -157,3 +160,71 @@ def test_resume(
 
     actual_output = read_outputs(g, storage)
     assert actual_output == output
+
+
+@pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
+@pytest.mark.parametrize("graph,output,name,id,inputs", params, ids=ids)
+def test_resume_event_driven(
+    storage_class: Type[ControllerFileStorage | ControllerInMemoryStorage],
+    graph: GraphData,
+    output: Any,
+    name: str,
+    id: int,
+    inputs: dict[str, PType] | PType,
+):
+    g = graph
+    storage = storage_class(UUID(int=100 + id), name=name)
+    executor = ShellExecutor(Path("./python/examples/launchers"), Path(""))
+    if isinstance(storage, ControllerInMemoryStorage):
+        executor = InMemoryExecutor(Path("./tierkreis/tierkreis"), storage=storage)
+    storage.clean_graph_files()
+    run_graph(
+        storage,
+        executor,
+        g,
+        inputs,
+        polling_interval_seconds=5,
+        event_driven=True,
+    )
+
+    actual_output = read_outputs(g, storage)
+    assert actual_output == output
+
+
+binary_ids = [
+    "simple_loop",
+    "simple_map",
+    "maps_in_series",
+    "factorial_4",
+    "typed_map",
+    "gcd_1071_462",
+    "gcd_3_0",
+]
+
+
+@pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
+@pytest.mark.parametrize(
+    "graph,output,name,id,inputs",
+    [p for p, i in zip(params, ids) if i in binary_ids],
+    ids=[i for i in ids if i in binary_ids],
+)
+def test_resume_binary_encoding(
+    storage_class: Type[ControllerFileStorage | ControllerInMemoryStorage],
+    graph: GraphData,
+    output: Any,
+    name: str,
+    id: int,
+    inputs: dict[str, PType] | PType,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setenv(TKR_ENCODING_KEY, "binary")
+    storage = storage_class(UUID(int=1300 + id), name=name)
+    executor = ShellExecutor(Path("./python/examples/launchers"), Path(""))
+    if isinstance(storage, ControllerInMemoryStorage):
+        executor = InMemoryExecutor(Path("./tierkreis/tierkreis"), storage=storage)
+    storage.clean_graph_files()
+    run_graph(storage, executor, graph, inputs)
+
+    for port in storage.read_output_ports(Loc()):
+        assert is_binary(storage.read_output(Loc(), port))
+    assert read_outputs(graph, storage) == output
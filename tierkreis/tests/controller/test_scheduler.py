@@ -0,0 +1,63 @@
+import threading
+from collections import Counter
+from pathlib import Path
+from time import sleep
+from uuid import UUID
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.multiple import MultipleExecutor
+from tierkreis.controller.scheduler import ConcurrencyLimits
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.worker.storage.controller_storage import ControllerWorkerStorage
+
+
+def independent_tasks() -> GraphData:
+    g = GraphData()
+    one = g.const(1)
+    outputs = {f"f{i}": g.func("worker.f", {"a": one})("value") for i in range(5)}
+    outputs |= {f"g{i}": g.func("other.g", {"a": one})("value") for i in range(3)}
+    g.output(outputs)
+    return g
+
+
+class CountingExecutor:
+    """Runs each call on a thread and records the most calls running at once."""
+
+    def __init__(self, storage: ControllerInMemoryStorage) -> None:
+        self.storage = ControllerWorkerStorage(storage)
+        self.lock = threading.Lock()
+        self.running: Counter[str] = Counter()
+        self.most: Counter[str] = Counter()
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        with self.lock:
+            self.running.update([launcher_name, "all"])
+            self.most |= self.running
+        threading.Thread(
+            target=self._finish, args=(launcher_name, worker_call_args_path)
+        ).start()
+
+    def _finish(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        sleep(0.05)
+        call_args = self.storage.read_call_args(worker_call_args_path)
+        with self.lock:
+            self.running.subtract([launcher_name, "all"])
+            self.storage.write_output(call_args.outputs["value"], b"1")
+            self.storage.mark_done(call_args.done_path)
+
+
+def test_concurrency_limits() -> None:
+    g = independent_tasks()
+    storage = ControllerInMemoryStorage(UUID(int=1000), name="limits")
+    counting = CountingExecutor(storage)
+    executor = MultipleExecutor(counting, {"slow": counting}, {"other": "slow"})
+    limits = ConcurrencyLimits(
+        max_running=3, launchers={"worker": 2}, executors={"slow": 1}
+    )
+
+    run_graph(storage, executor, g, {}, n_iterations=10000, limits=limits)
+
+    assert storage.is_node_finished(Loc())
+    assert counting.most == Counter({"all": 3, "worker": 2, "other": 1})
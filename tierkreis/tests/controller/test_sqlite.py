@@ -0,0 +1,90 @@
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tierkreis.controller.data.graph import Const
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.data.types import bytes_from_ptype, ptype_from_bytes
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage
+from tierkreis.worker.storage.sqlite import WorkerSQLiteStorage
+
+
+@pytest.fixture
+def storage(tmp_path: Path) -> ControllerSQLiteStorage:
+    storage = ControllerSQLiteStorage(UUID(int=500), tierkreis_directory=tmp_path)
+    storage.clean_graph_files()
+    return storage
+
+
+def test_entries(storage: ControllerSQLiteStorage) -> None:
+    loc = Loc().N(0)
+    storage.write_node_def(loc, Const(1))
+    assert storage.is_node_started(loc)
+    assert storage.read_node_def(loc) == Const(1)
+    assert storage.exists(storage.workflow_dir / str(loc))
+    assert not storage.exists(storage.workflow_dir / str(Loc().N(1)))
+
+    storage.write_output(loc, "b", b"2")
+    storage.write_output(loc, "a", b"1")
+    storage.write_output(Loc().N(1), "c", b"3")
+    assert storage.read_output_ports(loc) == ["a", "b"]
+
+    storage.mark_node_finished(loc)
+    assert storage.is_node_finished(loc)
+    assert storage.read_finished_time(loc) is not None
+
+    storage.delete(storage.workflow_dir / str(loc))
+    assert not storage.is_node_started(loc)
+    assert storage.read_output_ports(Loc().N(1)) == ["c"]
+
+
+def test_links_share_values(storage: ControllerSQLiteStorage) -> None:
+    storage.write_output(Loc().N(0), "value", b"1")
+    storage.link_outputs(Loc().N(1), "value", Loc().N(0), "value")
+    storage.link_outputs(Loc().N(1), "value", Loc().N(0), "value")
+    assert storage.read_output(Loc().N(1), "value") == b"1"
+
+    storage.link_outputs(Loc().N(1), "missing", Loc().N(0), "missing")
+    assert storage.read_output_ports(Loc().N(1)) == ["value"]
+
+    storage.delete(storage._outputs_dir(Loc().N(0)))
+    assert storage.read_output(Loc().N(1), "value") == b"1"
+    storage.delete(storage.workflow_dir)
+    assert storage._conn.execute("SELECT COUNT(*) FROM blobs").fetchone() == (0,)
+
+
+def test_markers_written_by_executors(storage: ControllerSQLiteStorage) -> None:
+    loc = Loc().N(0)
+    storage.mkdir(storage._done_path(loc).parent)
+    storage._done_path(loc).touch()
+    assert storage.is_node_finished(loc)
+    assert not storage.node_has_error(loc)
+
+    storage._error_path(loc).write_text("failed")
+    assert storage.node_has_error(loc)
+    assert storage.read_errors(loc) == "failed"
+
+
+def test_worker_storage(storage: ControllerSQLiteStorage) -> None:
+    loc = Loc().N(1)
+    storage.write_output(Loc().N(0), "value", bytes_from_ptype([1, 2]))
+    path = storage.write_worker_call_args(
+        loc, "unfold_values", {"value": (Loc().N(0), "value")}, ["*"]
+    )
+
+    worker_storage = WorkerSQLiteStorage(storage.tkr_dir)
+    call_args = worker_storage.read_call_args(path)
+    value = ptype_from_bytes(worker_storage.read_input(call_args.inputs["value"]))
+    for i, v in enumerate(value):
+        worker_storage.write_output(call_args.output_dir / str(i), bytes_from_ptype(v))
+    worker_storage.mark_done(call_args.done_path)
+
+    assert storage.is_node_finished(loc)
+    assert storage.read_output_ports(loc) == ["0", "1"]
+    assert sorted(worker_storage.glob(str(call_args.output_dir / "*"))) == [
+        str(call_args.output_dir / "0"),
+        str(call_args.output_dir / "1"),
+    ]
+    with pytest.raises(FileNotFoundError):
+        worker_storage.read_input(call_args.output_dir / "2")
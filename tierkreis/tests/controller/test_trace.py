@@ -0,0 +1,105 @@
+import json
+import os
+from argparse import Namespace
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tierkreis.cli.profile import CallTiming, call_timings, critical_path, profile_args
+from tierkreis.consts import TKR_TRACE_KEY
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import Const, Func, GraphData, Input, Map
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.uv_executor import UvExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.trace import active_tracer, read_trace, span, tracing
+
+registry_path = Path(__file__).parent.parent / "errors"
+
+
+def chain_graph() -> GraphData:
+    g = GraphData()
+    value = g.input("value")
+    a = g.func("failing_worker.cached_timestamp", {"value": value})("value")
+    b = g.func("failing_worker.cached_timestamp", {"value": a})("value")
+    c = g.func("builtins.iadd", {"a": a, "b": b})("value")
+    g.output({"value": c})
+    return g
+
+
+def test_tracing_is_scoped(tmp_path: Path) -> None:
+    with span("ignored", "test"):
+        pass
+    with tracing(tmp_path) as tracer:
+        assert active_tracer() is tracer
+        assert os.environ[TKR_TRACE_KEY] == str(tmp_path)
+        with span("traced", "test", loc=Loc().N(1)):
+            pass
+    assert active_tracer() is None
+    assert TKR_TRACE_KEY not in os.environ
+
+    (event,) = read_trace(tmp_path)
+    assert event["name"] == "traced"
+    assert event["ph"] == "X"
+    assert event["args"] == {"loc": "-.N1"}
+
+
+def test_critical_path() -> None:
+    storage = ControllerInMemoryStorage(UUID(int=3000))
+    nodes = {
+        "-.N0": Const(None),
+        "-.N1": Func("w.f", {}),
+        "-.N2": Func("w.f", {}),  # Runs alongside N1 and N3.
+        "-.N3": Func("w.g", {"value": (1, "value")}),
+        "-.N4": Map((0, "value"), {"value": (3, "value")}),
+        "-.N4.M0.N0": Input("value"),
+        "-.N4.M0.N1": Func("w.h", {"value": (0, "value")}),
+        "-.N5": Func("w.f", {"value": (4, "value"), "other": (2, "value")}),
+    }
+    for loc, node in nodes.items():
+        storage.write_node_def(Loc(loc), node)
+    timings = [
+        CallTiming("-.N1", "w.f", 0, 1, 10),
+        CallTiming("-.N2", "w.f", 0, 1, 20),
+        CallTiming("-.N3", "w.g", 12, 13, 18),
+        CallTiming("-.N4.M0.N1", "w.h", 21, 22, 30),
+        CallTiming("-.N5", "w.f", 31, 32, 40),
+    ]
+    path = critical_path(timings, storage)
+    assert [t.loc for t in path] == ["-.N1", "-.N3", "-.N4.M0.N1", "-.N5"]
+    assert critical_path([], storage) == []
+
+
+def test_trace_workflow(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    storage = ControllerFileStorage(UUID(int=1700), name="trace")
+    storage.clean_graph_files()
+    executor = UvExecutor(registry_path, storage.logs_path)
+    run_graph(
+        storage, executor, chain_graph(), 1, polling_interval_seconds=0.1, trace=True
+    )
+    assert storage.is_node_finished(Loc())
+    assert TKR_TRACE_KEY not in os.environ
+
+    events = read_trace(storage.trace_path)
+    names = {(e["cat"], e["name"]) for e in events}
+    assert {("controller", "walk"), ("controller", "start")} <= names
+    assert ("executor", "launch") in names
+    assert {("worker", "call"), ("worker", "compute")} <= names
+    assert len({e["pid"] for e in events}) > 1
+
+    timings = {t.loc: t for t in call_timings(events)}
+    assert set(timings) == {"-.N1", "-.N2", "-.N3"}
+    assert timings["-.N2"].function == "failing_worker.cached_timestamp"
+    assert all(t.started <= t.begin <= t.end for t in timings.values())
+    path = critical_path(list(timings.values()), storage)
+    assert [t.loc for t in path] == ["-.N1", "-.N2", "-.N3"]
+
+    chrome = tmp_path / "trace.json"
+    profile_args(
+        Namespace(workflow_id="1700", chrome=chrome, tierkreis_dir=storage.tkr_dir)
+    )
+    assert "Critical path: 3 calls" in capsys.readouterr().out
+    with open(chrome) as fh:
+        assert len(json.load(fh)["traceEvents"]) == len(events)
@@ -1,17 +1,23 @@
 from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 from types import NoneType, UnionType
 from typing import Mapping, Sequence, TypeVar
 from uuid import UUID
 from pydantic import BaseModel
 import pytest
+from tierkreis.consts import TKR_ENCODING_KEY
+from tierkreis.controller.data.binary import is_binary
 from tierkreis.controller.data.types import (
+    NPY_MAGIC,
     PType,
     bytes_from_ptype,
     generics_in_ptype,
     is_ptype,
+    ndarray_from_npy_file,
     ptype_from_bytes,
 )
+from tierkreis.exceptions import TierkreisError
 
 
 class UntupledModel[U, V](BaseModel):
@@ -148,3 +154,60 @@ generic_types.append((UntupledModel[S, T], {str(S), str(T)}))  # type: ignore
 @pytest.mark.parametrize("ptype,generics", generic_types)
 def test_generic_types(ptype: type[PType], generics: set[type[PType]]):
     assert generics_in_ptype(ptype) == generics
+
+
+binary_ptypes: Sequence[PType] = [
+    *ptypes,
+    1 + 2j,
+    2**70,
+    -(2**70),
+    [1, 2**64],
+    [0.5, 1.5, -2.0],
+    [1, 2.5, True],
+    (1, "two"),
+    {"complex": [1j, 2j], "nested": {"bytes": [b"a", b""]}},
+]
+
+
+@pytest.mark.parametrize("ptype", binary_ptypes)
+def test_binary_roundtrip(ptype: PType):
+    bs = bytes_from_ptype(ptype, encoding="binary")
+    assert isinstance(ptype, bytes) or is_binary(bs)
+    new_type = ptype_from_bytes(bs, type(ptype))
+    assert ptype == new_type or (isinstance(ptype, tuple) and list(ptype) == new_type)
+
+
+def test_binary_is_compact():
+    counts = {"counts": list(range(1000)), "payload": b"\x00" * 1000}
+    binary = bytes_from_ptype(counts, encoding="binary")
+    assert len(binary) < len(bytes_from_ptype(counts, encoding="json")) / 2
+    assert ptype_from_bytes(binary) == counts
+
+
+def test_encoding_from_environment(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(TKR_ENCODING_KEY, "binary")
+    assert is_binary(bytes_from_ptype([1, 2, 3]))
+    assert not is_binary(bytes_from_ptype([1, 2, 3], encoding="json"))
+
+    monkeypatch.setenv(TKR_ENCODING_KEY, "yaml")
+    with pytest.raises(TierkreisError):
+        bytes_from_ptype([1, 2, 3])
+
+
+def test_ndarray_npy_roundtrip(tmp_path: Path):
+    np = pytest.importorskip("numpy")
+    a = np.arange(12, dtype=np.complex128).reshape(3, 4).T
+
+    bs = bytes_from_ptype(a)
+    assert bs.startswith(NPY_MAGIC)
+    assert np.array_equal(ptype_from_bytes(bs, np.ndarray), a)
+
+    (tmp_path / "a").write_bytes(bs)
+    mapped = ndarray_from_npy_file(tmp_path / "a")
+    assert isinstance(mapped, np.memmap)
+    assert np.array_equal(mapped, a)
+    mapped[0, 0] = 1
+    assert (tmp_path / "a").read_bytes() == bs
+
+    with pytest.raises(TierkreisError):
+        bytes_from_ptype(np.array([object()]))
@@ -0,0 +1,32 @@
+import sys
+from uuid import UUID
+
+import pytest
+
+from tierkreis.controller.data.graph import Const
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+
+storage_classes = [ControllerFileStorage, ControllerInMemoryStorage]
+storage_ids = ["FileStorage", "In-memory"]
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="Requires inotify.")
+@pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
+def test_wait_for_change(
+    storage_class: type[ControllerFileStorage | ControllerInMemoryStorage],
+) -> None:
+    storage = storage_class(UUID(int=300), name="wait_for_change")
+    storage.clean_graph_files()
+    storage.write_metadata(Loc())
+
+    storage.write_node_def(Loc().N(0), Const(1))
+    assert storage.wait_for_change(0.01) is False
+
+    storage.mark_node_finished(Loc().N(0))
+    assert storage.wait_for_change(1) is True
+    assert storage.wait_for_change(0.01) is False
+
+    storage.write(storage._error_path(Loc().N(1)), b"")
+    assert storage.wait_for_change(1) is True
@@ -0,0 +1,63 @@
+from pathlib import Path
+from uuid import UUID
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.data.types import bytes_from_ptype
+from tierkreis.controller.start import start_nodes
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.walk import GraphWalker
+
+
+def two_tasks() -> GraphData:
+    g = GraphData()
+    one = g.const(1)
+    first = g.func("worker.first", {"a": one})("value")
+    second = g.func("worker.second", {"a": first})("value")
+    g.output({"value": second})
+    return g
+
+
+class CountingStorage(ControllerInMemoryStorage):
+    n_exists: int = 0
+
+    def exists(self, path: Path) -> bool:
+        self.n_exists += 1
+        return super().exists(path)
+
+
+class RecordingExecutor:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, Path]] = []
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        self.calls.append((launcher_name, worker_call_args_path))
+
+
+def test_walker_skips_unchanged_frontier() -> None:
+    g = two_tasks()
+    storage = CountingStorage(UUID(int=400), name="walker")
+    executor = RecordingExecutor()
+    run_graph(storage, executor, g, {}, n_iterations=0)
+
+    walker = GraphWalker(storage, g)
+    result = walker.walk()
+    while result.inputs_ready:
+        start_nodes(storage, executor, result.inputs_ready)
+        result = walker.walk()
+
+    first = Loc("-.N1")
+    assert walker.running == [first]
+    assert len(executor.calls) == 1
+
+    storage.n_exists = 0
+    result = walker.walk()
+    assert result.inputs_ready == []
+    assert result.started == [first]
+    assert storage.n_exists == 2
+
+    storage.write_output(first, "value", bytes_from_ptype(12))
+    storage.mark_node_finished(first)
+    result = walker.walk()
+    assert [x.node_location for x in result.inputs_ready] == [Loc("-.N2")]
@@ -1,5 +1,6 @@
 import logging
 from sys import argv
+from time import time_ns
 from tierkreis import Worker
 
 logger = logging.getLogger(__name__)
@@ -22,5 +23,10 @@ def exit_code_1() -> int:
     exit(1)
 
 
+@worker.task(cacheable=True)
+def cached_timestamp(value: int) -> int:
+    return time_ns()
+
+
 if __name__ == "__main__":
     worker.app(argv)
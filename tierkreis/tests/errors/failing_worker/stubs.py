@@ -32,3 +32,15 @@ class exit_code_1(NamedTuple):
     @property
     def namespace(self) -> str:
         return "failing_worker"
+
+
+class cached_timestamp(NamedTuple):
+    value: TKR[int]  # noqa: F821 # fmt: skip
+
+    @staticmethod
+    def out() -> type[TKR[int]]:  # noqa: F821 # fmt: skip
+        return TKR[int]  # noqa: F821 # fmt: skip
+
+    @property
+    def namespace(self) -> str:
+        return "failing_worker"
@@ -0,0 +1,69 @@
+from pathlib import Path
+from time import perf_counter
+from uuid import UUID
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.async_executor import AsyncExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tests.errors.test_error import (
+    non_zero_exit_code,
+    will_fail_graph,
+    wont_fail_graph,
+)
+
+registry_path = Path(__file__).parent.parent / "errors"
+
+
+def test_async_executor() -> None:
+    storage = ControllerFileStorage(UUID(int=1800), name="async_executor")
+    executor = AsyncExecutor(registry_path, logs_path=storage.logs_path)
+
+    storage.clean_graph_files()
+    run_graph(storage, executor, will_fail_graph().get_data(), {}, n_iterations=1000)
+    assert storage.node_has_error(Loc("-.N0"))
+
+    storage.clean_graph_files()
+    run_graph(storage, executor, wont_fail_graph().get_data(), {}, n_iterations=1000)
+    assert not storage.node_has_error(Loc("-.N0"))
+    assert storage.read_output(Loc(), "value") == b"0"
+    executor.close()
+
+
+def test_async_executor_process_exits() -> None:
+    storage = ControllerFileStorage(UUID(int=1801), name="async_executor_exits")
+    executor = AsyncExecutor(registry_path, logs_path=storage.logs_path)
+    storage.clean_graph_files()
+
+    run_graph(storage, executor, non_zero_exit_code().get_data(), {}, 1000)
+    assert storage.node_has_error(Loc("-.N0"))
+    executor.close()
+
+
+def sleep_graph(n: int) -> GraphData:
+    g = GraphData()
+    outputs = {}
+    for i in range(n):
+        value = g.const(i)
+        outputs[f"value_{i}"] = g.func("sleep_launcher.copy", {"value": value})("value")
+    g.output(outputs)
+    return g
+
+
+def test_async_executor_launches_concurrently(tmp_path: Path) -> None:
+    launcher = tmp_path / "sleep_launcher"
+    launcher.write_text(
+        '#!/bin/sh\nsleep 1\ncp "$input_value_file" "$output_value_file"\n'
+    )
+    launcher.chmod(0o755)
+    storage = ControllerFileStorage(UUID(int=1802), name="async_executor_many")
+    executor = AsyncExecutor(tmp_path, logs_path=storage.logs_path)
+    storage.clean_graph_files()
+
+    start = perf_counter()
+    run_graph(storage, executor, sleep_graph(8), {}, 1000, 0.05)
+    assert perf_counter() - start < 4
+    for i in range(8):
+        assert storage.read_output(Loc(), f"value_{i}") == str(i).encode()
+    executor.close()
@@ -0,0 +1,102 @@
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import pytest
+
+from tests.controller.sample_graphdata import simple_loop, simple_map
+from tests.controller.typed_graphdata import factorial
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.builtins_executor import BuiltinsExecutor
+from tierkreis.controller.executor.protocol import ArrayExecutor, PollingExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage
+from tierkreis.exceptions import TierkreisError
+from tierkreis.storage import read_outputs
+
+storage_classes = [
+    ControllerFileStorage,
+    ControllerInMemoryStorage,
+    ControllerSQLiteStorage,
+]
+storage_ids = ["FileStorage", "In-memory", "SQLite"]
+params: list[tuple[GraphData, Any, Any]] = [
+    (simple_loop(), {}, 10),
+    (simple_map(), {}, list(range(6, 47, 2))),
+    (factorial().get_data(), 4, 24),
+]
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+@pytest.mark.parametrize("graph,inputs,output", params)
+@pytest.mark.parametrize("storage_class", storage_classes, ids=storage_ids)
+def test_builtins_executor(
+    storage_class: type[ControllerStorage],
+    graph: GraphData,
+    inputs: Any,
+    output: Any,
+    max_workers: int,
+    tmp_path: Path,
+) -> None:
+    storage = storage_class(UUID(int=900), tierkreis_directory=tmp_path)  # type: ignore
+    storage.clean_graph_files()
+    executor = BuiltinsExecutor(storage, max_workers=max_workers)
+    run_graph(storage, executor, graph, inputs, polling_interval_seconds=0)
+
+    assert read_outputs(graph, storage) == output
+
+
+def test_builtins_executor_errors(tmp_path: Path) -> None:
+    g = GraphData()
+    g.output({"value": g.func("builtins.iadd", {"a": g.const(1)})("value")})
+    storage = ControllerFileStorage(UUID(int=901), tierkreis_directory=tmp_path)
+    executor = BuiltinsExecutor(storage)
+    run_graph(storage, executor, g, {})
+    assert storage.node_has_error(Loc().N(1))
+
+    g = GraphData()
+    g.output({"value": g.func("other.f", {})("value")})
+    storage.clean_graph_files()
+    with pytest.raises(TierkreisError):
+        run_graph(storage, executor, g, {})
+
+
+class _HPCExecutor:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str, int]] = []
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        self.calls.append(("run", launcher_name, 1))
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        self.calls.append(("run_array", launcher_name, len(worker_call_args_paths)))
+
+    def poll(self) -> None:
+        self.calls.append(("poll", "", 0))
+
+
+def test_builtins_executor_delegates(tmp_path: Path) -> None:
+    storage = ControllerFileStorage(UUID(int=902), tierkreis_directory=tmp_path)
+    inner = _HPCExecutor()
+    executor = BuiltinsExecutor(storage, inner)
+    assert isinstance(executor, ArrayExecutor)
+    assert isinstance(executor, PollingExecutor)
+
+    executor.run_array("worker", [Path("a"), Path("b")])
+    executor.poll()
+    assert inner.calls == [("run_array", "worker", 2), ("poll", "", 0)]
+    BuiltinsExecutor(storage).poll()
+
+
+def test_builtins_executor_unreadable_call(tmp_path: Path) -> None:
+    storage = ControllerFileStorage(UUID(int=903), tierkreis_directory=tmp_path)
+    executor = BuiltinsExecutor(storage, max_workers=1)
+    path = storage.workflow_dir.relative_to(tmp_path) / str(Loc().N(0)) / "definition"
+    executor.run("builtins", path)
+    executor._pool.shutdown()  # type: ignore[union-attr]
+
+    assert storage.node_has_error(Loc().N(0))
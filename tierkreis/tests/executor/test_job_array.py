@@ -0,0 +1,145 @@
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import Func, GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.hpc.job_spec import JobSpec, ResourceSpec
+from tierkreis.controller.executor.hpc.slurm import (
+    SLURMExecutor,
+    generate_slurm_script,
+)
+from tierkreis.controller.executor.multiple import MultipleExecutor
+from tierkreis.controller.executor.shell_executor import ShellExecutor
+from tierkreis.controller.start import NodeRunData, start_nodes
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.exceptions import TierkreisError
+from tierkreis.labels import Labels
+
+registry_path = Path(__file__).parent.parent / "errors"
+fake_sbatch = Path(__file__).parent / "fake_sbatch"
+
+
+def map_body() -> GraphData:
+    g = GraphData()
+    g.input("value")
+    g.output({"value": g.func("failing_worker.wont_fail", {})("value")})
+    return g
+
+
+def map_graph() -> GraphData:
+    g = GraphData()
+    values = g.func("builtins.unfold_values", {Labels.VALUE: g.const([1, 2, 3, 4])})
+    m = g.map(g.const(map_body()), {"value": values("*")})
+    folded = g.func("builtins.fold_values", {"values_glob": m("*")})
+    g.output({"value": folded(Labels.VALUE)})
+    return g
+
+
+def test_array_directive() -> None:
+    spec = JobSpec(job_name="array", command="main.py", resource=ResourceSpec())
+    assert "--array" not in generate_slurm_script(spec)
+    spec.array_size = 4
+    assert "#SBATCH --array=0-3" in generate_slurm_script(spec).splitlines()
+
+
+@pytest.mark.parametrize("multiple", [False, True])
+def test_map_submitted_as_job_array(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, multiple: bool
+) -> None:
+    submissions = tmp_path / "submissions"
+    monkeypatch.setenv("FAKE_SBATCH_LOG", str(submissions))
+    storage = ControllerFileStorage(UUID(int=1200 + multiple), name="job_array")
+    storage.clean_graph_files()
+    spec = JobSpec(job_name="array", command="uv run main.py", resource=ResourceSpec())
+    executor = SLURMExecutor(registry_path, storage.logs_path, spec, str(fake_sbatch))
+    if multiple:
+        executor = MultipleExecutor(
+            ShellExecutor(registry_path, storage.workflow_dir),
+            {"slurm": executor},
+            {"failing_worker": "slurm"},
+        )
+
+    run_graph(storage, executor, map_graph(), {}, n_iterations=100000)
+
+    assert storage.is_node_finished(Loc())
+    assert storage.read_output(Loc(), "value") == b"[0, 0, 0, 0]"
+    assert len(submissions.read_text().splitlines()) == 1
+
+
+def test_array_keeps_executor_errors_path(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_SBATCH_DROP", "1")
+    spec = JobSpec(job_name="array", command="main.py", resource=ResourceSpec())
+    executor = SLURMExecutor(None, tmp_path / "logs", spec, str(fake_sbatch))
+    executor.errors_path = tmp_path / "node" / "errors"
+    paths = [Path(str(UUID(int=1204))) / f"-.N{i}" / "definition" for i in range(2)]
+    executor.run_array("worker", paths)
+    assert executor.errors_path == tmp_path / "node" / "errors"
+
+
+class _RecordingExecutor:
+    def __init__(self, failing: str | None = None) -> None:
+        self.failing = failing
+        self.runs: list[str] = []
+        self.arrays: list[str] = []
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        self.runs.append(launcher_name)
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        if launcher_name == self.failing:
+            raise TierkreisError("sbatch: error: invalid partition")
+        self.arrays.append(launcher_name)
+
+
+def _func_nodes(*launchers: str) -> list[NodeRunData]:
+    return [
+        NodeRunData(Loc().N(i), Func(f"{launcher}.f", {}), [Labels.VALUE])
+        for i, launcher in enumerate(launchers)
+    ]
+
+
+def test_failed_array_group_marks_its_nodes(tmp_path: Path) -> None:
+    storage = ControllerFileStorage(UUID(int=1202), tierkreis_directory=tmp_path)
+    executor = _RecordingExecutor(failing="bad")
+    start_nodes(storage, executor, _func_nodes("bad", "good", "bad"))
+
+    assert executor.arrays == ["good"]
+    for loc in [Loc().N(0), Loc().N(2)]:
+        assert storage.node_has_error(loc)
+        assert "invalid partition" in storage.read_errors(loc)
+    assert not storage.node_has_error(Loc().N(1))
+
+
+class _Direct:
+    def __init__(self) -> None:
+        self.runs: list[str] = []
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        self.runs.append(launcher_name)
+
+
+class _RecordingMultipleExecutor(MultipleExecutor):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.arrays: list[str] = []
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        self.arrays.append(launcher_name)
+        super().run_array(launcher_name, worker_call_args_paths)
+
+
+def test_multiple_executor_delegating_to_array_executor(tmp_path: Path) -> None:
+    storage = ControllerFileStorage(UUID(int=1203), tierkreis_directory=tmp_path)
+    direct, array = _Direct(), _RecordingExecutor()
+    executor = _RecordingMultipleExecutor(direct, {"array": array}, {"good": "array"})
+    start_nodes(storage, executor, _func_nodes("other", "good"))
+
+    # Only the launcher assigned to an array executor is launched as an array.
+    assert executor.arrays == ["good"]
+    assert direct.runs == ["other"]
+    assert array.arrays == ["good"]
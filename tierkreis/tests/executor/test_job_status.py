@@ -0,0 +1,100 @@
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.hpc.job_spec import JobSpec, ResourceSpec
+from tierkreis.controller.executor.hpc.job_status import LOST, JobStates, JobTracker
+from tierkreis.controller.executor.hpc.slurm import (
+    ACTIVE_STATES,
+    SLURMExecutor,
+    parse_job_id,
+    squeue_states,
+)
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage
+from tests.errors.test_error import wont_fail_graph
+
+registry_path = Path(__file__).parent.parent / "errors"
+fake_sbatch = Path(__file__).parent / "fake_sbatch"
+fake_squeue = Path(__file__).parent / "fake_squeue"
+
+
+def test_parse_job_id() -> None:
+    assert parse_job_id("Submitted batch job 4242\n") == "4242"
+    assert parse_job_id("4242;cluster\n") == "4242"
+    assert parse_job_id("") is None
+
+
+def test_squeue_states(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    output = tmp_path / "squeue"
+    output.write_text("7 RUNNING\n8_0 PENDING\n8_1 TIMEOUT\n")
+    log = tmp_path / "log"
+    monkeypatch.setenv("FAKE_SQUEUE_OUTPUT", str(output))
+    monkeypatch.setenv("FAKE_SQUEUE_LOG", str(log))
+
+    states = squeue_states(str(fake_squeue))(["7", "8"])
+    assert states == {"7": "RUNNING", "8_0": "PENDING", "8_1": "TIMEOUT"}
+    assert log.read_text().split() == ["-h", "-r", "-o", "%i", "%T", "-j", "7,8"]
+    assert squeue_states(str(tmp_path / "missing"))(["7"]) is None
+
+
+@pytest.mark.parametrize(
+    "storage_class", [ControllerFileStorage, ControllerSQLiteStorage]
+)
+def test_job_tracker(tmp_path: Path, storage_class: type[ControllerStorage]) -> None:
+    queries: list[list[str]] = []
+    states: JobStates = {"1": "RUNNING", "2_0": "PENDING", "2_1": "TIMEOUT"}
+
+    def query(job_ids: list[str]) -> JobStates:
+        queries.append(job_ids)
+        return states
+
+    storage = storage_class(UUID(int=1901), tierkreis_directory=tmp_path)  # type: ignore
+    locs = [Loc().N(i) for i in range(4)]
+    tracker = JobTracker(query, ACTIVE_STATES, poll_interval_seconds=3600)
+    tracker.add("1", storage, locs[:1])
+    tracker.add("2", storage, locs[1:3])
+    tracker.add("3", storage, locs[3:])
+    # Left the queue after finishing its node, which SQLite keeps in the database.
+    storage.mark_node_finished(locs[3])
+
+    tracker.poll()
+    tracker.poll()  # Throttled.
+    assert queries == [["1", "2", "3"]]
+    assert tracker.states == {"RUNNING": 1, "PENDING": 1, LOST: 1}
+    assert [storage.node_has_error(loc) for loc in locs] == [False, False, True, False]
+    assert "2_1 ended in state TIMEOUT" in storage.read_errors(locs[2])
+
+
+@pytest.mark.parametrize(
+    "storage_class", [ControllerFileStorage, ControllerSQLiteStorage]
+)
+def test_killed_job_marks_node_errored(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    storage_class: type[ControllerStorage],
+) -> None:
+    monkeypatch.setenv("FAKE_SBATCH_DROP", "1")
+    monkeypatch.setenv("FAKE_SQUEUE_OUTPUT", str(tmp_path / "empty"))
+    (tmp_path / "empty").touch()
+    storage = storage_class(UUID(int=1900), name="killed_job")
+    storage.clean_graph_files()
+    spec = JobSpec(job_name="killed", command="uv run main.py", resource=ResourceSpec())
+    executor = SLURMExecutor(
+        registry_path,
+        storage.logs_path,
+        spec,
+        str(fake_sbatch),
+        status_command=str(fake_squeue),
+        poll_interval_seconds=0,
+    )
+
+    run_graph(storage, executor, wont_fail_graph(), {}, n_iterations=1000)
+
+    assert storage.node_has_error(Loc("-.N0"))
+    assert "left the queue" in storage.read_errors(Loc("-.N0"))
+    assert executor.jobs.states[LOST] == 1
@@ -0,0 +1,160 @@
+import json
+from pathlib import Path
+import os
+from time import sleep, time
+from uuid import UUID
+
+import pytest
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.graph import GraphData
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.hpc.job_spec import JobSpec, ResourceSpec
+from tierkreis.controller.executor.hpc.pilot import (
+    PilotAgent,
+    PilotExecutor,
+    walltime_seconds,
+)
+from tierkreis.controller.executor.hpc.slurm import SLURMExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.exceptions import TierkreisError
+
+registry_path = Path(__file__).parent.parent / "errors"
+fake_sbatch = Path(__file__).parent / "fake_sbatch"
+
+
+def three_tasks() -> GraphData:
+    g = GraphData()
+    outputs = {
+        f"value{i}": g.func("failing_worker.wont_fail", {})("value") for i in range(3)
+    }
+    g.output(outputs)
+    return g
+
+
+def test_walltime_seconds() -> None:
+    assert walltime_seconds("01:02:03") == 3723
+    assert walltime_seconds("15:00") == 900
+    assert walltime_seconds("2-03") == 2 * 86400 + 3 * 3600
+    assert walltime_seconds("1-00:30") == 86400 + 1800
+    assert walltime_seconds("1-01:02:03") == 86400 + 3723
+    for invalid in ["00:00:00", "1:-5", "a:00", "1-2:3:4:5"]:
+        with pytest.raises(TierkreisError):
+            walltime_seconds(invalid)
+
+
+def test_walltime_margin(tmp_path: Path) -> None:
+    spec = JobSpec(
+        job_name="pilot", command="", resource=ResourceSpec(), walltime="00:00:30"
+    )
+    slurm = SLURMExecutor(registry_path, tmp_path / "logs", spec, str(fake_sbatch))
+    with pytest.raises(TierkreisError):
+        PilotExecutor(slurm, walltime_margin=60)
+
+
+def test_poll_replaces_lost_pilots(tmp_path: Path) -> None:
+    spec = JobSpec(job_name="pilot", command="uv run main.py", resource=ResourceSpec())
+    slurm = SLURMExecutor(registry_path, tmp_path / "logs", spec, str(fake_sbatch))
+    executor = PilotExecutor(slurm, heartbeat_timeout=10, pending_timeout=100)
+    submitted: list[None] = []
+    executor.submit_pilot = lambda: submitted.append(None)  # type: ignore
+
+    executor.poll()
+    assert submitted == []
+
+    queue_dir = executor.pilot_dir / "queue"
+    queue_dir.mkdir(parents=True)
+    (queue_dir / "call").write_text("{}")
+    pilots_dir = executor.pilot_dir / "pilots"
+    pilots_dir.mkdir()
+    (pilots_dir / "pending").write_text("pending")
+    (pilots_dir / "running").write_text("running")
+    executor.poll()
+    assert submitted == []
+
+    # The running pilot reached its walltime, the pending one was dropped.
+    os.utime(pilots_dir / "running", (time() - 20, time() - 20))
+    assert executor.alive_pilots() == 1
+    os.utime(pilots_dir / "pending", (time() - 200, time() - 200))
+    assert executor.alive_pilots() == 0
+    executor.poll()
+    assert submitted == [None]
+
+
+def test_pilot_executor(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    submissions = tmp_path / "submissions"
+    monkeypatch.setenv("FAKE_SBATCH_LOG", str(submissions))
+    storage = ControllerFileStorage(UUID(int=1100), name="pilot_executor")
+    storage.clean_graph_files()
+    spec = JobSpec(job_name="pilot", command="uv run main.py", resource=ResourceSpec())
+    slurm = SLURMExecutor(registry_path, storage.logs_path, spec, str(fake_sbatch))
+    executor = PilotExecutor(slurm, idle_timeout=1, slots=3)
+
+    run_graph(storage, executor, three_tasks(), {}, n_iterations=100000)
+
+    assert storage.is_node_finished(Loc())
+    assert [storage.read_output(Loc(), f"value{i}") for i in range(3)] == [b"0"] * 3
+    assert len(submissions.read_text().splitlines()) == 1
+
+    for _ in range(100):
+        if executor.alive_pilots() == 0:
+            break
+        sleep(0.1)
+    assert executor.alive_pilots() == 0
+
+
+def test_poll_errors_calls_of_dead_pilots(tmp_path: Path) -> None:
+    spec = JobSpec(job_name="pilot", command="uv run main.py", resource=ResourceSpec())
+    logs_path = tmp_path / "workflow" / "logs"
+    slurm = SLURMExecutor(registry_path, logs_path, spec, str(fake_sbatch))
+    executor = PilotExecutor(slurm, heartbeat_timeout=10)
+    executor.submit_pilot = lambda: None  # type: ignore
+
+    pilots_dir = executor.pilot_dir / "pilots"
+    pilots_dir.mkdir(parents=True)
+    for pilot in ["dead", "alive"]:
+        (pilots_dir / pilot).write_text("running")
+        claimed_dir = executor.pilot_dir / "claimed" / pilot
+        claimed_dir.mkdir(parents=True)
+        for node in ["running", "done"]:
+            (tmp_path / "workflow" / f"{pilot}-{node}").mkdir()
+            path = f"workflow/{pilot}-{node}/definition"
+            (claimed_dir / node).write_text(json.dumps({"path": path}))
+        (tmp_path / "workflow" / f"{pilot}-done" / "_done").touch()
+    os.utime(pilots_dir / "dead", (time() - 20, time() - 20))
+
+    executor.poll()
+
+    node_dirs = tmp_path / "workflow"
+    assert (node_dirs / "dead-running" / "_error").exists()
+    assert "died" in (node_dirs / "dead-running" / "errors").read_text()
+    for node in ["dead-done", "alive-running", "alive-done"]:
+        assert not (node_dirs / node / "_error").exists()
+    assert not (executor.pilot_dir / "claimed" / "dead").exists()
+    assert len(list((executor.pilot_dir / "claimed" / "alive").iterdir())) == 2
+
+
+def test_submit_pilot_keeps_executor_errors_path(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FAKE_SBATCH_DROP", "1")
+    spec = JobSpec(job_name="pilot", command="uv run main.py", resource=ResourceSpec())
+    slurm = SLURMExecutor(registry_path, tmp_path / "logs", spec, str(fake_sbatch))
+    slurm.errors_path = tmp_path / "node" / "errors"
+    PilotExecutor(slurm).submit_pilot()
+    assert slurm.errors_path == tmp_path / "node" / "errors"
+
+
+def test_agent_quotes_paths(tmp_path: Path) -> None:
+    node_dir = tmp_path / "a dir" / "node"
+    node_dir.mkdir(parents=True)
+    claimed = tmp_path / "claimed"
+    claimed.write_text(json.dumps({"launcher_name": "x", "path": "a dir/node/def"}))
+    agent = PilotAgent(tmp_path / "pilot", "id", "false", tmp_path)
+
+    agent.start(claimed)
+    agent.running[claimed].wait()
+    agent.reap()
+
+    assert (node_dir / "_error").exists()
+    assert not claimed.exists()
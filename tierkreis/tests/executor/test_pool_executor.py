@@ -0,0 +1,38 @@
+from pathlib import Path
+from uuid import UUID
+
+from tierkreis.controller import run_graph
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.pool_executor import WorkerPoolExecutor
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tests.errors.test_error import (
+    non_zero_exit_code,
+    will_fail_graph,
+    wont_fail_graph,
+)
+
+registry_path = Path(__file__).parent.parent / "errors"
+
+
+def test_pool_executor() -> None:
+    storage = ControllerFileStorage(UUID(int=800), name="pool_executor")
+    executor = WorkerPoolExecutor(registry_path, logs_path=storage.logs_path)
+    storage.clean_graph_files()
+
+    for graph in [wont_fail_graph(), will_fail_graph(), wont_fail_graph()]:
+        storage.clean_graph_files()
+        run_graph(storage, executor, graph.get_data(), {}, n_iterations=1000)
+
+    assert not storage.node_has_error(Loc("-.N0"))
+    assert storage.read_output(Loc(), "value") == b"0"
+    executor.close()
+
+
+def test_pool_executor_process_exits() -> None:
+    storage = ControllerFileStorage(UUID(int=801), name="pool_executor_exits")
+    executor = WorkerPoolExecutor(registry_path, logs_path=storage.logs_path)
+    storage.clean_graph_files()
+
+    run_graph(storage, executor, non_zero_exit_code().get_data(), {}, 1000)
+    assert storage.node_has_error(Loc("-.N0"))
+    executor.close()
@@ -182,10 +182,10 @@ class GraphBuilder[Inputs: TModel, Outputs: TModel]:
         return self._fold_list(TList(body(aes._value)))
 
     def _map_graph_full[A: TModel, B: TModel](
-        self, aes: TList[A], body: TypedGraphRef[A, B]
+        self, aes: TList[A], body: TypedGraphRef[A, B], chunk_size: int | None = None
     ) -> TList[B]:
         ins = dict_from_tmodel(aes._value)
-        idx, _ = self.data.map(body.graph_ref, ins)("x")
+        idx, _ = self.data.map(body.graph_ref, ins, chunk_size)("x")
 
         refs = [(idx, s + "-*") for s in model_fields(body.outputs_type)]
         return TList(init_tmodel(body.outputs_type, refs))
@@ -197,6 +197,7 @@ class GraphBuilder[Inputs: TModel, Outputs: TModel]:
             Callable[[TKR[A]], B] | TypedGraphRef[TKR[A], B] | "GraphBuilder[TKR[A], B]"
         ),
         aes: TKR[list[A]],
+        chunk_size: int | None = None,
     ) -> TList[B]: ...
 
     @overload
@@ -206,11 +207,15 @@ class GraphBuilder[Inputs: TModel, Outputs: TModel]:
             Callable[[A], TKR[B]] | TypedGraphRef[A, TKR[B]] | "GraphBuilder[A, TKR[B]]"
         ),
         aes: TList[A],
+        chunk_size: int | None = None,
     ) -> TKR[list[B]]: ...
 
     @overload
     def map[A: TNamedModel, B: TNamedModel](
-        self, body: TypedGraphRef[A, B] | "GraphBuilder[A, B]", aes: TList[A]
+        self,
+        body: TypedGraphRef[A, B] | "GraphBuilder[A, B]",
+        aes: TList[A],
+        chunk_size: int | None = None,
     ) -> TList[B]: ...
 
     @overload
@@ -222,11 +227,21 @@ class GraphBuilder[Inputs: TModel, Outputs: TModel]:
             | "GraphBuilder[TKR[A], TKR[B]]"
         ),
         aes: TKR[list[A]],
+        chunk_size: int | None = None,
     ) -> TKR[list[B]]: ...
 
     def map(
-        self, body: TypedGraphRef | Callable | "GraphBuilder", aes: TKR | TList
+        self,
+        body: TypedGraphRef | Callable | "GraphBuilder",
+        aes: TKR | TList,
+        chunk_size: int | None = None,
     ) -> Any:
+        """Apply the body to every element.
+
+        :param chunk_size: For graph bodies that consist of a single function,
+            the function is called for this many elements in one worker invocation.
+            Ignored for python callables, which are inlined.
+        """
         if isinstance(body, GraphBuilder):
             body = self._graph_const(body)
 
@@ -239,7 +254,7 @@ class GraphBuilder[Inputs: TModel, Outputs: TModel]:
         if isinstance(aes, TKR):
             aes = self._unfold_list(aes)
 
-        out = self._map_graph_full(aes, body)
+        out = self._map_graph_full(aes, body, chunk_size)
 
         if not isclass(body.outputs_type) or not issubclass(
             body.outputs_type, TNamedModel
@@ -1,20 +1,35 @@
+import json
 from logging import getLogger
 from pathlib import Path
 from random import randint
 import statistics
 from sys import argv
 from time import sleep
-from typing import NamedTuple, Sequence
-
+from typing import Iterator, NamedTuple, Sequence
+
+from tierkreis.controller.data.binary import (
+    BINARY_MAGIC,
+    binary_list_header,
+    binary_list_items,
+    encode_binary,
+    is_binary,
+)
 from tierkreis.controller.data.location import WorkerCallArgs
 from tierkreis.controller.data.models import portmapping
 from tierkreis.controller.data.types import (
     PType,
+    TierkreisEncoder,
+    ValueEncoding,
     bytes_from_ptype,
+    default_encoding,
     ptype_from_bytes,
 )
 from tierkreis.worker.worker import TierkreisWorkerError
-from tierkreis.worker.storage.protocol import WorkerStorage
+from tierkreis.worker.storage.protocol import (
+    ListingWorkerStorage,
+    StreamingWorkerStorage,
+    WorkerStorage,
+)
 from tierkreis import Worker
 
 
@@ -168,18 +183,77 @@ def str_neq(a: str, b: str) -> bool:
     return a != b
 
 
+def _map_elements(storage: WorkerStorage, values_glob: Path) -> list[Path]:
+    """The paths matching the glob, ordered by the index after their last `-`.
+
+    Globs of a whole directory list it instead of matching every name,
+    if the storage can."""
+    if (
+        isinstance(storage, ListingWorkerStorage)
+        and values_glob.name == "*"
+        and not any(c in str(values_glob.parent) for c in "*?[")
+    ):
+        paths = [values_glob.parent / x for x in storage.list_dir(values_glob.parent)]
+    else:
+        paths = [Path(x) for x in storage.glob(str(values_glob))]
+
+    # Map elements are usually numbered 0 to n-1, which we can place without sorting.
+    ordered: list[Path | None] = [None] * len(paths)
+    for path in paths:
+        idx = int(path.name.split("-")[-1])
+        if not 0 <= idx < len(paths) or ordered[idx] is not None:
+            return sorted(paths, key=lambda x: int(x.name.split("-")[-1]))
+        ordered[idx] = path
+    return ordered  # type: ignore[return-value]
+
+
+def _folded(
+    storage: WorkerStorage, paths: list[Path], encoding: ValueEncoding
+) -> Iterator[bytes]:
+    """The encoded list of the values at the paths, one chunk per value.
+
+    Values already in the target encoding are copied verbatim;
+    JSON values are only checked to parse, not dumped again."""
+    if encoding == "binary":
+        yield binary_list_header(len(paths))
+        for path in paths:
+            bs = storage.read_input(path)
+            if not is_binary(bs):
+                bs = encode_binary(ptype_from_bytes(bs))
+            yield bs[len(BINARY_MAGIC) :]
+        return
+
+    yield b"["
+    for i, path in enumerate(paths):
+        bs = storage.read_input(path)
+        try:
+            json.loads(bs)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            bs = json.dumps(ptype_from_bytes(bs), cls=TierkreisEncoder).encode()
+        yield b", " + bs if i else bs
+    yield b"]"
+
+
 @worker.primitive_task()
 def fold_values(args: WorkerCallArgs, storage: WorkerStorage) -> None:
-    values_glob = storage.glob(str(args.inputs["values_glob"]))
-    values_glob.sort(key=lambda x: int(Path(x).name.split("-")[-1]))
-    bs = [storage.read_input(Path(value)) for value in values_glob]
-    values = [ptype_from_bytes(b) for b in bs]
-    storage.write_output(Path(args.outputs["value"]), bytes_from_ptype(values))
+    paths = _map_elements(storage, Path(args.inputs["values_glob"]))
+    chunks = _folded(storage, paths, default_encoding())
+    if isinstance(storage, StreamingWorkerStorage):
+        storage.write_output_chunks(Path(args.outputs["value"]), chunks)
+    else:
+        storage.write_output(Path(args.outputs["value"]), b"".join(chunks))
 
 
 @worker.primitive_task()
 def unfold_values(args: WorkerCallArgs, storage: WorkerStorage) -> None:
-    value_list = ptype_from_bytes(storage.read_input(args.inputs["value"]))
+    bs = storage.read_input(args.inputs["value"])
+    items = binary_list_items(bs) if default_encoding() == "binary" else None
+    if items is not None:
+        for i, item in enumerate(items):
+            storage.write_output(args.output_dir / str(i), item)
+        return
+
+    value_list = ptype_from_bytes(bs)
     match value_list:
         case list() | Sequence():
             for i, v in enumerate(value_list):
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID
+
+from tierkreis.controller.data.graph import NodeDef
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.storage.adjacency import in_edges
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.trace import TraceEvent, read_trace, write_chrome_trace
+from tierkreis.exceptions import TierkreisError
+
+
+@dataclass
+class CallTiming:
+    """The times of a function call in microseconds."""
+
+    loc: str
+    function: str
+    started: float
+    """When the controller started the node."""
+    begin: float
+    """When the worker began the call."""
+    end: float
+    load: float = 0
+    compute: float = 0
+    write: float = 0
+
+    @property
+    def overhead(self) -> float:
+        """Everything but the compute: queueing, process startup, input and output."""
+        return self.end - self.started - self.compute
+
+
+@dataclass
+class FunctionTotals:
+    calls: int = 0
+    compute: float = 0
+    overhead: float = 0
+
+
+def call_timings(events: list[TraceEvent]) -> list[CallTiming]:
+    """Combine the controller and worker spans of every function call."""
+    started: dict[str, TraceEvent] = {}
+    steps: defaultdict[str, dict[str, float]] = defaultdict(dict)
+    calls: list[TraceEvent] = []
+    for event in events:
+        loc = event["args"].get("loc")
+        match event["cat"], event["name"]:
+            case "controller", "start" if event["args"].get("type") == "function":
+                started[loc] = event
+            case "worker", "call":
+                calls.append(event)
+            case "worker", name:
+                steps[loc][name] = steps[loc].get(name, 0) + event["dur"]
+            case _:
+                pass
+
+    timings: list[CallTiming] = []
+    for call in calls:
+        loc = call["args"]["loc"]
+        start = started.get(loc)
+        function = start["args"]["function"] if start else call["args"]["function"]
+        timings.append(
+            CallTiming(
+                loc,
+                function,
+                start["ts"] if start else call["ts"],
+                call["ts"],
+                call["ts"] + call["dur"],
+                steps[loc].get("load_inputs", 0),
+                steps[loc].get("compute", 0),
+                steps[loc].get("write_outputs", 0),
+            )
+        )
+    return timings
+
+
+def _latest(timings: Iterable[CallTiming | None]) -> CallTiming | None:
+    return max((t for t in timings if t is not None), key=lambda t: t.end, default=None)
+
+
+class _Dependencies:
+    """The calls that nodes wait for, following the edges of the workflow graph."""
+
+    def __init__(self, storage: ControllerStorage, timings: list[CallTiming]) -> None:
+        self.storage = storage
+        self.timings = {t.loc: t for t in timings}
+        self._ready: dict[str, CallTiming | None] = {}
+
+    def predecessor(self, loc: str) -> CallTiming | None:
+        """The call that finished last of those the inputs of the node wait for."""
+        return _latest(self.ready(x) for x in self._inputs(loc))
+
+    def ready(self, loc: str) -> CallTiming | None:
+        """The call that finished last of those the outputs of the node wait for."""
+        if loc in self.timings:
+            return self.timings[loc]
+        if loc not in self._ready:
+            self._ready[loc] = None  # Guards against cycles.
+            inner = [t for x, t in self.timings.items() if x.startswith(loc + ".")]
+            outer = [self.ready(x) for x in self._inputs(loc)]
+            self._ready[loc] = _latest([*inner, *outer])
+        return self._ready[loc]
+
+    def _node(self, loc: str) -> NodeDef | None:
+        try:
+            return self.storage.read_node_def(Loc(loc))
+        except (FileNotFoundError, TierkreisError):
+            return None
+
+    def _inputs(self, loc: str) -> list[str]:
+        """The nodes whose outputs the node reads."""
+        graph_loc = loc.rpartition(".")[0]
+        node = self._node(loc) if graph_loc else None
+        if node is None:
+            return []
+        inputs = [f"{graph_loc}.N{i}" for i, _ in in_edges(node).values() if i >= 0]
+        if node.type == "input":
+            inputs += self._graph_inputs(graph_loc)
+        return inputs
+
+    def _graph_inputs(self, graph_loc: str) -> list[str]:
+        """The nodes whose outputs are the inputs of the graph run at `graph_loc`."""
+        outer, _, step = graph_loc.rpartition(".")
+        if not outer:
+            return []
+        if step.startswith("N"):  # An eval node.
+            return self._inputs(graph_loc)
+        if step.startswith("M"):  # An element of the map node at `outer`.
+            return self._inputs(outer)
+        if step.startswith("L"):  # The previous iteration of the loop at `outer`.
+            iteration = int(step[1:])
+            previous = [f"{outer}.L{iteration - 1}"] if iteration > 0 else []
+            return self._inputs(outer) + previous
+        return []
+
+
+def critical_path(
+    timings: list[CallTiming], storage: ControllerStorage
+) -> list[CallTiming]:
+    """The chain of calls that determined when the last call finished.
+
+    Each call is preceded by the call that finished last
+    of those its inputs depend on through the edges of the graph in `storage`."""
+    dependencies = _Dependencies(storage, timings)
+    path: list[CallTiming] = []
+    call = _latest(timings)
+    while call is not None and call not in path:
+        path.append(call)
+        call = dependencies.predecessor(call.loc)
+    return path[::-1]
+
+
+def function_totals(timings: list[CallTiming]) -> dict[str, FunctionTotals]:
+    totals: defaultdict[str, FunctionTotals] = defaultdict(FunctionTotals)
+    for t in timings:
+        totals[t.function].calls += 1
+        totals[t.function].compute += t.compute
+        totals[t.function].overhead += t.overhead
+    return dict(totals)
+
+
+def _seconds(us: float) -> str:
+    return f"{us / 1e6:.3f}s"
+
+
+def format_profile(events: list[TraceEvent], storage: ControllerStorage) -> str:
+    if not events:
+        raise TierkreisError("The trace is empty.")
+    timings = call_timings(events)
+    wall = max(e["ts"] + e["dur"] for e in events) - events[0]["ts"]
+    path = critical_path(timings, storage)
+    lines = [f"Wall time {_seconds(wall)}, {len(timings)} function calls."]
+
+    if path:
+        length = path[-1].end - path[0].started
+        lines.append(f"\nCritical path: {len(path)} calls, {_seconds(length)}")
+        for t in path:
+            lines.append(
+                f"  {t.loc} {t.function}: compute {_seconds(t.compute)},"
+                f" overhead {_seconds(t.overhead)}"
+            )
+
+    lines.append(f"\n{'function':<40} {'calls':>6} {'compute':>10} {'overhead':>10}")
+    totals = sorted(function_totals(timings).items(), key=lambda x: -x[1].overhead)
+    for function, total in totals:
+        share = 100 * total.overhead / max(total.overhead + total.compute, 1e-9)
+        lines.append(
+            f"{function:<40} {total.calls:>6} {_seconds(total.compute):>10}"
+            f" {_seconds(total.overhead):>10} ({share:.0f}%)"
+        )
+    return "\n".join(lines)
+
+
+def _workflow_id(workflow_id: str) -> UUID:
+    try:
+        return UUID(workflow_id)
+    except ValueError:
+        pass
+    try:
+        return UUID(int=int(workflow_id))
+    except ValueError:
+        raise TierkreisError(f"Invalid workflow id: {workflow_id}")
+
+
+def profile_args(args: argparse.Namespace) -> None:
+    workflow_id = _workflow_id(args.workflow_id)
+    storage = ControllerFileStorage(workflow_id, tierkreis_directory=args.tierkreis_dir)
+    events = read_trace(storage.trace_path)
+    if args.chrome is not None:
+        write_chrome_trace(events, args.chrome)
+    print(format_profile(events, storage))
+
+
+class ProfileCli:
+    @staticmethod
+    def add_subcommand(
+        main_parser: argparse._SubParsersAction[argparse.ArgumentParser],
+    ) -> None:
+        parser = main_parser.add_parser(
+            name="profile",
+            description="Show where the time of a workflow run with --trace went.",
+        )
+        parser.add_argument(
+            "workflow_id", type=str, help="The workflow UUID or the integer run id."
+        )
+        parser.add_argument(
+            "--chrome",
+            default=None,
+            type=Path,
+            help="Also write the trace as Chrome trace/Perfetto JSON to this file.",
+        )
+        parser.add_argument(
+            "--tierkreis-dir",
+            default=Path.home() / ".tierkreis" / "checkpoints",
+            type=Path,
+            help="The checkpoints directory of the workflow.",
+        )
+        parser.set_defaults(func=profile_args)
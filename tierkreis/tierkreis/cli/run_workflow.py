@@ -24,6 +24,8 @@ def run_workflow(
     use_uv_worker: bool = False,
     n_iterations: int = 10000,
     polling_interval_seconds: float = 0.1,
+    event_driven: bool = False,
+    trace: bool = False,
 ) -> None:
     """Run a workflow."""
     logging.basicConfig(
@@ -54,6 +56,8 @@ def run_workflow(
         inputs,
         n_iterations,
         polling_interval_seconds,
+        event_driven,
+        trace=trace,
     )
     if print_output:
         all_outputs = graph.nodes[graph.output_idx()].inputs
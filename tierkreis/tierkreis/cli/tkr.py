@@ -8,6 +8,7 @@ import sys
 from pathlib import Path
 from typing import Any, Callable
 
+from tierkreis.cli.profile import ProfileCli
 from tierkreis.cli.run_workflow import run_workflow
 from tierkreis.controller.data.graph import GraphData
 from tierkreis.controller.data.types import PType, ptype_from_bytes
@@ -115,6 +116,12 @@ def parse_args(
         type=float,
         help="Set the controller tickrate.",
     )
+    parser.add_argument(
+        "-e",
+        "--event-driven",
+        action="store_true",
+        help="Walk the graph when nodes finish instead of on every tick.",
+    )
     parser.add_argument(
         "-r",
         "--do-clean-restart",
@@ -122,6 +129,11 @@ def parse_args(
         help="Clear graph files before running",
     )
     parser.add_argument("--uv", action="store_true", help="Use uv worker")
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record spans for `tkr profile` in the workflow directory.",
+    )
 
     return parser
 
@@ -149,7 +161,9 @@ def run_workflow_args(args: argparse.Namespace):
         use_uv_worker=args.uv,
         n_iterations=args.n_iterations,
         polling_interval_seconds=args.polling_interval_seconds,
+        event_driven=args.event_driven,
         print_output=args.print_output,
+        trace=args.trace,
     )
 
 
@@ -173,6 +187,7 @@ def main() -> None:
     )
     subparser = parser.add_subparsers(title="subcommands")
     TierkreisCli.add_subcommand(subparser)
+    ProfileCli.add_subcommand(subparser)
     try:
         from tierkreis_visualization.cli import TierkreisVizCli
 
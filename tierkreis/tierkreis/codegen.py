@@ -4,7 +4,7 @@ from tierkreis.controller.data.types import (
     DictConvertible,
     ListConvertible,
     NdarraySurrogate,
-    _is_union,
+    is_union,
 )
 from tierkreis.idl.models import GenericType, Method, Model, TypedArg
 
@@ -20,7 +20,7 @@ def format_ptype(ptype: type | str) -> str:
     ):
         return f'OpaqueType["{ptype.__module__}.{ptype.__qualname__}"]'
 
-    if _is_union(ptype):
+    if is_union(ptype):
         return "Union"
 
     return ptype.__qualname__
@@ -4,4 +4,9 @@ from pathlib import Path
 PACKAGE_PATH = Path(__file__).parent.parent
 TESTS_PATH = PACKAGE_PATH / "tests"
 TKR_DIR_KEY = "TKR_DIR"
+TKR_ENCODING_KEY = "TKR_ENCODING"
+TKR_COMPRESSION_KEY = "TKR_COMPRESSION"
+TKR_COMPRESSION_MIN_BYTES_KEY = "TKR_COMPRESSION_MIN_BYTES"
+TKR_TRACE_KEY = "TKR_TRACE"
+CACHEABLE_MARKER = "_cacheable"
 WORKERS_DIR = PACKAGE_PATH / ".." / "tierkreis_workers"
@@ -1,14 +1,19 @@
+from contextlib import nullcontext
 import logging
 from time import sleep
 
 from tierkreis.builder import GraphBuilder
-from tierkreis.controller.data.graph import Eval, GraphData
+from tierkreis.controller.cache import ResultCache
+from tierkreis.controller.collector import OutputCollector
+from tierkreis.controller.data.graph import Eval, GraphData, graph_from_bytes
 from tierkreis.controller.data.location import Loc
-from tierkreis.controller.data.types import PType, bytes_from_ptype, ptype_from_bytes
-from tierkreis.controller.executor.protocol import ControllerExecutor
+from tierkreis.controller.data.types import PType, bytes_from_ptype
+from tierkreis.controller.executor.protocol import ControllerExecutor, PollingExecutor
+from tierkreis.controller.scheduler import ConcurrencyLimits, Scheduler
 from tierkreis.controller.start import NodeRunData, start, start_nodes
 from tierkreis.controller.storage.protocol import ControllerStorage
-from tierkreis.controller.storage.walk import walk_node
+from tierkreis.controller.storage.walk import GraphWalker
+from tierkreis.controller.trace import span, tracing
 from tierkreis.controller.data.core import PortID, ValueRef
 
 root_loc = Loc("")
@@ -22,6 +27,11 @@ def run_graph(
     graph_inputs: dict[str, PType] | PType,
     n_iterations: int = 10000,
     polling_interval_seconds: float = 0.01,
+    event_driven: bool = False,
+    limits: ConcurrencyLimits | None = None,
+    cache: ResultCache | None = None,
+    trace: bool = False,
+    collector: OutputCollector | None = None,
 ) -> None:
     if isinstance(g, GraphBuilder):
         g = g.get_data()
@@ -42,8 +52,18 @@ def run_graph(
         k: (-1, k) for k, _ in graph_inputs.items() if k != "body"
     }
     node_run_data = NodeRunData(Loc(), Eval((-1, "body"), inputs), [])
-    start(storage, executor, node_run_data)
-    resume_graph(storage, executor, n_iterations, polling_interval_seconds)
+    start(storage, executor, node_run_data, cache)
+    resume_graph(
+        storage,
+        executor,
+        n_iterations,
+        polling_interval_seconds,
+        event_driven,
+        limits,
+        cache,
+        trace,
+        collector,
+    )
 
 
 def resume_graph(
@@ -51,15 +71,65 @@ def resume_graph(
     executor: ControllerExecutor,
     n_iterations: int = 10000,
     polling_interval_seconds: float = 0.01,
+    event_driven: bool = False,
+    limits: ConcurrencyLimits | None = None,
+    cache: ResultCache | None = None,
+    trace: bool = False,
+    collector: OutputCollector | None = None,
+) -> None:
+    """Walk the graph and start ready nodes until the graph is finished.
+
+    By default the graph is walked every `polling_interval_seconds`.
+    With `event_driven` the controller instead walks again straight away
+    after starting nodes and otherwise waits for the storage to report
+    a finished or errored node; `polling_interval_seconds` is then the longest
+    it waits before walking the graph anyway.
+
+    With `limits` the function nodes are started only while fewer than the given
+    number of them are running; the rest wait until running nodes finish.
+
+    With `cache` the outputs of cacheable function nodes are reused between workflows.
+
+    A :py:class:`tierkreis.controller.executor.protocol.PollingExecutor`
+    is polled once per tick.
+
+    With `trace` the controller, executors and workers record spans in the
+    trace directory of the workflow, see :py:mod:`tierkreis.controller.trace`.
+
+    With `collector` intermediate outputs are freed once no node reads them anymore."""
+    with tracing(storage.trace_path) if trace else nullcontext():
+        _resume_graph(
+            storage,
+            executor,
+            n_iterations,
+            polling_interval_seconds,
+            event_driven,
+            limits,
+            cache,
+            collector,
+        )
+
+
+def _resume_graph(
+    storage: ControllerStorage,
+    executor: ControllerExecutor,
+    n_iterations: int,
+    polling_interval_seconds: float,
+    event_driven: bool,
+    limits: ConcurrencyLimits | None,
+    cache: ResultCache | None,
+    collector: OutputCollector | None,
 ) -> None:
     message = storage.read_output(Loc().N(-1), "body")
-    graph = ptype_from_bytes(message, GraphData)
+    graph = graph_from_bytes(message)
+    walker = GraphWalker(storage, graph)
+    scheduler = Scheduler(storage, executor, limits) if limits else None
 
     for _ in range(n_iterations):
-        walk_results = walk_node(storage, Loc(), graph.output_idx(), graph)
+        with span("walk", "controller"):
+            walk_results = walker.walk()
         if walk_results.errored != []:
-            # TODO: add to base class after storage refactor
-            (storage.logs_path.parent / "-" / "_error").touch()
+            storage.touch(storage._error_path(Loc()))
             node_errors = "\n".join(x for x in walk_results.errored)
             storage.write_node_errors(Loc(), node_errors)
 
@@ -73,7 +143,24 @@ def resume_graph(
             print("--- Tierkreis graph errors above this line. ---\n\n")
             break
 
-        start_nodes(storage, executor, walk_results.inputs_ready)
+        admitted = walk_results.inputs_ready
+        if scheduler is not None:
+            admitted, pending = scheduler.admit(admitted, walk_results.started)
+            walker.defer(pending, len(admitted) > 0)
+
+        with span("start_nodes", "controller", nodes=len(admitted)):
+            start_nodes(storage, executor, admitted, cache)
+        if isinstance(executor, PollingExecutor):
+            executor.poll()
+        if cache is not None:
+            cache.collect(storage)
+        if collector is not None:
+            collector.collect(storage, walker)
         if storage.is_node_finished(Loc()):
             break
-        sleep(polling_interval_seconds)
+        if event_driven:
+            # Newly started nodes may have made more nodes ready without any marker.
+            if not admitted:
+                storage.wait_for_change(polling_interval_seconds)
+        else:
+            sleep(polling_interval_seconds)
@@ -0,0 +1,154 @@
+import logging
+import os
+import shutil
+from hashlib import blake2b
+from pathlib import Path
+from uuid import uuid4
+
+from tierkreis.controller.data.core import PortID
+from tierkreis.controller.data.location import Loc, OutputLoc
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+
+logger = logging.getLogger(__name__)
+
+_COMPLETE = "_complete"
+
+
+class ResultCache:
+    """Outputs of worker functions shared between workflows.
+
+    Function nodes are keyed by the function name and the content hashes of their inputs.
+    When a node with a cached key is started, the cached outputs are linked into
+    its outputs directory and the node is marked finished without running the worker.
+    Otherwise the node runs as usual and its outputs are added to the cache once it
+    has finished, if the worker marked the function as cacheable,
+    see :py:meth:`tierkreis.worker.worker.Worker.task`.
+
+    Entries live in `directory`; when the entries exceed `max_bytes`
+    the least recently used ones are removed.
+
+    :param directory: Where the entries are stored; hard links are used for
+        :py:class:`tierkreis.controller.storage.filestorage.ControllerFileStorage`
+        if it is on the same filesystem.
+    :param max_bytes: Size bound of the entries.
+    """
+
+    def __init__(
+        self,
+        directory: Path = Path.home() / ".tierkreis" / "cache",
+        max_bytes: int = 10 * 2**30,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending: dict[Loc, tuple[str, str]] = {}
+        self._uncacheable: set[str] = set()
+
+    def may_cache(self, function_name: str) -> bool:
+        """False once a call of the function has finished without being cacheable."""
+        return function_name not in self._uncacheable
+
+    def key(
+        self,
+        storage: ControllerStorage,
+        function_name: str,
+        inputs: dict[PortID, OutputLoc],
+    ) -> str:
+        h = blake2b(function_name.encode(), digest_size=20)
+        for port in sorted(inputs):
+            loc, output_port = inputs[port]
+            h.update(b"\0" + port.encode() + b"\0")
+            try:
+                h.update(blake2b(storage.read_output(loc, output_port)).digest())
+            except FileNotFoundError:
+                h.update(b"missing")
+        return h.hexdigest()
+
+    def restore(
+        self,
+        storage: ControllerStorage,
+        node_location: Loc,
+        function_name: str,
+        key: str,
+        output_list: list[PortID],
+    ) -> bool:
+        """Link the cached outputs into the node and mark it finished, if there are any.
+
+        Otherwise remember the node so that `collect` can add its outputs later."""
+        entry = self.directory / key
+        outputs = entry / "outputs"
+        if not (entry / _COMPLETE).exists() or not all(
+            (outputs / port).exists() for port in output_list
+        ):
+            self.misses += 1
+            self._pending[node_location] = (function_name, key)
+            return False
+
+        for port in output_list:
+            src = outputs / port
+            dst = storage._output_path(node_location, port)
+            if isinstance(storage, ControllerFileStorage):
+                storage.mkdir(dst.parent)
+                try:
+                    os.link(src, dst)
+                    continue
+                except OSError:
+                    pass  # E.g. on another filesystem.
+            storage.write(dst, src.read_bytes())
+        storage.mark_node_finished(node_location)
+        os.utime(entry)
+        self.hits += 1
+        logger.info(f"Cache hit for {node_location}: {key}")
+        return True
+
+    def collect(self, storage: ControllerStorage) -> None:
+        """Add the outputs of finished cacheable nodes to the cache."""
+        for node_location, (function_name, key) in list(self._pending.items()):
+            if storage.is_node_finished(node_location):
+                if storage.exists(storage._cacheable_path(node_location)):
+                    self._store(storage, node_location, key)
+                else:
+                    self._uncacheable.add(function_name)
+            elif not storage.node_has_error(node_location):
+                continue
+            del self._pending[node_location]
+
+    def _store(self, storage: ControllerStorage, node_location: Loc, key: str) -> None:
+        entry = self.directory / key
+        tmp = self.directory / f".{uuid4().hex}"
+        (tmp / "outputs").mkdir(parents=True)
+        for port in storage.read_output_ports(node_location):
+            src = storage._output_path(node_location, port)
+            dst = tmp / "outputs" / port
+            if isinstance(storage, ControllerFileStorage):
+                try:
+                    os.link(src, dst)
+                    continue
+                except OSError:
+                    pass
+            dst.write_bytes(storage.read(src))
+        (tmp / _COMPLETE).touch()
+        try:
+            tmp.rename(entry)
+        except OSError:
+            shutil.rmtree(tmp)  # Stored concurrently by another controller.
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in `max_bytes`."""
+        entries: list[tuple[float, int, Path]] = []
+        for entry in self.directory.iterdir():
+            if entry.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in (entry / "outputs").iterdir())
+            entries.append((entry.stat().st_mtime, size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,220 @@
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable
+
+from tierkreis.controller.consts import BODY_PORT
+from tierkreis.controller.data.core import NodeIndex, PortID
+from tierkreis.controller.data.graph import GraphData, NodeDef, graph_from_bytes
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.storage.adjacency import in_edges, outputs_iter
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.walk import GraphWalker
+from tierkreis.exceptions import TierkreisError
+
+logger = logging.getLogger(__name__)
+
+type Consumers = dict[NodeIndex, dict[PortID, list[NodeIndex]]]
+"""The nodes reading each output port of a graph, with `*` for all ports."""
+
+
+def consumers(graph: GraphData) -> Consumers:
+    """The nodes of the graph that read each output port, from their in edges."""
+    refs: Consumers = defaultdict(lambda: defaultdict(list))
+    for j, node in enumerate(graph.nodes):
+        edges = list(in_edges(node).values())
+        if node.type == "ifelse":
+            edges += [node.if_true, node.if_false]
+        for i, port in edges:
+            if i >= 0:
+                refs[i][port].append(j)
+    return refs
+
+
+class OutputCollector:
+    """Frees intermediate outputs once all the nodes reading them have finished.
+
+    The readers of an output port are the nodes with an in edge from it.
+    Outputs read by the output node of a graph are kept, since they are the
+    outputs of the evaluation, loop iteration or map element that ran the graph.
+    With `keep_iterations` the outputs of a loop iteration, including the
+    outputs of everything inside it, are freed once `keep_iterations` later
+    iterations have started; their node definitions are kept, so that the
+    workflow can still be resumed.
+
+    Outputs of the nodes of the top level graph are never freed, nor are
+    the outputs inside the nodes in `protect`, so that they can still be
+    inspected in the visualizer and their nodes restarted with
+    :py:meth:`tierkreis.controller.storage.protocol.ControllerStorage.restart_task`,
+    which needs the inputs of the restarted node.
+
+    Outputs are passed between nodes by linking them, so an output only
+    takes no more space once every node it is linked to has freed it.
+
+    :param keep_iterations: The number of latest loop iterations
+        whose outputs are kept, all of them by default.
+    :param protect: Locations whose outputs and nested outputs are kept.
+    """
+
+    def __init__(
+        self, keep_iterations: int | None = None, protect: Iterable[Loc] = ()
+    ) -> None:
+        if keep_iterations is not None and keep_iterations < 1:
+            raise TierkreisError(
+                f"Must keep at least one loop iteration, got {keep_iterations}."
+            )
+        self.keep_iterations = keep_iterations
+        self.protect = [Loc(x) for x in protect]
+        self.freed = 0
+        """The number of outputs freed so far."""
+        self._consumers: dict[int, tuple[GraphData, Consumers]] = {}
+        self._collected: set[Loc] = set()
+        self._settled: set[Loc] = set()
+        self._iterations: dict[Loc, int] = {}
+        self._dropped: dict[Loc, int] = {}
+        self._elements: dict[Loc, list[int]] = {}
+        self._unfinished_elements: dict[Loc, list[int]] = {}
+
+    def collect(self, storage: ControllerStorage, walker: GraphWalker) -> None:
+        """Free the outputs that are no longer read, called once per controller tick."""
+        self._collect_scope(storage, walker, Loc(), walker.graph)
+
+    def is_protected(self, loc: Loc) -> bool:
+        return loc == Loc() or any(
+            loc == p or loc.startswith(p + ".") for p in self.protect
+        )
+
+    def _graph_consumers(self, graph: GraphData) -> Consumers:
+        # Graphs are shared between callers, see `graph_from_bytes`,
+        # so the same graph object is passed on every tick.
+        entry = self._consumers.get(id(graph))
+        if entry is None or entry[0] is not graph:
+            entry = (graph, consumers(graph))
+            self._consumers[id(graph)] = entry
+        return entry[1]
+
+    def _collect_scope(
+        self, storage: ControllerStorage, walker: GraphWalker, loc: Loc, g: GraphData
+    ) -> None:
+        """Collect the nodes of the graph `g` evaluated at `loc`.
+
+        Nested evaluations are collected before the outputs of this graph are freed,
+        as a map reads the elements from the outputs of its input."""
+        finished = [walker.is_node_finished(loc.N(i)) for i in range(len(g.nodes))]
+        for i, node in enumerate(g.nodes):
+            node_loc = loc.N(i)
+            if node_loc in self._collected:
+                continue
+            if node.type in ("eval", "loop", "map"):
+                if not finished[i] and not storage.is_node_started(node_loc):
+                    continue
+                self._collect_nested(storage, walker, loc, i, node)
+            if finished[i]:
+                self._collected.add(node_loc)
+
+        if self.is_protected(loc):
+            return
+        refs = self._graph_consumers(g)
+        output_idx = g.output_idx()
+        for i in range(len(g.nodes)):
+            node_loc = loc.N(i)
+            if not finished[i] or node_loc in self._settled:
+                continue
+            settled = True
+            if not storage.exists(storage._outputs_dir(node_loc)):
+                self._settled.add(node_loc)
+                continue
+            for port in storage.read_output_ports(node_loc):
+                readers = refs[i][port] + refs[i]["*"]
+                if output_idx in readers:
+                    continue
+                if all(finished[j] for j in readers):
+                    self._free(storage, storage._output_path(node_loc, port))
+                else:
+                    settled = False
+            if settled:
+                self._settled.add(node_loc)
+
+    def _collect_nested(
+        self,
+        storage: ControllerStorage,
+        walker: GraphWalker,
+        parent: Loc,
+        idx: NodeIndex,
+        node: NodeDef,
+    ) -> None:
+        loc = parent.N(idx)
+        match node.type:
+            case "eval":
+                body = graph_from_bytes(storage.read_output(loc.N(-1), BODY_PORT))
+                self._collect_scope(storage, walker, loc, body)
+            case "loop":
+                body = graph_from_bytes(storage.read_output(loc.N(-1), BODY_PORT))
+                first = self._iterations.get(loc, 0)
+                start = max(first - 1, 0)  # Iterations before `first` have finished.
+                latest = storage.latest_loop_iteration(loc, start).peek_index()
+                for k in range(first, latest + 1):
+                    self._collect_scope(storage, walker, loc.L(k), body)
+                    if k == first and walker.is_node_finished(loc.L(k)):
+                        first += 1
+                self._iterations[loc] = first
+                if self.keep_iterations is not None and not self.is_protected(loc):
+                    dropped = self._dropped.get(loc, 0)
+                    for k in range(dropped, latest - self.keep_iterations + 1):
+                        self._drop(storage, loc.L(k), body)
+                    self._dropped[loc] = max(dropped, latest - self.keep_iterations + 1)
+            case "map":
+                if loc not in self._elements:
+                    first_ref = next(x for x in node.inputs.values() if x[1] == "*")
+                    producer = parent.N(first_ref[0])
+                    elements = [i for i, _ in outputs_iter(storage, producer)]
+                    self._elements[loc] = elements
+                    self._unfinished_elements[loc] = elements
+                unfinished = self._unfinished_elements[loc]
+                if not unfinished:
+                    return
+                body = graph_from_bytes(
+                    storage.read_output(loc.M(unfinished[0]).N(-1), BODY_PORT)
+                )
+                for i in unfinished:
+                    self._collect_scope(storage, walker, loc.M(i), body)
+                self._unfinished_elements[loc] = [
+                    i for i in unfinished if not walker.is_node_finished(loc.M(i))
+                ]
+
+    def _drop(self, storage: ControllerStorage, loc: Loc, g: GraphData) -> None:
+        """Free the outputs of the graph `g` evaluated at `loc`, and its own outputs."""
+        for i, node in enumerate(g.nodes):
+            node_loc = loc.N(i)
+            if node.type == "eval" and storage.exists(
+                storage._output_path(node_loc.N(-1), BODY_PORT)
+            ):
+                body = graph_from_bytes(storage.read_output(node_loc.N(-1), BODY_PORT))
+                self._drop(storage, node_loc, body)
+            elif node.type == "loop" and storage.exists(
+                storage._output_path(node_loc.N(-1), BODY_PORT)
+            ):
+                body = graph_from_bytes(storage.read_output(node_loc.N(-1), BODY_PORT))
+                latest = storage.latest_loop_iteration(node_loc).peek_index()
+                for k in range(latest + 1):
+                    self._drop(storage, node_loc.L(k), body)
+                self._free(storage, storage._outputs_dir(node_loc.N(-1)))
+            elif node.type == "map":
+                for element in self._elements.get(node_loc, []):
+                    element_loc = node_loc.M(element)
+                    body_path = storage._output_path(element_loc.N(-1), BODY_PORT)
+                    if storage.exists(body_path):
+                        body = graph_from_bytes(
+                            storage.read_output(element_loc.N(-1), BODY_PORT)
+                        )
+                        self._drop(storage, element_loc, body)
+            self._free(storage, storage._outputs_dir(node_loc))
+        self._free(storage, storage._outputs_dir(loc.N(-1)))
+        self._free(storage, storage._outputs_dir(loc))
+
+    def _free(self, storage: ControllerStorage, path: Path) -> None:
+        if not storage.exists(path):
+            return
+        logger.debug("Freeing %s", path)
+        storage.free(path)
+        self.freed += 1
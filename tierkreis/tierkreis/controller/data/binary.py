@@ -0,0 +1,270 @@
+"""Compact binary encoding of serialized PType values.
+
+An alternative to the JSON encoding of :py:func:`tierkreis.controller.data.types.bytes_from_ptype`
+with native support for nested `bytes` and `complex`.
+Lists of only ints or only floats are stored as packed arrays.
+Encoded values start with :py:data:`BINARY_MAGIC`, which is never valid JSON or UTF-8,
+so readers can tell the encodings apart.
+
+Each value is a one byte tag followed by its payload, integers are little-endian:
+
+- `N`, `T`, `F`: None, True, False.
+- `i`: int64. `I`: larger ints as uint32 length + signed bytes.
+- `d`: float64. `c`: complex as two float64.
+- `s`, `b`: str (UTF-8) and bytes as uint32 length + data.
+- `l`: list or tuple as uint32 length + values.
+- `m`: dict with str keys as uint32 length + (key, value) pairs.
+- `A`: packed list as array type code + uint32 length + data,
+  ints use the narrowest of int8, int16, int32 and int64 that fits.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Iterator
+
+from tierkreis.exceptions import TierkreisError
+
+BINARY_MAGIC = b"\xc1TKR\x01"
+
+_INT64 = struct.Struct("<q")
+_UINT32 = struct.Struct("<I")
+_FLOAT64 = struct.Struct("<d")
+_COMPLEX = struct.Struct("<dd")
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+_SWAP = sys.byteorder == "big"
+_INT_WIDTHS = {"b": 8, "h": 16, "i": 32, "q": 64}
+_NATIVE_TYPECODES = {"b": "b", "h": "h", "i": "i", "q": "q", "d": "d"}
+"""Type codes of packed lists and the array type codes of the same size."""
+if array("i").itemsize != 4:
+    _NATIVE_TYPECODES["i"] = "l"
+
+
+def _int_typecode(values: list[int]) -> str | None:
+    """The narrowest signed array type code that holds the values."""
+    lo, hi = min(values), max(values)
+    for typecode, width in _INT_WIDTHS.items():
+        bound = 2 ** (width - 1)
+        if -bound <= lo and hi < bound:
+            return typecode
+    return None
+
+
+def _packed(typecode: str, values: list) -> bytes:
+    packed = array(_NATIVE_TYPECODES[typecode], values)
+    if _SWAP:
+        packed.byteswap()
+    return b"A" + typecode.encode() + _UINT32.pack(len(values)) + packed.tobytes()
+
+
+def _encode_list(o: list | tuple, out: list[bytes]) -> None:
+    if o and type(o[0]) in (int, float):
+        types = set(map(type, o))
+        if types == {float}:
+            out.append(_packed("d", list(o)))
+            return
+        if types == {int}:
+            typecode = _int_typecode(list(o))
+            if typecode is not None:
+                out.append(_packed(typecode, list(o)))
+                return
+
+    out.append(b"l" + _UINT32.pack(len(o)))
+    for x in o:
+        _encode(x, out)
+
+
+def _encode_dict(o: dict, out: list[bytes]) -> None:
+    out.append(b"m" + _UINT32.pack(len(o)))
+    for k, v in o.items():
+        if not isinstance(k, str):
+            k = json.dumps(k)  # Keys are converted to strings as in JSON.
+        bs = k.encode()
+        out.append(_UINT32.pack(len(bs)) + bs)
+        _encode(v, out)
+
+
+def _encode_int(o: int, out: list[bytes]) -> None:
+    if _INT64_MIN <= o <= _INT64_MAX:
+        out.append(b"i" + _INT64.pack(o))
+    else:
+        bs = o.to_bytes((o.bit_length() + 8) // 8, "little", signed=True)
+        out.append(b"I" + _UINT32.pack(len(bs)) + bs)
+
+
+def _encode_str(o: str, out: list[bytes]) -> None:
+    bs = o.encode()
+    out.append(b"s" + _UINT32.pack(len(bs)) + bs)
+
+
+def _encode_bytes(o: bytes | bytearray | memoryview, out: list[bytes]) -> None:
+    out.append(b"b" + _UINT32.pack(len(o)) + bytes(o))
+
+
+_ENCODERS: dict[type, Callable[[Any, list[bytes]], None]] = {
+    type(None): lambda _, out: out.append(b"N"),
+    bool: lambda o, out: out.append(b"T" if o else b"F"),
+    int: _encode_int,
+    float: lambda o, out: out.append(b"d" + _FLOAT64.pack(o)),
+    complex: lambda o, out: out.append(b"c" + _COMPLEX.pack(o.real, o.imag)),
+    str: _encode_str,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+    memoryview: _encode_bytes,
+    list: _encode_list,
+    tuple: _encode_list,
+    dict: _encode_dict,
+}
+
+
+def _encode(o: Any, out: list[bytes]) -> None:
+    encoder = _ENCODERS.get(type(o))
+    if encoder is None:
+        # Subclasses, e.g. enums or named tuples, use the encoder of their base.
+        encoder = next(
+            (f for t, f in _ENCODERS.items() if isinstance(o, t) and t is not bool),
+            None,
+        )
+    if encoder is None:
+        raise TierkreisError(f"Cannot encode {type(o)} in the binary encoding.")
+    encoder(o, out)
+
+
+def encode_binary(o: Any) -> bytes:
+    """Encode a value made of JSON types, `bytes` and `complex`."""
+    out = [BINARY_MAGIC]
+    _encode(o, out)
+    return b"".join(out)
+
+
+def is_binary(bs: bytes) -> bool:
+    return bs[: len(BINARY_MAGIC)] == BINARY_MAGIC
+
+
+class _Decoder:
+    def __init__(self, bs: bytes) -> None:
+        self.view = memoryview(bs)
+        self.pos = len(BINARY_MAGIC)
+
+    def length(self) -> int:
+        (n,) = _UINT32.unpack_from(self.view, self.pos)
+        self.pos += 4
+        return n
+
+    def chunk(self, n: int) -> memoryview:
+        start = self.pos
+        self.pos += n
+        if self.pos > len(self.view):
+            raise TierkreisError("Truncated binary value.")
+        return self.view[start : self.pos]
+
+    def decode(self) -> Any:
+        tag = self.view[self.pos]
+        self.pos += 1
+        match tag:
+            case 0x4E:  # N
+                return None
+            case 0x54:  # T
+                return True
+            case 0x46:  # F
+                return False
+            case 0x69:  # i
+                return _INT64.unpack(self.chunk(8))[0]
+            case 0x49:  # I
+                return int.from_bytes(self.chunk(self.length()), "little", signed=True)
+            case 0x64:  # d
+                return _FLOAT64.unpack(self.chunk(8))[0]
+            case 0x63:  # c
+                return complex(*_COMPLEX.unpack(self.chunk(16)))
+            case 0x73:  # s
+                return str(self.chunk(self.length()), "utf-8")
+            case 0x62:  # b
+                return bytes(self.chunk(self.length()))
+            case 0x6C:  # l
+                return [self.decode() for _ in range(self.length())]
+            case 0x6D:  # m
+                d = {}
+                for _ in range(self.length()):
+                    k = str(self.chunk(self.length()), "utf-8")
+                    d[k] = self.decode()
+                return d
+            case 0x41:  # A
+                packed = array(_NATIVE_TYPECODES[chr(self.chunk(1)[0])])
+                packed.frombytes(self.chunk(self.length() * packed.itemsize))
+                if _SWAP:
+                    packed.byteswap()
+                return packed.tolist()
+            case _:
+                raise TierkreisError(f"Unknown tag {tag} in binary value.")
+
+    def skip(self) -> None:
+        """Move past the next value without decoding it."""
+        tag = self.view[self.pos]
+        self.pos += 1
+        match tag:
+            case 0x4E | 0x54 | 0x46:  # N, T, F
+                pass
+            case 0x69 | 0x64:  # i, d
+                self.chunk(8)
+            case 0x63:  # c
+                self.chunk(16)
+            case 0x49 | 0x73 | 0x62:  # I, s, b
+                self.chunk(self.length())
+            case 0x6C:  # l
+                for _ in range(self.length()):
+                    self.skip()
+            case 0x6D:  # m
+                for _ in range(self.length()):
+                    self.chunk(self.length())
+                    self.skip()
+            case 0x41:  # A
+                itemsize = array(_NATIVE_TYPECODES[chr(self.chunk(1)[0])]).itemsize
+                self.chunk(self.length() * itemsize)
+            case _:
+                raise TierkreisError(f"Unknown tag {tag} in binary value.")
+
+
+def decode_binary(bs: bytes) -> Any:
+    """Inverse of :py:func:`encode_binary`."""
+    if not is_binary(bs):
+        raise TierkreisError("Value is not in the binary encoding.")
+    decoder = _Decoder(bs)
+    try:
+        value = decoder.decode()
+    except (IndexError, KeyError, ValueError, struct.error) as exc:
+        raise TierkreisError("Malformed binary value.") from exc
+    if decoder.pos != len(bs):
+        raise TierkreisError("Trailing data after binary value.")
+    return value
+
+
+def binary_list_header(length: int) -> bytes:
+    """Start of an encoded list; followed by the `length` encoded values without magic."""
+    return BINARY_MAGIC + b"l" + _UINT32.pack(length)
+
+
+def binary_list_items(bs: bytes) -> Iterator[bytes] | None:
+    """The encoded values of an encoded list, or None if the value is not a list.
+
+    Values of unpacked lists are sliced out without decoding them."""
+    if not is_binary(bs) or len(bs) <= len(BINARY_MAGIC):
+        return None
+    tag = bs[len(BINARY_MAGIC)]
+    if tag == 0x41:  # A
+        return (encode_binary(x) for x in decode_binary(bs))
+    if tag != 0x6C:  # l
+        return None
+
+    def items() -> Iterator[bytes]:
+        decoder = _Decoder(bs)
+        decoder.pos += 1
+        try:
+            for _ in range(decoder.length()):
+                start = decoder.pos
+                decoder.skip()
+                yield BINARY_MAGIC + bytes(decoder.view[start : decoder.pos])
+        except (IndexError, KeyError, ValueError, struct.error) as exc:
+            raise TierkreisError("Malformed binary value.") from exc
+
+    return items()
@@ -0,0 +1,237 @@
+"""(De)serializers specialised to an annotation.
+
+:py:func:`tierkreis.controller.data.types.ptype_from_bytes` and
+:py:func:`tierkreis.controller.data.types.bytes_from_ptype` inspect the annotation
+again for every value, including every element of every list.
+The functions here inspect it once and return a function that only does
+the conversions the annotation requires, which workers use for their tasks.
+Values that do not match the annotation fall back to the generic functions,
+so both give the same results.
+"""
+
+import collections.abc
+import json
+import logging
+from inspect import isclass
+from operator import itemgetter
+from types import NoneType
+from typing import Annotated, Any, Callable, TypeVar, cast, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+from tierkreis.controller.data.binary import encode_binary, is_binary
+from tierkreis.controller.data.core import get_deserializer, get_serializer
+from tierkreis.controller.data.types import (
+    DictConvertible,
+    ListConvertible,
+    NdarraySurrogate,
+    PType,
+    Struct,
+    TierkreisEncoder,
+    ValueEncoding,
+    coerce_from_annotation,
+    default_encoding,
+    get_serialization_format,
+    is_union,
+    loads_ptype,
+    ndarray_from_npy,
+    ser_from_ptype,
+)
+from tierkreis.exceptions import TierkreisError
+
+logger = logging.getLogger(__name__)
+
+type Decoder[T] = Callable[[bytes], T]
+type Encoder = Callable[[PType], bytes]
+
+_PLAIN = (bool, int, float, str, NoneType)
+"""Types that JSON decodes to without the hooks of the Tierkreis decoder."""
+
+
+def _identity(x: Any) -> Any:
+    return x
+
+
+def _unannotated(annotation: Any) -> Any:
+    while get_origin(annotation) is Annotated:
+        annotation = get_args(annotation)[0]
+    return annotation
+
+
+def _is_plain(annotation: Any) -> bool:
+    """Whether values of the annotation are JSON without bytes or complex numbers."""
+    if get_deserializer(annotation) or get_serializer(annotation):
+        return False
+    annotation = _unannotated(annotation)
+    if annotation in _PLAIN:
+        return True
+    if is_union(annotation) or get_origin(annotation) in (
+        list,
+        tuple,
+        dict,
+        collections.abc.Sequence,
+        collections.abc.Mapping,
+    ):
+        args = [x for x in get_args(annotation) if x is not Ellipsis]
+        return len(args) > 0 and all(_is_plain(x) for x in args)
+    if isclass(annotation) and issubclass(annotation, Struct):
+        return all(_is_plain(x) for x in annotation.__annotations__.values())
+    return False
+
+
+def _none_or[T](f: Callable[[Any], T]) -> Callable[[Any], T | None]:
+    return lambda ser: None if ser is None else f(ser)
+
+
+def _compile_coerce(annotation: Any) -> Callable[[Any], Any]:
+    """:py:func:`tierkreis.controller.data.types.coerce_from_annotation` for one annotation."""
+    if annotation is None:
+        return _identity
+
+    if ds := get_deserializer(annotation):
+        return ds.deserializer
+
+    if get_origin(annotation) is Annotated:
+        return _compile_coerce(get_args(annotation)[0])
+
+    if is_union(annotation):
+        options = [(t, _compile_coerce(t)) for t in get_args(annotation)]
+
+        def coerce_union(ser: Any) -> Any:
+            for t, coerce in options:
+                try:
+                    return coerce(ser)
+                except (AssertionError, ValidationError):
+                    logger.debug(f"Tried deserialising as {t}")
+            raise TierkreisError(f"Could not deserialise {ser} as {annotation}")
+
+        return coerce_union
+
+    origin = get_origin(annotation)
+    if origin is None:
+        origin = annotation
+
+    if isinstance(origin, TypeVar):
+        return _identity
+
+    if not isclass(origin):
+        return lambda ser: coerce_from_annotation(ser, annotation)
+
+    if issubclass(origin, (bool, int, float, complex, str, bytes, NoneType)):
+        return _identity
+
+    if issubclass(origin, (DictConvertible, ListConvertible, BaseModel)):
+        # Checked for every value as in `coerce_from_annotation`, unions rely on it.
+        return _none_or(lambda ser: coerce_from_annotation(ser, annotation))
+
+    if issubclass(origin, NdarraySurrogate):
+        return _none_or(ndarray_from_npy)
+
+    if issubclass(origin, Struct):
+        fields = [(k, _compile_coerce(v)) for k, v in origin.__annotations__.items()]
+        if len(fields) > 1 and all(f is _identity for _, f in fields):
+            values = itemgetter(*(k for k, _ in fields))
+            make = origin._make
+            return lambda ser: None if ser is None else make(values(ser))
+        return _none_or(lambda ser: origin(*[f(ser[k]) for k, f in fields]))
+
+    if issubclass(origin, collections.abc.Sequence):
+        args = get_args(annotation)
+        if len(args) == 0:
+            return _identity
+        element = _compile_coerce(args[0])
+        if element is _identity:
+            return _none_or(list)
+        return _none_or(lambda ser: [element(x) for x in ser])
+
+    if issubclass(origin, collections.abc.Mapping):
+        args = get_args(annotation)
+        if len(args) == 0:
+            return _identity
+        value = _compile_coerce(args[1])
+        if value is _identity:
+            return _none_or(dict)
+        return _none_or(lambda ser: {k: value(v) for k, v in ser.items()})
+
+    return lambda ser: coerce_from_annotation(ser, annotation)
+
+
+def compile_decoder[T: PType](annotation: type[T] | None) -> Decoder[T]:
+    """:py:func:`tierkreis.controller.data.types.ptype_from_bytes` for one annotation."""
+    coerce = _compile_coerce(annotation)
+    method = get_serialization_format(annotation)
+    if method == "bytes":
+        return coerce
+
+    loads = loads_ptype
+    if annotation is not None and _is_plain(annotation):
+
+        def loads(bs: bytes) -> Any:
+            return json.loads(bs) if not is_binary(bs) else loads_ptype(bs)
+
+    if method == "json":
+        return lambda bs: coerce(loads(bs))
+
+    def decode_unknown(bs: bytes) -> T:
+        try:
+            return coerce(loads(bs))
+        except (json.JSONDecodeError, UnicodeDecodeError, TierkreisError):
+            return cast(T, bs)
+
+    return decode_unknown
+
+
+def _compile_ser(annotation: Any) -> Callable[[PType], Any]:
+    """:py:func:`tierkreis.controller.data.types.ser_from_ptype` for one annotation."""
+    if sr := get_serializer(annotation):
+        return sr.serializer
+
+    def generic(ptype: PType) -> Any:
+        return ser_from_ptype(ptype, annotation)
+
+    origin = get_origin(annotation)
+    if annotation in _PLAIN:
+        return lambda ptype: ptype if type(ptype) in _PLAIN else generic(ptype)
+
+    if origin in (list, collections.abc.Sequence) and get_args(annotation):
+        element = _compile_ser(get_args(annotation)[0])
+        return lambda ptype: (
+            [element(x) for x in ptype] if type(ptype) is list else generic(ptype)
+        )
+
+    if origin in (dict, collections.abc.Mapping) and get_args(annotation):
+        value = _compile_ser(get_args(annotation)[1])
+        return lambda ptype: (
+            {k: value(v) for k, v in ptype.items()}
+            if type(ptype) is dict
+            else generic(ptype)
+        )
+
+    if isclass(annotation) and issubclass(annotation, Struct):
+        fields = [(k, _compile_ser(v)) for k, v in annotation.__annotations__.items()]
+        return lambda ptype: (
+            {k: f(getattr(ptype, k)) for k, f in fields}
+            if type(ptype) is annotation
+            else generic(ptype)
+        )
+
+    return generic
+
+
+def compile_encoder(annotation: type[PType] | None) -> Encoder:
+    """:py:func:`tierkreis.controller.data.types.bytes_from_ptype` for one annotation.
+
+    The encoding is read from the environment when the encoder is called."""
+    ser_from = _compile_ser(annotation)
+
+    def encode(ptype: PType, encoding: ValueEncoding | None = None) -> bytes:
+        ser = ser_from(ptype)
+        match ser:
+            case bytes():
+                return ser
+            case _ if (encoding or default_encoding()) == "binary":
+                return encode_binary(ser)
+            case _:
+                return json.dumps(ser, cls=TierkreisEncoder).encode()
+
+    return encode
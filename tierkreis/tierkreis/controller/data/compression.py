@@ -0,0 +1,268 @@
+"""Transparent compression of the values written to output ports.
+
+Compression is enabled by naming a codec in the `TKR_COMPRESSION` environment
+variable, which executors pass on to the workers they start, so that the
+controller and the workers compress the outputs they write alike.
+Compressed values start with :py:data:`COMPRESSED_MAGIC`, a one byte codec tag
+and the uncompressed size as uint64, little-endian.
+The magic is never valid JSON or UTF-8 and differs from the binary and `.npy`
+encodings, so readers detect compressed values and decompress them
+whatever the setting, and compressed and raw values can be mixed.
+
+Values smaller than a threshold are written raw, as are values that do not shrink.
+`TKR_COMPRESSION_MIN_BYTES` holds comma separated thresholds in bytes,
+a bare number for all ports and `port=bytes` for single ports,
+e.g. `4096,body=0,counts=65536`.
+
+`zlib` is always available; `zstd` needs the `zstandard` package
+(or Python 3.14) and `lz4` the `lz4` package, in the controller and in the workers.
+Shell workers read their input files directly,
+so ports read by them should stay below the threshold.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+import os
+from pathlib import Path
+import struct
+from typing import Any, Callable, Protocol
+import zlib
+
+from tierkreis.consts import TKR_COMPRESSION_KEY, TKR_COMPRESSION_MIN_BYTES_KEY
+from tierkreis.controller.data.core import PortID
+from tierkreis.exceptions import TierkreisError
+
+COMPRESSED_MAGIC = b"\xc1TKZ"
+DEFAULT_MIN_BYTES = 4096
+
+_HEADER = struct.Struct("<BQ")
+
+
+class Codec(Protocol):
+    name: str
+    tag: int
+    """Identifies the codec in the header of compressed values, unique per codec."""
+
+    def compress(self, bs: bytes) -> bytes: ...
+    def decompress(self, bs: bytes) -> bytes: ...
+
+
+class ZlibCodec:
+    name = "zlib"
+    tag = 1
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def compress(self, bs: bytes) -> bytes:
+        return zlib.compress(bs, self.level)
+
+    def decompress(self, bs: bytes) -> bytes:
+        return zlib.decompress(bs)
+
+
+class ZstdCodec:
+    name = "zstd"
+    tag = 2
+
+    def __init__(self, level: int = 3) -> None:
+        try:
+            from compression import zstd  # type: ignore[import-not-found]
+
+            self._compress: Callable[[bytes], bytes] = lambda bs: zstd.compress(
+                bs, level
+            )
+            self._decompress: Callable[[bytes], bytes] = zstd.decompress
+        except ImportError:
+            zstandard = _optional_import("zstandard", self.name)
+            self._compress = zstandard.ZstdCompressor(level=level).compress
+            self._decompress = zstandard.ZstdDecompressor().decompress
+
+    def compress(self, bs: bytes) -> bytes:
+        return self._compress(bs)
+
+    def decompress(self, bs: bytes) -> bytes:
+        return self._decompress(bs)
+
+
+class Lz4Codec:
+    name = "lz4"
+    tag = 3
+
+    def __init__(self) -> None:
+        self._frame = _optional_import("lz4.frame", self.name)
+
+    def compress(self, bs: bytes) -> bytes:
+        return self._frame.compress(bs)
+
+    def decompress(self, bs: bytes) -> bytes:
+        return self._frame.decompress(bs)
+
+
+def _optional_import(module: str, codec: str) -> Any:
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError:
+        package = module.split(".")[0]
+        raise TierkreisError(
+            f"The {codec} codec requires {package}, install it with `pip install {package}`."
+        )
+
+
+_codec_factories: dict[str, Callable[[], Codec]] = {
+    ZlibCodec.name: ZlibCodec,
+    ZstdCodec.name: ZstdCodec,
+    Lz4Codec.name: Lz4Codec,
+}
+_codec_tags: dict[int, str] = {
+    ZlibCodec.tag: ZlibCodec.name,
+    ZstdCodec.tag: ZstdCodec.name,
+    Lz4Codec.tag: Lz4Codec.name,
+}
+
+
+def register_codec(name: str, tag: int, factory: Callable[[], Codec]) -> None:
+    """Make a codec available under `name`, with `tag` in the header of its values.
+
+    Codecs have to be registered in the controller and in the workers."""
+    if _codec_tags.get(tag, name) != name:
+        raise TierkreisError(f"Codec tag {tag} is taken by {_codec_tags[tag]}.")
+    _codec_factories[name] = factory
+    _codec_tags[tag] = name
+    get_codec.cache_clear()
+
+
+@lru_cache
+def get_codec(name: str) -> Codec:
+    if name not in _codec_factories:
+        raise TierkreisError(
+            f"Unknown {TKR_COMPRESSION_KEY}: {name}."
+            f" Expected one of {', '.join(_codec_factories)}."
+        )
+    return _codec_factories[name]()
+
+
+@dataclass(frozen=True)
+class Compression:
+    """Which outputs to compress and with which codec.
+
+    :param codec: The name of a registered codec.
+    :param min_bytes: Values smaller than this are written raw.
+    :param port_min_bytes: Thresholds of single ports, instead of `min_bytes`.
+    """
+
+    codec: str
+    min_bytes: int = DEFAULT_MIN_BYTES
+    port_min_bytes: dict[PortID, int] = field(default_factory=dict)
+
+    def threshold(self, port: PortID) -> int:
+        return self.port_min_bytes.get(port, self.min_bytes)
+
+
+@dataclass
+class CompressionStats:
+    """Sizes of the outputs written by a storage.
+
+    Only the compressed values count towards `raw_bytes` and `stored_bytes`."""
+
+    compressed: int = 0
+    """The number of values written compressed."""
+    skipped: int = 0
+    """The number of values written raw, as they were too small or did not shrink."""
+    raw_bytes: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def ratio(self) -> float:
+        """The uncompressed size of the compressed values over their stored size."""
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.compressed} values compressed {self.ratio:.2f}x"
+            f" ({self.raw_bytes} to {self.stored_bytes} bytes),"
+            f" {self.skipped} written raw"
+        )
+
+
+@lru_cache
+def _parse_compression(codec: str, min_bytes: str) -> Compression | None:
+    if codec in ("", "none"):
+        return None
+    get_codec(codec)  # Fail early on unknown or unavailable codecs.
+
+    default, ports = DEFAULT_MIN_BYTES, {}
+    for entry in filter(None, (x.strip() for x in min_bytes.split(","))):
+        port, _, size = entry.rpartition("=")
+        try:
+            threshold = int(size)
+        except ValueError:
+            raise TierkreisError(f"Invalid {TKR_COMPRESSION_MIN_BYTES_KEY}: {entry}.")
+        if port:
+            ports[port] = threshold
+        else:
+            default = threshold
+    return Compression(codec, default, ports)
+
+
+def default_compression() -> Compression | None:
+    """The compression set in the environment, none by default."""
+    return _parse_compression(
+        os.environ.get(TKR_COMPRESSION_KEY, ""),
+        os.environ.get(TKR_COMPRESSION_MIN_BYTES_KEY, ""),
+    )
+
+
+def is_compressed(bs: bytes) -> bool:
+    return bs[: len(COMPRESSED_MAGIC)] == COMPRESSED_MAGIC
+
+
+def is_compressed_file(path: Path) -> bool:
+    with open(path, "rb") as fh:
+        return fh.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC
+
+
+def compress(bs: bytes, codec: Codec) -> bytes:
+    return COMPRESSED_MAGIC + _HEADER.pack(codec.tag, len(bs)) + codec.compress(bs)
+
+
+def decompress(bs: bytes) -> bytes:
+    """The uncompressed value, `bs` itself if it is not compressed."""
+    if not is_compressed(bs):
+        return bs
+    tag, size = _HEADER.unpack_from(bs, len(COMPRESSED_MAGIC))
+    if tag not in _codec_tags:
+        raise TierkreisError(f"Value compressed with unknown codec tag {tag}.")
+    value = get_codec(_codec_tags[tag]).decompress(
+        bs[len(COMPRESSED_MAGIC) + _HEADER.size :]
+    )
+    if len(value) != size:
+        raise TierkreisError(f"Expected {size} bytes after decompression.")
+    return value
+
+
+def compress_output(
+    port: PortID,
+    value: bytes,
+    stats: CompressionStats | None = None,
+) -> bytes:
+    """The value to store for the output port, compressed with the compression
+    set in the environment if it is large enough and shrinks."""
+    compression = default_compression()
+    if compression is None:
+        return value
+    if len(value) < compression.threshold(port) or is_compressed(value):
+        if stats is not None:
+            stats.skipped += 1
+        return value
+
+    compressed = compress(value, get_codec(compression.codec))
+    if len(compressed) >= len(value):
+        if stats is not None:
+            stats.skipped += 1
+        return value
+    if stats is not None:
+        stats.compressed += 1
+        stats.raw_bytes += len(value)
+        stats.stored_bytes += len(compressed)
+    return compressed
@@ -0,0 +1,71 @@
+from collections import defaultdict
+from typing import Collection
+
+from tierkreis.controller.data.core import NodeIndex
+from tierkreis.controller.data.graph import Const, Func, GraphData
+
+
+def _launcher(node: Func) -> str:
+    return ".".join(node.function_name.split(".")[:-1])
+
+
+def _successor(g: GraphData, idx: NodeIndex, consumers: set[NodeIndex]) -> int | None:
+    """The function node that can run straight after `idx` in the same invocation."""
+    node = g.nodes[idx]
+    if not isinstance(node, Func) or len(consumers) != 1:
+        return None
+    (succ,) = consumers
+    succ_node = g.nodes[succ]
+    if not isinstance(succ_node, Func) or _launcher(succ_node) != _launcher(node):
+        return None
+
+    # Inputs of the node are finished when it starts, so the successor may share them.
+    available = {idx} | {i for i, _ in node.inputs.values()}
+    if any(i not in available for i, _ in succ_node.inputs.values()):
+        return None
+    return succ
+
+
+def fuse_chains(g: GraphData, exclude: Collection[str] = ("builtins",)) -> GraphData:
+    """Fuse linear chains of function nodes on the same launcher.
+
+    A function node is followed by its only consumer, if that is a function
+    on the same launcher whose other inputs are inputs of the node as well.
+    The controller then starts the whole chain when its first node is ready
+    and the worker runs the chain in one invocation,
+    passing values from one node to the next without decoding them again.
+    All outputs are still written, the nodes remain as they are in the graph.
+
+    Graphs in const nodes, e.g. bodies of maps and loops, are fused as well.
+    Workers need a version of tierkreis that runs the fused calls.
+    Chains are only started together on launchers whose executor runs fused calls,
+    see :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`;
+    on other launchers, e.g. shell scripts, the nodes are started one by one.
+
+    :param g: The graph, which is not modified.
+    :param exclude: Launchers whose nodes are not fused;
+        builtins often run in the controller process already.
+    :return: A copy of the graph with the chains in `GraphData.fused`.
+    """
+    g = g.model_copy(deep=True)
+    consumers: defaultdict[NodeIndex, set[NodeIndex]] = defaultdict(set)
+    for idx, node in enumerate(g.nodes):
+        for i, _ in node.inputs.values():
+            consumers[i].add(idx)
+        if isinstance(node, Const) and isinstance(node.value, GraphData):
+            node.value = fuse_chains(node.value, exclude)
+
+    successors: dict[NodeIndex, NodeIndex] = {}
+    for idx, node in enumerate(g.nodes):
+        if isinstance(node, Func) and _launcher(node) not in exclude:
+            succ = _successor(g, idx, consumers[idx])
+            if succ is not None:
+                successors[idx] = succ
+
+    g.fused = {}
+    for head in successors.keys() - set(successors.values()):
+        chain = [successors[head]]
+        while chain[-1] in successors:
+            chain.append(successors[chain[-1]])
+        g.fused[head] = chain
+    return g
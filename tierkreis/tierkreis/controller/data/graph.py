@@ -1,5 +1,8 @@
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from hashlib import blake2b
 import logging
+from threading import Lock
 from typing import Any, Callable, Literal, assert_never
 from pydantic import BaseModel, RootModel
 from tierkreis.controller.data.core import PortID
@@ -44,6 +47,12 @@ class Map:
     inputs: dict[PortID, ValueRef]
     outputs: dict[PortID, NodeIndex] = field(default_factory=lambda: {})
     type: Literal["map"] = field(default="map")
+    chunk_size: int | None = None
+    """If the body is a single function, the elements are run in calls of this many.
+
+    Only for launchers whose executor runs fused calls, see
+    :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`;
+    otherwise the elements are run one call each."""
 
 
 @dataclass
@@ -100,6 +109,9 @@ class GraphData(BaseModel):
     graph_inputs: set[PortID] = set()
     graph_output_idx: NodeIndex | None = None
     named_nodes: dict[str, NodeIndex] = {}
+    fused: dict[NodeIndex, list[NodeIndex]] = {}
+    """Function nodes that run in the same invocation as the key,
+    see :py:func:`tierkreis.controller.data.fusion.fuse_chains`."""
 
     def input(self, name: str) -> ValueRef:
         return self.add(Input(name))(name)
@@ -130,8 +142,11 @@ class GraphData(BaseModel):
         self,
         body: ValueRef,
         inputs: dict[PortID, ValueRef],
+        chunk_size: int | None = None,
     ) -> Callable[[PortID], ValueRef]:
-        return self.add(Map(body, inputs))
+        if chunk_size is not None and chunk_size < 1:
+            raise TierkreisError(f"Map chunk size must be positive, got {chunk_size}.")
+        return self.add(Map(body, inputs, chunk_size=chunk_size))
 
     def if_else(self, pred: ValueRef, if_true: ValueRef, if_false: ValueRef):
         return self.add(IfElse(pred, if_true, if_false))
@@ -195,6 +210,32 @@ class GraphData(BaseModel):
         return self.graph_inputs - actual_inputs
 
 
+GRAPH_CACHE_SIZE = 256
+_graph_cache: OrderedDict[bytes, GraphData] = OrderedDict()
+_graph_cache_lock = Lock()
+
+
+def graph_from_bytes(bs: bytes) -> GraphData:
+    """Deserialise a GraphData, reusing earlier results for identical bytes.
+
+    Graphs are cached by a hash of their serialised form,
+    keeping the `GRAPH_CACHE_SIZE` most recently used.
+    The returned graph is shared between callers and must not be mutated."""
+    key = blake2b(bs, digest_size=16).digest()
+    with _graph_cache_lock:
+        graph = _graph_cache.get(key)
+        if graph is not None:
+            _graph_cache.move_to_end(key)
+            return graph
+
+    graph = ptype_from_bytes(bs, GraphData)
+    with _graph_cache_lock:
+        _graph_cache[key] = graph
+        while len(_graph_cache) > GRAPH_CACHE_SIZE:
+            _graph_cache.popitem(last=False)
+    return graph
+
+
 def graph_node_from_loc(
     node_location: Loc,
     graph: GraphData,
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from logging import getLogger
 from pathlib import Path
 from typing import Any, Literal, Optional
@@ -21,72 +22,105 @@ class WorkerCallArgs(BaseModel):
     done_path: Path
     error_path: Path
     logs_path: Optional[Path]
+    fused: list[Path] = []
+    """Call args of the calls to run after this one in the same invocation."""
 
 
 NodeStep = Literal["-"] | tuple[Literal["N", "L", "M"], NodeIndex]
 
 
+@lru_cache(maxsize=4096)
+def _parse_steps(loc: str) -> tuple[NodeStep, ...]:
+    if loc == "":
+        return ()
+
+    steps: list[NodeStep] = []
+    for step_str in loc.split("."):
+        match step_str[0], step_str[1:]:
+            case ("-", _):
+                steps.append("-")
+            case ("N", idx_str):
+                steps.append(("N", int(idx_str)))
+            case ("L", idx_str):
+                steps.append(("L", int(idx_str)))
+            case ("M", idx_str):
+                steps.append(("M", int(idx_str)))
+            case _:
+                raise TierkreisError(f"Invalid Loc: {loc}")
+
+    return tuple(steps)
+
+
 class Loc(str):
+    """The location of a node, e.g. `-.N1.L0.N3`.
+
+    The string form is used in storage paths.
+    The parsed steps are cached on the instance and derived locations
+    are built from them without parsing the string again."""
+
+    _steps: tuple[NodeStep, ...]
+
     def __new__(cls, k: str = "-") -> "Loc":
         return super(Loc, cls).__new__(cls, k)
 
+    @classmethod
+    def _from(cls, loc: str, steps: tuple[NodeStep, ...]) -> "Loc":
+        new = super(Loc, cls).__new__(cls, loc)
+        new._steps = steps
+        return new
+
+    def _parsed(self) -> tuple[NodeStep, ...]:
+        try:
+            return self._steps
+        except AttributeError:
+            self._steps = _parse_steps(str(self))
+            return self._steps
+
     def N(self, idx: int) -> "Loc":
-        return Loc(str(self) + f".N{idx}")
+        return Loc._from(f"{self}.N{idx}", self._parsed() + (("N", idx),))
 
     def L(self, idx: int) -> "Loc":
-        return Loc(str(self) + f".L{idx}")
+        return Loc._from(f"{self}.L{idx}", self._parsed() + (("L", idx),))
 
     def M(self, idx: int) -> "Loc":
-        return Loc(str(self) + f".M{idx}")
+        return Loc._from(f"{self}.M{idx}", self._parsed() + (("M", idx),))
 
     @staticmethod
-    def from_steps(steps: list[NodeStep]) -> "Loc":
+    def from_steps(steps: list[NodeStep] | tuple[NodeStep, ...]) -> "Loc":
         loc = ""
-        for step in steps.copy():
+        for step in steps:
             match step:
                 case "-":
                     loc += "-"
                 case (node_type, idx):
                     loc += f".{node_type}{idx}"
-        return Loc(loc)
+        return Loc._from(loc, tuple(steps))
+
+    def _prefix(self) -> "Loc":
+        """The Loc without its last step."""
+        steps = self._parsed()
+        return Loc._from(self[: self.rfind(".")] if len(steps) > 1 else "", steps[:-1])
 
     def parent(self) -> "Loc | None":
-        steps = self.steps()
+        steps = self._parsed()
         if not steps:
             return None
 
-        last_step = steps.pop()
+        last_step = steps[-1]
         match last_step:
             case "-":
-                return Loc.from_steps([])
+                return Loc._from("", ())
             case ("L", 0):
-                return Loc.from_steps(steps)
+                return self._prefix()
             case ("L", idx):
-                return Loc.from_steps(steps).L(idx - 1)
+                return self._prefix().L(idx - 1)
             case ("N", idx) | ("M", idx):
-                return Loc.from_steps(steps)
+                return self._prefix()
             case _:
                 assert_never(last_step)
 
     def steps(self) -> list[NodeStep]:
-        if self == "":
-            return []
-
-        steps: list[NodeStep] = []
-        for step_str in self.split("."):
-            match step_str[0], step_str[1:]:
-                case ("-", _):
-                    steps.append("-")
-                case ("N", idx_str):
-                    steps.append(("N", int(idx_str)))
-                case ("L", idx_str):
-                    steps.append(("L", int(idx_str)))
-                case ("M", idx_str):
-                    steps.append(("M", int(idx_str)))
-                case _:
-                    raise TierkreisError(f"Invalid Loc: {self}")
-
-        return steps
+        return list(self._parsed())
 
     @classmethod
     def __get_pydantic_core_schema__(
@@ -97,38 +131,43 @@ class Loc(str):
     def pop_first(self) -> tuple[NodeStep, "Loc"]:
         if self == "-":
             return "-", Loc("")
-        steps = self.steps()
+        steps = self._parsed()
         if len(steps) < 2:
             raise TierkreisError("Malformed Loc")
-        first = steps.pop(1)
+        first = steps[1]
         if first == "-":
             raise TierkreisError("Malformed Loc")
-        return first, Loc.from_steps(steps)
+        rest = self[self.index(".", 2) :] if len(steps) > 2 else ""
+        return first, Loc._from("-" + rest, steps[:1] + steps[2:])
 
     def pop_last(self) -> tuple[NodeStep, "Loc"]:
         if self == "-":
             return "-", Loc("")
-        steps = self.steps()
+        steps = self._parsed()
         if len(steps) < 2:
             raise TierkreisError("Malformed Loc")
-        last = steps.pop(-1)
+        last = steps[-1]
         if last == "-":
             raise TierkreisError("Malformed Loc")
-        return last, Loc.from_steps(steps)
+        return last, self._prefix()
 
     def peek(self) -> NodeStep:
-        return self.steps()[-1]
+        return self._parsed()[-1]
 
     def peek_index(self) -> int:
-        step = self.steps()[-1]
+        step = self._parsed()[-1]
 
         if isinstance(step, str):
             return 0
         return step[1]
 
     def partial_locs(self) -> list["Loc"]:
-        steps = self.steps()
-        return [Loc.from_steps(steps[: i + 1]) for i in range(len(steps))]
+        partials: list[Loc] = []
+        loc = self
+        while loc._parsed():
+            partials.append(loc)
+            loc = loc._prefix()
+        return partials[::-1]
 
 
 OutputLoc = tuple[Loc, PortID]
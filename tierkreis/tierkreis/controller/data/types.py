@@ -3,13 +3,16 @@ import logging
 from base64 import b64decode, b64encode
 import collections.abc
 from inspect import Parameter, _empty, isclass
+import io
 from itertools import chain
 import json
-import pickle
+import os
+from pathlib import Path
 from types import NoneType, UnionType
 from typing import (
     Annotated,
     Any,
+    Literal,
     Mapping,
     Protocol,
     Self,
@@ -25,6 +28,8 @@ from typing import (
 
 from pydantic import BaseModel, ValidationError
 from pydantic._internal._generics import get_args as pydantic_get_args
+from tierkreis.consts import TKR_ENCODING_KEY
+from tierkreis.controller.data.binary import decode_binary, encode_binary, is_binary
 from tierkreis.controller.data.core import (
     RestrictedNamedTuple,
     SerializationFormat,
@@ -39,8 +44,9 @@ from typing_extensions import TypeIs
 class NdarraySurrogate(Protocol):
     """A protocol to enable use of numpy.ndarray.
 
-    By default the serialisation will be done using dumps
-    and the deserialisation using `pickle.loads`."""
+    By default arrays are stored in the `.npy` format without pickle,
+    so object arrays need an explicit serializer.
+    Workers reading from files memory map the arrays copy-on-write."""
 
     def dumps(self) -> bytes: ...
     def tobytes(self) -> bytes: ...
@@ -127,7 +133,7 @@ class TierkreisDecoder(json.JSONDecoder):
         return d
 
 
-def _is_union(o: object) -> bool:
+def is_union(o: object) -> bool:
     return (
         get_origin(o) == UnionType
         or get_origin(o) == Union
@@ -160,7 +166,7 @@ def is_ptype(annotation: Any) -> TypeIs[type[PType]]:
         return True
 
     if (
-        _is_union(annotation)
+        is_union(annotation)
         or _is_tuple(annotation)
         or _is_list(annotation)
         or _is_mapping(annotation)
@@ -212,20 +218,91 @@ def ser_from_ptype(ptype: PType, annotation: type[PType] | None) -> Any:
         case BaseModel():
             return ptype.model_dump(mode="json")
         case NdarraySurrogate():
-            return ptype.dumps()
+            return npy_from_ndarray(ptype)
         case _:
             assert_never(ptype)
 
 
-def bytes_from_ptype(ptype: PType, annotation: type[PType] | None = None) -> bytes:
+ValueEncoding = Literal["json", "binary"]
+"""Encodings of values that are not top level bytes.
+
+Readers detect the encoding, so values in different encodings can be mixed."""
+
+
+def default_encoding() -> ValueEncoding:
+    """The encoding set in the `TKR_ENCODING` environment variable, JSON by default."""
+    encoding = os.environ.get(TKR_ENCODING_KEY, "json")
+    if encoding not in get_args(ValueEncoding):
+        raise TierkreisError(f"Unknown {TKR_ENCODING_KEY}: {encoding}.")
+    return cast(ValueEncoding, encoding)
+
+
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def npy_from_ndarray(a: NdarraySurrogate) -> bytes:
+    """Serialize an array in the `.npy` format."""
+    import numpy as np
+
+    with io.BytesIO() as fh:
+        try:
+            np.save(fh, a, allow_pickle=False)
+        except ValueError as exc:
+            raise TierkreisError(f"Cannot serialize array without pickle: {exc}")
+        return fh.getvalue()
+
+
+def ndarray_from_npy(bs: bytes) -> Any:
+    import numpy as np
+
+    if not bs.startswith(NPY_MAGIC):
+        raise TierkreisError("Expected an array in the .npy format.")
+    return np.load(io.BytesIO(bs), allow_pickle=False)
+
+
+def ndarray_from_npy_file(path: Path) -> Any:
+    """Memory map an array in the `.npy` format.
+
+    The map is copy-on-write, so changes to the array do not reach the file."""
+    import numpy as np
+
+    with open(path, "rb") as fh:
+        if fh.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise TierkreisError(f"Expected an array in the .npy format at {path}.")
+    return np.load(path, mmap_mode="c", allow_pickle=False)
+
+
+def is_npy_annotation(annotation: Any) -> bool:
+    """Whether values of the annotation are read with `ndarray_from_npy`."""
+    if get_deserializer(annotation):
+        return False
+    if get_origin(annotation) is Annotated:
+        annotation = get_args(annotation)[0]
+    return isclass(annotation) and issubclass(annotation, NdarraySurrogate)
+
+
+def bytes_from_ptype(
+    ptype: PType,
+    annotation: type[PType] | None = None,
+    encoding: ValueEncoding | None = None,
+) -> bytes:
     ser = ser_from_ptype(ptype, annotation)
     match ser:
         case bytes():
             return ser  # Top level bytes should be a clean pass-through.
+        case _ if (encoding or default_encoding()) == "binary":
+            return encode_binary(ser)
         case _:
             return json.dumps(ser, cls=TierkreisEncoder).encode()
 
 
+def loads_ptype(bs: bytes) -> Any:
+    """Decode bytes in either value encoding, without coercing to an annotation."""
+    if is_binary(bs):
+        return decode_binary(bs)
+    return json.loads(bs, cls=TierkreisDecoder)
+
+
 def coerce_from_annotation[T: PType](ser: Any, annotation: type[T] | None) -> T:
     if annotation is None:
         return ser
@@ -236,7 +313,7 @@ def coerce_from_annotation[T: PType](ser: Any, annotation: type[T] | None) -> T:
     if get_origin(annotation) is Annotated:
         return coerce_from_annotation(ser, get_args(annotation)[0])
 
-    if _is_union(annotation):
+    if is_union(annotation):
         for t in get_args(annotation):
             try:
                 return coerce_from_annotation(ser, t)
@@ -270,7 +347,7 @@ def coerce_from_annotation[T: PType](ser: Any, annotation: type[T] | None) -> T:
         return annotation.from_list(ser)
 
     if issubclass(origin, NdarraySurrogate):
-        return pickle.loads(ser)
+        return ndarray_from_npy(ser)
 
     if issubclass(origin, BaseModel):
         assert issubclass(annotation, origin)
@@ -322,13 +399,13 @@ def ptype_from_bytes[T: PType](bs: bytes, annotation: type[T] | None = None) ->
         case "bytes":
             return coerce_from_annotation(bs, annotation)
         case "json":
-            j = json.loads(bs, cls=TierkreisDecoder)
+            j = loads_ptype(bs)
             return coerce_from_annotation(j, annotation)
         case "unknown":
             try:
-                j = json.loads(bs, cls=TierkreisDecoder)
+                j = loads_ptype(bs)
                 return coerce_from_annotation(j, annotation)
-            except (json.JSONDecodeError, UnicodeDecodeError):
+            except (json.JSONDecodeError, UnicodeDecodeError, TierkreisError):
                 return cast(T, bs)
         case _:
             assert_never(method)
@@ -338,7 +415,7 @@ def generics_in_ptype(ptype: type[PType]) -> set[str]:
     if _is_generic(ptype):
         return {str(ptype)}
 
-    if _is_union(ptype) or _is_tuple(ptype) or _is_list(ptype) or _is_mapping(ptype):
+    if is_union(ptype) or _is_tuple(ptype) or _is_list(ptype) or _is_mapping(ptype):
         return set(chain(*[generics_in_ptype(x) for x in get_args(ptype)]))
 
     origin = get_origin(ptype)
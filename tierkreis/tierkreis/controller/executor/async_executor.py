@@ -0,0 +1,162 @@
+import asyncio
+from concurrent.futures import Future
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.controller.data.location import WorkerCallArgs
+from tierkreis.controller.executor.shell_executor import worker_env
+from tierkreis.exceptions import TierkreisError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncExecutor:
+    """Launches workers concurrently from an asyncio event loop.
+
+    `run` only checks the launcher and schedules the launch on an event loop
+    in a background thread, so the controller keeps walking the graph while
+    the processes start. The loop waits for every process and marks the node
+    as errored if it exits with a non-zero code; shell launchers that exit
+    with zero are marked done, python workers mark themselves done.
+
+    Launchers with a `main.sh`, or launchers that are files themselves, are run
+    with the environment of the
+    :py:class:`tierkreis.controller.executor.shell_executor.ShellExecutor`.
+    Other launchers are run with `uv run main.py` in the launcher directory.
+
+    :param max_processes: The most workers running at the same time,
+        unlimited by default.
+
+    Implements: :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`
+    """
+
+    def __init__(
+        self,
+        registry_path: Path,
+        logs_path: Path,
+        max_processes: int | None = None,
+        env: dict[str, str] | None = None,
+        uv_path: str | None = None,
+    ) -> None:
+        self.launchers_path = registry_path
+        self.logs_path = logs_path
+        self.env = env or {}
+        self.uv_path = uv_path
+        self._semaphore = asyncio.Semaphore(max_processes) if max_processes else None
+        self._pending: set[Future[None]] = set()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        env = os.environ.copy() | self.env.copy()
+        if TKR_DIR_KEY not in env:
+            env[TKR_DIR_KEY] = str(self.logs_path.parent.parent)
+        tkr_dir = Path(env[TKR_DIR_KEY])
+        args, cwd, is_shell = self._command(launcher_name, worker_call_args_path)
+        if is_shell:
+            call_args_file = tkr_dir / worker_call_args_path
+            with open(call_args_file) as fh:
+                call_args = WorkerCallArgs(**json.load(fh))
+            env |= worker_env(call_args, tkr_dir, self.logs_path)
+            env["worker_call_args_file"] = str(call_args_file)
+        elif "VIRTUAL_ENVIRONMENT" not in env:
+            env["VIRTUAL_ENVIRONMENT"] = ""
+
+        logger.info("START %s %s", launcher_name, worker_call_args_path)
+        node_dir = tkr_dir / worker_call_args_path.parent
+        future = asyncio.run_coroutine_threadsafe(
+            self._launch(args, cwd, env, node_dir, is_shell), self._loop
+        )
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        """Only python workers run fused calls, shell launchers do not."""
+        launcher_path = self.launchers_path / launcher_name
+        return launcher_path.is_dir() and not (launcher_path / "main.sh").is_file()
+
+    def _command(
+        self, launcher_name: str, worker_call_args_path: Path
+    ) -> tuple[list[str], Path, bool]:
+        """The arguments and working directory of the worker process,
+        and whether it is a shell launcher."""
+        launcher_path = self.launchers_path / launcher_name
+        if not launcher_path.exists():
+            raise TierkreisError(f"Launcher not found: {launcher_name}.")
+        if launcher_path.is_file():
+            return [str(launcher_path), str(worker_call_args_path)], Path.cwd(), True
+        if (launcher_path / "main.sh").is_file():
+            main_sh = str(launcher_path / "main.sh")
+            return [main_sh, str(worker_call_args_path)], Path.cwd(), True
+
+        uv_path = self.uv_path or shutil.which("uv")
+        if uv_path is None:
+            raise TierkreisError("uv is required to run python workers")
+        args = [uv_path, "run", "main.py", str(worker_call_args_path)]
+        return args, launcher_path, False
+
+    async def _launch(
+        self,
+        args: list[str],
+        cwd: Path,
+        env: dict[str, str],
+        node_dir: Path,
+        is_shell: bool,
+    ) -> None:
+        if self._semaphore is None:
+            return await self._wait_for(args, cwd, env, node_dir, is_shell)
+        async with self._semaphore:
+            return await self._wait_for(args, cwd, env, node_dir, is_shell)
+
+    async def _wait_for(
+        self,
+        args: list[str],
+        cwd: Path,
+        env: dict[str, str],
+        node_dir: Path,
+        is_shell: bool,
+    ) -> None:
+        node_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            with (
+                open(self.logs_path, "a") as lfh,
+                open(node_dir / "errors", "a") as efh,
+            ):
+                proc = await asyncio.create_subprocess_exec(
+                    *args,
+                    cwd=cwd,
+                    env=env,
+                    stdout=lfh,
+                    stderr=efh,
+                    start_new_session=True,
+                )
+                returncode = await proc.wait()
+        except OSError as err:
+            logger.error("Could not start %s", args, exc_info=err)
+            returncode = None
+
+        if returncode == 0:
+            if is_shell:
+                (node_dir / "_done").touch()
+        else:
+            logger.error("%s exited with %s", args, returncode)
+            (node_dir / "_error").touch()
+
+    def wait(self) -> None:
+        """Wait until the workers launched so far have exited."""
+        while self._pending:
+            for future in list(self._pending):
+                future.result()
+
+    def close(self) -> None:
+        """Wait for the workers and stop the event loop."""
+        self.wait()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
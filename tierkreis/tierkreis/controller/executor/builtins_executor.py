@@ -0,0 +1,125 @@
+import importlib.util
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tierkreis.consts import PACKAGE_PATH
+from tierkreis.controller.data.location import WorkerCallArgs
+from tierkreis.controller.executor.protocol import (
+    ArrayExecutor,
+    ControllerExecutor,
+    FusingExecutor,
+    PollingExecutor,
+)
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.trace import span
+from tierkreis.exceptions import TierkreisError
+from tierkreis.worker.storage.controller_storage import ControllerWorkerStorage
+
+logger = logging.getLogger(__name__)
+BUILTINS_PATH = PACKAGE_PATH / "tierkreis" / "builtins" / "main.py"
+
+
+class BuiltinsExecutor:
+    """Executes builtins in the controller process against the controller storage.
+
+    This avoids starting a python process for every builtin call
+    and works with any storage.
+    Calls to other launchers are passed on to `executor`.
+    With `max_workers` the builtins run on a thread pool,
+    otherwise they have finished when `run` returns.
+    Job arrays and polling are passed on to `executor` if it supports them.
+
+    Implements: :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`,
+    :py:class:`tierkreis.controller.executor.protocol.ArrayExecutor`,
+    :py:class:`tierkreis.controller.executor.protocol.PollingExecutor`
+    """
+
+    def __init__(
+        self,
+        storage: ControllerStorage,
+        executor: ControllerExecutor | None = None,
+        max_workers: int = 0,
+    ) -> None:
+        self.storage = storage
+        self.executor = executor
+        self.worker_storage = ControllerWorkerStorage(storage)
+        self._pool = ThreadPoolExecutor(max_workers) if max_workers > 0 else None
+
+        spec = importlib.util.spec_from_file_location("builtins_main", BUILTINS_PATH)
+        if spec is None or spec.loader is None:
+            raise TierkreisError(f"Couldn't load {BUILTINS_PATH}")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.worker = module.worker
+        self.worker.storage = self.worker_storage
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        if launcher_name != "builtins":
+            if self.executor is None:
+                raise TierkreisError(f"No executor for launcher {launcher_name}.")
+            return self.executor.run(launcher_name, worker_call_args_path)
+
+        if self._pool is None:
+            self._run_builtin(worker_call_args_path)
+        else:
+            self._pool.submit(self._run_builtin, worker_call_args_path)
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        if launcher_name != "builtins" and isinstance(self.executor, ArrayExecutor):
+            return self.executor.run_array(launcher_name, worker_call_args_paths)
+        for worker_call_args_path in worker_call_args_paths:
+            self.run(launcher_name, worker_call_args_path)
+
+    def poll(self) -> None:
+        if isinstance(self.executor, PollingExecutor):
+            self.executor.poll()
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        if launcher_name == "builtins":
+            return True
+        return isinstance(self.executor, FusingExecutor) and self.executor.runs_fused(
+            launcher_name
+        )
+
+    def _run_builtin(self, worker_call_args_path: Path) -> None:
+        call_args = self._read_call_args(worker_call_args_path)
+        if call_args is None or not self._run_call(call_args):
+            return
+        for path in call_args.fused:
+            fused_call_args = self._read_call_args(path)
+            if fused_call_args is None or not self._run_call(fused_call_args):
+                break
+
+    def _read_call_args(self, worker_call_args_path: Path) -> WorkerCallArgs | None:
+        """The call args, or `None` once the node is marked errored
+        if they cannot be read."""
+        try:
+            return self.worker_storage.read_call_args(worker_call_args_path)
+        except Exception as err:
+            logger.error("encountered error", exc_info=err)
+            error_path = worker_call_args_path.parent / "_error"
+            self.worker_storage.write_error(error_path, str(err))
+            return None
+
+    def _run_call(self, call_args: WorkerCallArgs) -> bool:
+        logger.debug("START builtin %s", call_args.function_name)
+        try:
+            function = self.worker.functions.get(call_args.function_name, None)
+            if function is None:
+                raise TierkreisError(
+                    f"builtins: function name {call_args.function_name} not found"
+                )
+            with span(
+                "call",
+                "worker",
+                loc=call_args.done_path.parent.name,
+                function=f"builtins.{call_args.function_name}",
+            ):
+                function(call_args)
+            self.worker_storage.mark_done(call_args.done_path)
+            return True
+        except Exception as err:
+            logger.error("encountered error", exc_info=err)
+            self.worker_storage.write_error(call_args.error_path, str(err))
+            return False
@@ -1,8 +1,10 @@
 import logging
+import shlex
 import subprocess
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 from typing import Callable, Protocol
+from uuid import uuid4
 
 from tierkreis.consts import TKR_DIR_KEY
 from tierkreis.controller.executor.hpc.job_spec import JobSpec
@@ -18,6 +20,8 @@ class HPCExecutor(Protocol):
     spec: JobSpec
     script_fn: Callable[[JobSpec], str]
     command: str
+    array_index_var: str
+    """Environment variable holding the index of a task in a job array."""
 
 
 def generate_script(
@@ -27,9 +31,7 @@ def generate_script(
         fh.write(template_fn(spec))
 
 
-def run_hpc_executor(
-    executor: HPCExecutor, launcher_name: str, worker_call_args_path: Path
-) -> None:
+def _configure_logging(executor: HPCExecutor) -> None:
     logging.basicConfig(
         format="%(asctime)s: %(message)s",
         datefmt="%Y-%m-%dT%H:%M:%S%z",
@@ -38,6 +40,12 @@ def run_hpc_executor(
         level=logging.INFO,
         force=True,
     )
+
+
+def run_hpc_executor(
+    executor: HPCExecutor, launcher_name: str, worker_call_args_path: Path
+) -> str:
+    _configure_logging(executor)
     logger.info("START %s %s", launcher_name, worker_call_args_path)
 
     spec = executor.spec.model_copy()
@@ -45,15 +53,51 @@ def run_hpc_executor(
         spec.command = f"cd {executor.launchers_path}/{launcher_name} && {spec.command}"
 
     spec.command += " " + str(worker_call_args_path)
+    return submit_job(executor, spec)
+
+
+def run_hpc_executor_array(
+    executor: HPCExecutor, launcher_name: str, worker_call_args_paths: list[Path]
+) -> str:
+    """Submit the calls as a single job array.
+
+    The call args paths are written to a file in `{workflow_dir}/arrays`,
+    one per line, and each task of the array runs the command of the spec
+    on the line given by its array index.
+    Scheduler output of all tasks goes to the logs of the executor;
+    workers still write their errors to the errors of their node."""
+    _configure_logging(executor)
+    for worker_call_args_path in worker_call_args_paths:
+        logger.info("START %s %s", launcher_name, worker_call_args_path)
+
+    arrays_dir = executor.logs_path.parent / "arrays"
+    arrays_dir.mkdir(parents=True, exist_ok=True)
+    paths_file = arrays_dir / f"{launcher_name}-{uuid4().hex}"
+    paths_file.write_text("".join(f"{p}\n" for p in worker_call_args_paths))
+
+    spec = executor.spec.model_copy()
+    spec.array_size = len(worker_call_args_paths)
+    if executor.launchers_path:
+        spec.command = f"cd {executor.launchers_path}/{launcher_name} && {spec.command}"
+
+    line = f"$((${executor.array_index_var} + 1))p"
+    spec.command += f' "$(sed -n "{line}" {shlex.quote(str(paths_file))})"'
+    if spec.error_path is None:
+        spec.error_path = executor.logs_path
+    return submit_job(executor, spec)
+
+
+def submit_job(executor: HPCExecutor, spec: JobSpec) -> str:
+    """Submit a job running `spec.command` with the scheduler of the executor.
+
+    Returns the output of the submission command, which holds the job id."""
     submission_cmd = [executor.command]
     if spec.output_path is None:
         submission_cmd += ["-o", str(executor.logs_path)]
     else:
         submission_cmd += ["-o", str(spec.output_path)]
-    if spec.error_path is None:
-        submission_cmd += ["-e", str(executor.errors_path)]
-    else:
-        submission_cmd += ["-e", str(spec.error_path)]
+    errors_path = spec.error_path or executor.errors_path
+    submission_cmd += ["-e", str(errors_path)]
     if spec.include_no_check_directory_flag:
         submission_cmd += ["--no-check-directory"]
 
@@ -76,8 +120,9 @@ def run_hpc_executor(
             universal_newlines=True,
         )
     if process.returncode != 0:
-        with open(executor.errors_path, "a") as efh:
+        with open(errors_path, "a") as efh:
             efh.write("Error from script")
             efh.write(process.stderr)
         raise TierkreisError(f"Executor failed with return code {process.returncode}")
     logger.info("Submitted job with return code %s", process.stdout.rstrip())
+    return process.stdout
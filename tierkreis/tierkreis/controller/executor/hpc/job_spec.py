@@ -43,6 +43,8 @@ class JobSpec(BaseModel):
     extra_scheduler_args: dict[str, str | None] = Field(default_factory=dict)
     environment: dict[str, str] = Field(default_factory=dict)
     include_no_check_directory_flag: bool = False
+    array_size: int | None = None
+    """Number of tasks in a job array, indexed from 0."""
 
 
 def pjsub_large_spec() -> JobSpec:
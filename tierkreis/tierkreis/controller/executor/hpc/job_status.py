@@ -0,0 +1,105 @@
+"""Follow the scheduler jobs of an HPC executor.
+
+A worker marks its node done or errored itself, so a job that the scheduler
+kills, e.g. when it runs out of walltime or memory or is preempted,
+leaves its node running forever.
+The :py:class:`JobTracker` remembers the jobs submitted for each node and
+asks the scheduler for the state of all of them in a single call,
+at most every `poll_interval_seconds`.
+Nodes whose job has left the queue, or is in a state outside the active states,
+without the node being done are marked errored.
+"""
+
+import logging
+from collections import Counter
+from time import monotonic
+from typing import Callable
+
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.storage.protocol import ControllerStorage
+
+logger = logging.getLogger(__name__)
+
+type JobStates = dict[str, str]
+"""The state of each job or array task by its id, as reported by the scheduler."""
+
+LOST = "LOST"
+
+
+class JobTracker:
+    """Marks the nodes of jobs that died as errored.
+
+    :param query: Gets the states of the jobs with the given ids
+        in one call to the scheduler, with array tasks as `{job_id}_{index}`.
+        Jobs that are no longer known to the scheduler are left out.
+        Returns `None` if the scheduler could not be queried.
+    :param active_states: The states of jobs that may still finish their node.
+    :param poll_interval_seconds: The least time between calls to the scheduler.
+    """
+
+    def __init__(
+        self,
+        query: Callable[[list[str]], JobStates | None],
+        active_states: set[str],
+        poll_interval_seconds: float = 30.0,
+    ) -> None:
+        self.query = query
+        self.active_states = active_states
+        self.poll_interval_seconds = poll_interval_seconds
+        self.states: Counter[str] = Counter()
+        """The number of outstanding jobs in each state at the last poll;
+        jobs that died are counted as `LOST`."""
+        self._tasks: dict[str, tuple[ControllerStorage, Loc]] = {}
+        self._last_poll: float | None = None
+
+    def add(self, job_id: str, storage: ControllerStorage, locs: list[Loc]) -> None:
+        """Follow a job running the nodes at `locs` of the workflow in `storage`,
+        as an array with a task per node if there is more than one."""
+        if len(locs) == 1:
+            self._tasks[job_id] = (storage, locs[0])
+            return
+        for index, loc in enumerate(locs):
+            self._tasks[f"{job_id}_{index}"] = (storage, loc)
+
+    def poll(self) -> None:
+        """Query the scheduler if the last query is long enough ago."""
+        if not self._tasks:
+            return
+        now = monotonic()
+        if (
+            self._last_poll is not None
+            and now - self._last_poll < self.poll_interval_seconds
+        ):
+            return
+        self._last_poll = now
+
+        job_ids = sorted({task_id.partition("_")[0] for task_id in self._tasks})
+        states = self.query(job_ids)
+        if states is None:
+            return
+
+        lost = self.states[LOST]
+        self.states = Counter({LOST: lost})
+        # The node markers are read after the query, so a job that finished
+        # in between has already marked its node.
+        for task_id, (storage, loc) in list(self._tasks.items()):
+            if storage.is_node_finished(loc) or storage.node_has_error(loc):
+                del self._tasks[task_id]
+                continue
+            state = states.get(task_id)
+            if state in self.active_states:
+                self.states[state] += 1
+                continue
+
+            del self._tasks[task_id]
+            self.states[LOST] += 1
+            reason = "left the queue" if state is None else f"ended in state {state}"
+            message = f"Job {task_id} {reason} without finishing the node."
+            logger.error("%s %s", message, loc)
+            errors = storage.read_errors(loc)
+            storage.write_node_errors(loc, errors + message + "\n")
+            storage.mark_node_errored(loc)
+
+        logger.info(
+            "Jobs: %s", ", ".join(f"{k}={v}" for k, v in sorted(self.states.items()))
+        )
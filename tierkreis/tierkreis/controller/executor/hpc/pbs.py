@@ -19,6 +19,8 @@ def generate_pbs_script(spec: JobSpec) -> str:
     ]
     # 2. Name
     lines.append(f"{_COMMAND_PREFIX} -N {spec.job_name}")
+    if spec.array_size is not None:
+        lines.append(f"{_COMMAND_PREFIX} -J 0-{spec.array_size - 1}")
     # 3. Resources (node exclusive)
     lines.append(f"{_COMMAND_PREFIX} -l walltime={spec.walltime}")
     resources = f"{_COMMAND_PREFIX} -l select={spec.resource.nodes}"
@@ -108,6 +110,7 @@ def generate_pbs_script(spec: JobSpec) -> str:
 #         self.spec = spec
 #         self.script_fn: Callable[[JobSpec], str] = generate_pbs_script
 #         self.command = command
+#         self.array_index_var = "PBS_ARRAY_INDEX"
 
 #     def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
 #         self.errors_path = (
@@ -0,0 +1,335 @@
+"""Pilot jobs: long-lived allocations that run many function nodes.
+
+The :py:class:`PilotExecutor` puts the calls into a queue directory in the
+workflow directory and submits a pilot job when no pilot is alive,
+both when a call is queued and on every controller tick.
+The pilot job runs `python -m tierkreis.controller.executor.hpc.pilot`,
+which claims calls from the queue and runs them until it is idle
+or its walltime is nearly used up.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shlex
+import subprocess
+import sys
+from itertools import count
+from pathlib import Path
+from time import sleep, time, time_ns
+from uuid import uuid4
+
+from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.controller.executor.hpc.hpc_executor import HPCExecutor, submit_job
+from tierkreis.exceptions import TierkreisError
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DIR = "queue"
+CLAIMED_DIR = "claimed"
+PILOTS_DIR = "pilots"
+PENDING = "pending"
+
+
+def walltime_seconds(walltime: str) -> int:
+    """Convert a walltime of the form `[[HH:]MM:]SS` or `D-HH[:MM[:SS]]` to seconds."""
+    days, _, time_of_day = walltime.strip().rpartition("-")
+    parts = time_of_day.split(":")
+    if days:
+        parts += ["0"] * (3 - len(parts))  # After the days the hours come first.
+    try:
+        values = [int(days or 0)] + [int(part) for part in parts]
+    except ValueError:
+        raise TierkreisError(f"Invalid walltime: {walltime}.")
+    if len(parts) > 3 or any(value < 0 for value in values):
+        raise TierkreisError(f"Invalid walltime: {walltime}.")
+
+    seconds = 0
+    for part in values[1:]:
+        seconds = 60 * seconds + part
+    seconds += 24 * 60 * 60 * values[0]
+    if seconds <= 0:
+        raise TierkreisError(f"Walltime must be positive, got {walltime}.")
+    return seconds
+
+
+class PilotExecutor:
+    """Runs the calls of an HPC executor inside long-lived pilot jobs.
+
+    Instead of one batch job per function node, the calls are queued in
+    `{workflow_dir}/pilot` and a pilot job sized by the `JobSpec` of `executor`
+    works through the queue, running `slots` calls at a time with the command of the spec.
+    A pilot exits after `idle_timeout` seconds without calls
+    and stops claiming calls `walltime_margin` seconds before its walltime runs out.
+    Up to `max_pilots` pilots are submitted when the queue backs up.
+
+    Pilots that are still waiting for an allocation count as alive
+    for `pending_timeout` seconds after their submission,
+    so that a pilot dropped by the scheduler before it starts is replaced.
+    `poll` submits a new pilot whenever calls are queued and no pilot is alive,
+    e.g. when the last pilot reached its walltime with calls left in the queue.
+    It also marks the calls a pilot was running as errored
+    once the heartbeat of the pilot has timed out,
+    e.g. when the pilot was killed at its walltime or ran out of memory.
+
+    Implements: :py:class:`tierkreis.controller.executor.protocol.PollingExecutor`
+    """
+
+    def __init__(
+        self,
+        executor: HPCExecutor,
+        idle_timeout: int = 60,
+        slots: int = 1,
+        max_pilots: int = 1,
+        walltime_margin: int = 60,
+        heartbeat_timeout: int = 300,
+        pending_timeout: int = 3600,
+        agent_command: str = f"{sys.executable} -m {__name__}",
+    ) -> None:
+        self.executor = executor
+        self.idle_timeout = idle_timeout
+        self.slots = slots
+        self.max_pilots = max_pilots
+        self.walltime_margin = walltime_margin
+        self.heartbeat_timeout = heartbeat_timeout
+        self.pending_timeout = pending_timeout
+        self.agent_command = agent_command
+        self.pilot_dir = executor.logs_path.parent / "pilot"
+        walltime = walltime_seconds(executor.spec.walltime)
+        if walltime <= walltime_margin:
+            raise TierkreisError(
+                f"The walltime {executor.spec.walltime} of the pilots must be longer"
+                f" than the margin of {walltime_margin} seconds."
+            )
+        self._counter = count()
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        queue_dir = self.pilot_dir / QUEUE_DIR
+        queue_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time_ns():020d}-{next(self._counter)}"
+        task = {"launcher_name": launcher_name, "path": str(worker_call_args_path)}
+        tmp_path = self.pilot_dir / f".{name}"
+        tmp_path.write_text(json.dumps(task))
+        tmp_path.rename(queue_dir / name)
+
+        # The pilot checks the queue again after deregistering itself,
+        # so a call queued before this check is never left behind.
+        alive = self.alive_pilots()
+        backlog = len(list(queue_dir.iterdir()))
+        if alive == 0 or (alive < self.max_pilots and backlog > alive * self.slots):
+            self.submit_pilot()
+
+    def poll(self) -> None:
+        """Error the calls of dead pilots and submit a pilot
+        if calls are queued and no pilot is alive."""
+        self.error_lost_calls()
+        queue_dir = self.pilot_dir / QUEUE_DIR
+        if not queue_dir.exists() or not any(queue_dir.iterdir()):
+            return
+        if self.alive_pilots() == 0:
+            logger.info("Calls are queued without a pilot alive.")
+            self.submit_pilot()
+
+    def alive_pilots(self) -> int:
+        pilots_dir = self.pilot_dir / PILOTS_DIR
+        if not pilots_dir.exists():
+            return 0
+        return sum(self._is_alive(pilot) for pilot in pilots_dir.iterdir())
+
+    def _is_alive(self, pilot: Path) -> bool:
+        try:
+            state = pilot.read_text()
+            last_seen = pilot.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        timeout = self.pending_timeout if state == PENDING else self.heartbeat_timeout
+        return time() - last_seen < timeout
+
+    def error_lost_calls(self) -> None:
+        """Mark the calls claimed by pilots that are no longer alive as errored.
+
+        Pilots remove the calls they claimed once they have finished,
+        so the calls left behind were running when the pilot died."""
+        claimed_dir = self.pilot_dir / CLAIMED_DIR
+        if not claimed_dir.exists():
+            return
+        tkr_dir = Path(self._tkr_dir())
+        for pilot_claims in claimed_dir.iterdir():
+            if self._is_alive(self.pilot_dir / PILOTS_DIR / pilot_claims.name):
+                continue
+            for claimed in pilot_claims.iterdir():
+                node_dir = (
+                    tkr_dir / Path(json.loads(claimed.read_text())["path"]).parent
+                )
+                if not (node_dir / "_done").exists():
+                    message = f"Pilot {pilot_claims.name} died while running the node."
+                    logger.error("%s %s", message, node_dir)
+                    with open(node_dir / "errors", "a") as fh:
+                        fh.write(message + "\n")
+                    (node_dir / "_error").touch()
+                claimed.unlink()
+            pilot_claims.rmdir()
+
+    def _tkr_dir(self) -> str:
+        return self.executor.spec.environment.get(
+            TKR_DIR_KEY, str(self.executor.logs_path.parent.parent)
+        )
+
+    def submit_pilot(self) -> None:
+        pilot_id = uuid4().hex
+        pilots_dir = self.pilot_dir / PILOTS_DIR
+        pilots_dir.mkdir(parents=True, exist_ok=True)
+        (pilots_dir / pilot_id).write_text(PENDING)
+
+        spec = self.executor.spec.model_copy(deep=True)
+        spec.job_name = f"{spec.job_name}-pilot"
+        spec.mpi = None
+        tkr_dir = self._tkr_dir()
+        spec.environment[TKR_DIR_KEY] = tkr_dir
+        args = [
+            str(self.pilot_dir),
+            pilot_id,
+            "--command",
+            self.executor.spec.command,
+            "--tkr-dir",
+            tkr_dir,
+            "--idle-timeout",
+            str(self.idle_timeout),
+            "--walltime",
+            str(walltime_seconds(spec.walltime) - self.walltime_margin),
+            "--slots",
+            str(self.slots),
+        ]
+        if self.executor.launchers_path is not None:
+            args += ["--launchers-path", str(self.executor.launchers_path)]
+        spec.command = f"{self.agent_command} {shlex.join(args)}"
+
+        if spec.error_path is None:
+            spec.error_path = self.executor.logs_path
+        logger.info("Submitting pilot %s", pilot_id)
+        submit_job(self.executor, spec)
+
+
+class PilotAgent:
+    """Claims calls from the queue of a pilot directory and runs them."""
+
+    def __init__(
+        self,
+        pilot_dir: Path,
+        pilot_id: str,
+        command: str,
+        tkr_dir: Path,
+        launchers_path: Path | None = None,
+        idle_timeout: float = 60,
+        walltime: float = 3600,
+        slots: int = 1,
+        poll_interval_seconds: float = 0.1,
+    ) -> None:
+        self.pilot_dir = pilot_dir
+        self.pilot_file = pilot_dir / PILOTS_DIR / pilot_id
+        self.command = command
+        self.tkr_dir = tkr_dir
+        self.launchers_path = launchers_path
+        self.idle_timeout = idle_timeout
+        self.deadline = time() + walltime
+        self.slots = slots
+        self.poll_interval_seconds = poll_interval_seconds
+        self.running: dict[Path, subprocess.Popen[bytes]] = {}
+        """The processes of the calls being run by their claimed path."""
+
+    def claim(self) -> Path | None:
+        """Move the oldest call in the queue to the claimed calls of this pilot."""
+        claimed_dir = self.pilot_dir / CLAIMED_DIR / self.pilot_file.name
+        claimed_dir.mkdir(parents=True, exist_ok=True)
+        queue_dir = self.pilot_dir / QUEUE_DIR
+        if not queue_dir.exists():
+            return None
+        for task in sorted(queue_dir.iterdir()):
+            try:
+                task.rename(claimed_dir / task.name)
+            except FileNotFoundError:
+                continue  # Claimed by another pilot.
+            return claimed_dir / task.name
+        return None
+
+    def start(self, claimed: Path) -> None:
+        task = json.loads(claimed.read_text())
+        path = Path(task["path"])
+        error_path = self.tkr_dir / path.parent / "_error"
+        cmd = f"{self.command} {shlex.quote(str(path))}"
+        cmd += f" || touch {shlex.quote(str(error_path))}"
+        if self.launchers_path is not None:
+            launcher_dir = self.launchers_path / task["launcher_name"]
+            cmd = f"cd {shlex.quote(str(launcher_dir))} && {cmd}"
+        logger.info("START %s %s", task["launcher_name"], path)
+        with open(self.tkr_dir / path.parent / "errors", "a") as efh:
+            proc = subprocess.Popen(["bash", "-c", cmd], stdout=efh, stderr=efh)
+        self.running[claimed] = proc
+
+    def reap(self) -> None:
+        """Forget the calls that have finished, so they are not errored
+        if this pilot dies."""
+        for claimed, proc in list(self.running.items()):
+            if proc.poll() is not None:
+                claimed.unlink(missing_ok=True)
+                del self.running[claimed]
+
+    def serve(self) -> None:
+        self.pilot_file.write_text("running")
+        idle_since = time()
+        while True:
+            self.reap()
+            accepting = time() < self.deadline
+            while accepting and len(self.running) < self.slots:
+                claimed = self.claim()
+                if claimed is None:
+                    break
+                self.start(claimed)
+                idle_since = time()
+
+            if self.running:
+                idle_since = time()
+            elif not accepting or time() - idle_since > self.idle_timeout:
+                self.pilot_file.unlink(missing_ok=True)
+                queue_dir = self.pilot_dir / QUEUE_DIR
+                if not accepting or not any(queue_dir.iterdir()):
+                    break
+                self.pilot_file.write_text("running")
+                continue
+
+            os.utime(self.pilot_file)
+            sleep(self.poll_interval_seconds)
+        logger.info("Pilot %s exiting.", self.pilot_file.name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tierkreis pilot job agent.")
+    parser.add_argument("pilot_dir", type=Path)
+    parser.add_argument("pilot_id")
+    parser.add_argument("--command", required=True)
+    parser.add_argument("--tkr-dir", type=Path, required=True)
+    parser.add_argument("--launchers-path", type=Path, default=None)
+    parser.add_argument("--idle-timeout", type=float, default=60)
+    parser.add_argument("--walltime", type=float, default=3600)
+    parser.add_argument("--slots", type=int, default=1)
+    args = parser.parse_args()
+    logging.basicConfig(
+        format="%(asctime)s: %(message)s",
+        datefmt="%Y-%m-%dT%H:%M:%S%z",
+        level=logging.INFO,
+    )
+    PilotAgent(
+        args.pilot_dir,
+        args.pilot_id,
+        args.command,
+        args.tkr_dir,
+        args.launchers_path,
+        args.idle_timeout,
+        args.walltime,
+        args.slots,
+    ).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,10 @@ from functools import partial
 from pathlib import Path
 from typing import Callable
 
-from tierkreis.controller.executor.hpc.hpc_executor import run_hpc_executor
+from tierkreis.controller.executor.hpc.hpc_executor import (
+    run_hpc_executor,
+    run_hpc_executor_array,
+)
 from tierkreis.controller.executor.hpc.job_spec import (
     JobSpec,
     pjsub_large_spec,
@@ -25,6 +28,9 @@ def generate_pjsub_script(spec: JobSpec) -> str:
     ]
     # 2. Name
     lines.append(f"{_COMMAND_PREFIX} -N {spec.job_name}")
+    if spec.array_size is not None:
+        lines.append(f"{_COMMAND_PREFIX} --bulk")
+        lines.append(f'{_COMMAND_PREFIX} --sparam "0-{spec.array_size - 1}"')
     # 3. Resources (node exclusive)
     lines.append(f'{_COMMAND_PREFIX} -L "elapse={spec.walltime}"')
     lines.append(f'{_COMMAND_PREFIX} -L "node={spec.resource.nodes}"')
@@ -100,6 +106,7 @@ class PJSUBExecutor:
         self.spec = spec
         self.script_fn: Callable[[JobSpec], str] = generate_pjsub_script
         self.command = command
+        self.array_index_var = "PJM_BULKNUM"
 
     def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
         self.errors_path = (
@@ -107,6 +114,11 @@ class PJSUBExecutor:
         )
         run_hpc_executor(self, launcher_name, worker_call_args_path)
 
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        if len(worker_call_args_paths) == 1:
+            return self.run(launcher_name, worker_call_args_paths[0])
+        run_hpc_executor_array(self, launcher_name, worker_call_args_paths)
+
 
 PJSUB_EXECUTOR_SMALL = partial(PJSUBExecutor, spec=pjsub_small_spec())
 PJSUB_EXECUTOR_LARGE = partial(PJSUBExecutor, spec=pjsub_large_spec())
@@ -1,10 +1,40 @@
+import logging
+import re
+import subprocess
 from pathlib import Path
 from typing import Callable
-from tierkreis.controller.executor.hpc.hpc_executor import run_hpc_executor
+from uuid import UUID
+
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.hpc.hpc_executor import (
+    run_hpc_executor,
+    run_hpc_executor_array,
+)
 from tierkreis.controller.executor.hpc.job_spec import JobSpec
+from tierkreis.controller.executor.hpc.job_status import JobStates, JobTracker
+from tierkreis.controller.storage.filestorage import ControllerFileStorage
+from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.storage.sqlite import ControllerSQLiteStorage, database_path
 
 
 _COMMAND_PREFIX = "#SBATCH"
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = {
+    "PENDING",
+    "CONFIGURING",
+    "RUNNING",
+    "COMPLETING",
+    "SUSPENDED",
+    "REQUEUED",
+    "REQUEUE_FED",
+    "REQUEUE_HOLD",
+    "RESIZING",
+    "SIGNALING",
+    "STAGE_OUT",
+    "STOPPED",
+}
+"""Job states in which the worker may still finish its node."""
 
 
 def generate_slurm_script(spec: JobSpec) -> str:
@@ -18,6 +48,8 @@ def generate_slurm_script(spec: JobSpec) -> str:
     ]
     # 2. Name
     lines.append(f"{_COMMAND_PREFIX} --job-name={spec.job_name}")
+    if spec.array_size is not None:
+        lines.append(f"{_COMMAND_PREFIX} --array=0-{spec.array_size - 1}")
     # 3. Resources (node exclusive)
     lines.append(f"{_COMMAND_PREFIX} --time={spec.walltime}")
     lines.append(f"{_COMMAND_PREFIX} --nodes={spec.resource.nodes}")
@@ -87,13 +119,65 @@ def generate_slurm_script(spec: JobSpec) -> str:
     return "\n".join(lines)
 
 
+def parse_job_id(sbatch_output: str) -> str | None:
+    """The job id in the output of `sbatch`, with or without `--parsable`."""
+    match = re.search(r"\d+", sbatch_output)
+    return None if match is None else match.group()
+
+
+def squeue_states(command: str = "squeue") -> Callable[[list[str]], JobStates | None]:
+    """Query the states of jobs, and of each of their array tasks,
+    with a single call to `squeue`."""
+
+    def query(job_ids: list[str]) -> JobStates | None:
+        try:
+            process = subprocess.run(
+                [command, "-h", "-r", "-o", "%i %T", "-j", ",".join(job_ids)],
+                capture_output=True,
+                universal_newlines=True,
+            )
+        except OSError as err:
+            logger.warning("Could not query the job states: %s", err)
+            return None
+        if process.returncode != 0:
+            # squeue fails when none of the jobs are known to it anymore.
+            if "Invalid job id" in process.stderr:
+                return {}
+            logger.warning("Could not query the job states: %s", process.stderr)
+            return None
+        states: JobStates = {}
+        for line in process.stdout.splitlines():
+            task_id, _, state = line.strip().partition(" ")
+            if task_id:
+                states[task_id] = state.strip()
+        return states
+
+    return query
+
+
 class SLURMExecutor:
+    """Submits each call, or each array of calls, as a SLURM batch job.
+
+    The submitted jobs are followed with `squeue`, every `poll_interval_seconds`
+    at most, and nodes whose job died without finishing them are marked errored;
+    see :py:class:`tierkreis.controller.executor.hpc.job_status.JobTracker`.
+    The number of jobs in each state is in `jobs.states`.
+    The nodes are checked and marked through `storage`; without one,
+    the SQLite storage is used for workflows that have a database
+    and the file storage otherwise.
+
+    Implements: :py:class:`tierkreis.controller.executor.protocol.PollingExecutor`
+    """
+
     def __init__(
         self,
         registry_path: Path | None,
         logs_path: Path,
         spec: JobSpec,
         command: str = "sbatch",
+        status_command: str = "squeue",
+        poll_interval_seconds: float = 30.0,
+        storage: ControllerStorage | None = None,
     ) -> None:
         self.launchers_path = registry_path
         self.logs_path = logs_path
@@ -101,9 +185,50 @@ class SLURMExecutor:
         self.spec = spec
         self.script_fn: Callable[[JobSpec], str] = generate_slurm_script
         self.command = command
+        self.array_index_var = "SLURM_ARRAY_TASK_ID"
+        self.jobs = JobTracker(
+            squeue_states(status_command), ACTIVE_STATES, poll_interval_seconds
+        )
+        self.storage = storage
+        self._storages: dict[str, ControllerStorage] = {}
 
     def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
         self.errors_path = (
             self.logs_path.parent.parent / worker_call_args_path.parent / "errors"
         )
-        run_hpc_executor(self, launcher_name, worker_call_args_path)
+        output = run_hpc_executor(self, launcher_name, worker_call_args_path)
+        self._track(output, [worker_call_args_path])
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        if len(worker_call_args_paths) == 1:
+            return self.run(launcher_name, worker_call_args_paths[0])
+        output = run_hpc_executor_array(self, launcher_name, worker_call_args_paths)
+        self._track(output, worker_call_args_paths)
+
+    def poll(self) -> None:
+        self.jobs.poll()
+
+    def _track(self, sbatch_output: str, worker_call_args_paths: list[Path]) -> None:
+        job_id = parse_job_id(sbatch_output)
+        if job_id is None:
+            logger.warning("No job id in the output of sbatch: %s", sbatch_output)
+            return
+        storage = self._storage(worker_call_args_paths[0])
+        locs = [Loc(p.parent.name) for p in worker_call_args_paths]
+        self.jobs.add(job_id, storage, locs)
+
+    def _storage(self, worker_call_args_path: Path) -> ControllerStorage:
+        if self.storage is not None:
+            return self.storage
+        workflow_id = worker_call_args_path.parts[0]
+        if workflow_id not in self._storages:
+            tkr_dir = self.logs_path.parent.parent
+            storage_class = (
+                ControllerSQLiteStorage
+                if database_path(tkr_dir, worker_call_args_path).exists()
+                else ControllerFileStorage
+            )
+            self._storages[workflow_id] = storage_class(
+                UUID(workflow_id), tierkreis_directory=tkr_dir
+            )
+        return self._storages[workflow_id]
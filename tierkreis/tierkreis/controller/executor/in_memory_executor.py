@@ -5,6 +5,7 @@ from pathlib import Path
 
 from tierkreis.controller.data.location import WorkerCallArgs
 from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
+from tierkreis.controller.trace import span
 from tierkreis.worker.storage.in_memory import InMemoryWorkerStorage
 from tierkreis.exceptions import TierkreisError
 
@@ -15,7 +16,9 @@ logger = logging.getLogger(__name__)
 class InMemoryExecutor:
     """Executes workers in the same process as the controller.
 
-    Implements: :py:class:`tierkreis.controller.executor.protocol.ControllerExecutor`
+    Fused calls are run one after the other, reading their inputs from storage.
+
+    Implements: :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`
     """
 
     def __init__(self, registry_path: Path, storage: ControllerInMemoryStorage) -> None:
@@ -49,5 +52,16 @@ class InMemoryExecutor:
         spec.loader.exec_module(module)
         worker_storage = InMemoryWorkerStorage(self.storage)
         module.worker.storage = worker_storage
-        module.worker.functions[call_args.function_name](call_args)
+        with span(
+            "call",
+            "worker",
+            loc=call_args.done_path.parent.name,
+            function=f"{launcher_name}.{call_args.function_name}",
+        ):
+            module.worker.functions[call_args.function_name](call_args)
         self.storage.touch(call_args.done_path)
+        for path in call_args.fused:
+            self.run(launcher_name, path)
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        return True
@@ -1,6 +1,11 @@
 from pathlib import Path
 
-from tierkreis.controller.executor.protocol import ControllerExecutor
+from tierkreis.controller.executor.protocol import (
+    ArrayExecutor,
+    ControllerExecutor,
+    FusingExecutor,
+    PollingExecutor,
+)
 from tierkreis.exceptions import TierkreisError
 
 
@@ -20,16 +25,39 @@ class MultipleExecutor:
         self.executors = executors
         self.assignments = assignments
 
-    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+    def executor_for(self, launcher_name: str) -> ControllerExecutor:
+        """The executor that runs the calls to `launcher_name`."""
         executor_name = self.assignments.get(launcher_name, None)
         # If there is no assignment for the worker, use the default.
         if executor_name is None:
-            return self.default.run(launcher_name, worker_call_args_path)
+            return self.default
 
         executor = self.executors.get(executor_name)
         if executor is None:
             raise TierkreisError(
                 f"{launcher_name} is assigned to non-existent executor name: {executor_name}."
             )
+        return executor
 
-        return executor.run(launcher_name, worker_call_args_path)
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        return self.executor_for(launcher_name).run(
+            launcher_name, worker_call_args_path
+        )
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        executor = self.executor_for(launcher_name)
+        if isinstance(executor, ArrayExecutor):
+            return executor.run_array(launcher_name, worker_call_args_paths)
+        for worker_call_args_path in worker_call_args_paths:
+            executor.run(launcher_name, worker_call_args_path)
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        executor = self.executor_for(launcher_name)
+        return isinstance(executor, FusingExecutor) and executor.runs_fused(
+            launcher_name
+        )
+
+    def poll(self) -> None:
+        for executor in [self.default, *self.executors.values()]:
+            if isinstance(executor, PollingExecutor):
+                executor.poll()
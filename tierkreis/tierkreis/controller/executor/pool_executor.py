@@ -0,0 +1,156 @@
+import logging
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import IO
+
+from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.exceptions import TierkreisError
+
+logger = logging.getLogger(__name__)
+
+
+class _WorkerProcess:
+    """A worker started with `--serve` that runs one call at a time."""
+
+    def __init__(self, args: list[str], cwd: Path, env: dict[str, str], log: IO[str]):
+        self.proc = subprocess.Popen(
+            args,
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=log,
+            text=True,
+            bufsize=1,
+            start_new_session=True,
+        )
+
+    def call(self, worker_call_args_path: Path) -> bool:
+        """Returns False if the process exited before finishing the call."""
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        try:
+            self.proc.stdin.write(f"{worker_call_args_path}\n")
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            return False
+        return self.proc.stdout.readline().strip() == str(worker_call_args_path)
+
+    def close(self) -> None:
+        if self.proc.stdin is not None:
+            self.proc.stdin.close()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class WorkerPoolExecutor:
+    """Keeps warm worker processes per launcher and sends them the calls.
+
+    Each launcher gets up to `pool_size` processes running
+    `uv run main.py --serve` in the launcher directory.
+    The worker call args paths are written to their stdin one per line
+    and the workers echo them back once the call has finished,
+    so interpreter startup and imports are paid once per process rather than per node.
+    Processes are started when they are first needed and restarted if they exit,
+    in which case the node they were running is marked as errored.
+
+    Requires workers that hand their arguments to
+    :py:meth:`tierkreis.worker.worker.Worker.app`.
+
+    Implements: :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`
+    """
+
+    def __init__(
+        self,
+        registry_path: Path,
+        logs_path: Path,
+        pool_size: int = 1,
+        env: dict[str, str] | None = None,
+        uv_path: str | None = None,
+    ) -> None:
+        self.launchers_path = registry_path
+        self.logs_path = logs_path
+        self.pool_size = pool_size
+        self.env = env or {}
+        self.uv_path = uv_path
+        self._queues: dict[str, queue.Queue[Path | None]] = {}
+        self._threads: list[threading.Thread] = []
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        if launcher_name not in self._queues:
+            self._start_pool(launcher_name)
+        self._queues[launcher_name].put(worker_call_args_path)
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        return True
+
+    def _start_pool(self, launcher_name: str) -> None:
+        uv_path = self.uv_path or shutil.which("uv")
+        if uv_path is None:
+            raise TierkreisError("uv is required to use the WorkerPoolExecutor")
+
+        worker_path = self.launchers_path / launcher_name
+        if not worker_path.is_dir():
+            raise TierkreisError(f"Launcher not found: {launcher_name}.")
+
+        env = os.environ.copy() | self.env.copy()
+        if "VIRTUAL_ENVIRONMENT" not in env:
+            env["VIRTUAL_ENVIRONMENT"] = ""
+        if TKR_DIR_KEY not in env:
+            env[TKR_DIR_KEY] = str(self.logs_path.parent.parent)
+
+        tasks: queue.Queue[Path | None] = queue.Queue()
+        self._queues[launcher_name] = tasks
+        args = [uv_path, "run", "main.py", "--serve"]
+        for _ in range(self.pool_size):
+            thread = threading.Thread(
+                target=self._serve,
+                args=(launcher_name, tasks, args, worker_path, env),
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve(
+        self,
+        launcher_name: str,
+        tasks: queue.Queue[Path | None],
+        args: list[str],
+        cwd: Path,
+        env: dict[str, str],
+    ) -> None:
+        process: _WorkerProcess | None = None
+        with open(self.logs_path, "a") as log:
+            while (worker_call_args_path := tasks.get()) is not None:
+                if process is None:
+                    logger.info("START %s pool process", launcher_name)
+                    process = _WorkerProcess(args, cwd, env, log)
+
+                logger.info("RUN %s %s", launcher_name, worker_call_args_path)
+                if not process.call(worker_call_args_path):
+                    logger.error(
+                        "%s exited while running %s",
+                        launcher_name,
+                        worker_call_args_path,
+                    )
+                    tkr_dir = Path(env[TKR_DIR_KEY])
+                    (tkr_dir / worker_call_args_path.parent / "_error").touch()
+                    process.close()
+                    process = None
+
+            if process is not None:
+                process.close()
+
+    def close(self) -> None:
+        """Stop the worker processes once they have finished the submitted calls."""
+        for tasks in self._queues.values():
+            [tasks.put(None) for _ in range(self.pool_size)]
+        for thread in self._threads:
+            thread.join()
+        self._queues = {}
+        self._threads = []
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Protocol
+from typing import Protocol, runtime_checkable
 
 
 class ControllerExecutor(Protocol):
@@ -23,3 +23,53 @@ class ControllerExecutor(Protocol):
         """
 
     ...
+
+
+@runtime_checkable
+class ArrayExecutor(ControllerExecutor, Protocol):
+    """An executor that can start several calls of the same launcher at once.
+
+    The controller hands the function nodes started in the same tick
+    to `run_array` grouped by launcher, e.g. the elements of a map,
+    so that they can be submitted as a single job array."""
+
+    def run_array(self, launcher_name: str, worker_call_args_paths: list[Path]) -> None:
+        """Run the nodes defined by the worker call args paths.
+
+        :param launcher_name: module description of launcher to run.
+        :type launcher_name: str
+        :param worker_call_args_paths: Locations of the worker call args.
+        :type worker_call_args_paths: list[Path]
+        """
+        ...
+
+
+@runtime_checkable
+class PollingExecutor(ControllerExecutor, Protocol):
+    """An executor that checks on the calls it started.
+
+    The controller calls `poll` once per tick, e.g. to mark the nodes
+    of batch jobs that were killed by the scheduler as errored."""
+
+    def poll(self) -> None:
+        """Check on the running calls; called once per controller tick."""
+        ...
+
+
+@runtime_checkable
+class FusingExecutor(ControllerExecutor, Protocol):
+    """An executor whose workers run the calls fused to a call.
+
+    Only :py:meth:`tierkreis.worker.worker.Worker.run` runs the calls in
+    :py:attr:`tierkreis.controller.data.location.WorkerCallArgs.fused`;
+    other launchers, e.g. shell scripts, run the first call only.
+    The controller therefore only fuses calls, for chunked maps and fused chains,
+    for launchers that `runs_fused` reports."""
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        """Whether the launcher runs the fused calls of a call.
+
+        :param launcher_name: module description of launcher to run.
+        :type launcher_name: str
+        """
+        ...
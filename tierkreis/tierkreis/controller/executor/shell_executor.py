@@ -4,6 +4,7 @@ import subprocess
 from pathlib import Path
 
 from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.controller.data.compression import decompress
 from tierkreis.controller.data.location import WorkerCallArgs
 from tierkreis.exceptions import TierkreisError
 
@@ -80,27 +81,31 @@ class ShellExecutor:
     def _create_env(
         self, call_args: WorkerCallArgs, base_dir: Path, export_values: bool
     ) -> dict[str, str]:
-        env = {
-            "checkpoints_directory": str(base_dir),
-            "function_name": str(base_dir / call_args.function_name),
-            "done_path": str(base_dir / call_args.done_path),
-            "error_path": str(base_dir / call_args.error_path),
-            "output_dir": str(base_dir / call_args.output_dir),
-        }
-        if call_args.logs_path is not None:
-            env["logs_path"] = str(base_dir / call_args.logs_path)
-        else:
-            env["logs_path"] = str(self.logs_path)
-        env |= {
-            f"output_{k}_file": str(base_dir / v) for k, v in call_args.outputs.items()
-        }
-        env |= {
-            f"input_{k}_file": str(base_dir / v) for k, v in call_args.inputs.items()
-        }
+        env = worker_env(call_args, base_dir, self.logs_path)
         if not export_values:
             return env
         values = {}
         for k, v in call_args.inputs.items():
-            with open(v) as fh:
-                values[f"input_{k}_value"] = fh.read()
+            with open(v, "rb") as fh:
+                values[f"input_{k}_value"] = decompress(fh.read()).decode()
         return env
+
+
+def worker_env(
+    call_args: WorkerCallArgs, base_dir: Path, logs_path: Path
+) -> dict[str, str]:
+    """The paths of the call as environment variables for shell workers."""
+    env = {
+        "checkpoints_directory": str(base_dir),
+        "function_name": str(base_dir / call_args.function_name),
+        "done_path": str(base_dir / call_args.done_path),
+        "error_path": str(base_dir / call_args.error_path),
+        "output_dir": str(base_dir / call_args.output_dir),
+    }
+    if call_args.logs_path is not None:
+        env["logs_path"] = str(base_dir / call_args.logs_path)
+    else:
+        env["logs_path"] = str(logs_path)
+    env |= {f"output_{k}_file": str(base_dir / v) for k, v in call_args.outputs.items()}
+    env |= {f"input_{k}_file": str(base_dir / v) for k, v in call_args.inputs.items()}
+    return env
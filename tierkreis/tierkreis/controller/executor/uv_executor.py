@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 class UvExecutor:
     """Executes workers in an UV python environment.
 
-    Implements: :py:class:`tierkreis.controller.executor.protocol.ControllerExecutor`
+    Implements: :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`
     """
 
     def __init__(
@@ -71,3 +71,6 @@ class UvExecutor:
                     f"({uv_path} run main.py {worker_call_args_path} || touch {_error_path}) &".encode(),
                     timeout=10,
                 )
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        return True
@@ -0,0 +1,112 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from tierkreis.controller.data.location import Loc
+from tierkreis.controller.executor.multiple import MultipleExecutor
+from tierkreis.controller.executor.protocol import ControllerExecutor
+from tierkreis.controller.start import NodeRunData
+from tierkreis.controller.storage.protocol import ControllerStorage
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class ConcurrencyLimits:
+    """Caps on the number of function nodes running at the same time.
+
+    :param max_running: Cap on all function nodes.
+    :param launchers: Caps per launcher name, e.g. `{"builtins": 8}`.
+    :param executors: Caps per executor name of a
+        :py:class:`tierkreis.controller.executor.multiple.MultipleExecutor`,
+        shared by all the launchers assigned to that executor.
+    """
+
+    max_running: int | None = None
+    launchers: dict[str, int] = field(default_factory=dict)
+    executors: dict[str, int] = field(default_factory=dict)
+
+
+def launcher_name(function_name: str) -> str:
+    return ".".join(function_name.split(".")[:-1])
+
+
+class Scheduler:
+    """Decides which of the ready nodes the controller starts in a tick.
+
+    Function nodes are only started while the caps in `limits` allow.
+    The others stay pending; the walker reports them as ready again
+    and they are admitted once running nodes have finished or errored.
+    All other node types are started straight away.
+    """
+
+    def __init__(
+        self,
+        storage: ControllerStorage,
+        executor: ControllerExecutor,
+        limits: ConcurrencyLimits,
+    ) -> None:
+        self.storage = storage
+        self.limits = limits
+        self.assignments: dict[str, str] = {}
+        if isinstance(executor, MultipleExecutor):
+            self.assignments = executor.assignments
+        self._launchers: dict[Loc, str] = {}
+
+    def _caps(self, launcher: str) -> list[tuple[tuple[str, str], int]]:
+        """The counters that nodes of the launcher count towards, with their caps."""
+        caps: list[tuple[tuple[str, str], int]] = []
+        if self.limits.max_running is not None:
+            caps.append((("all", ""), self.limits.max_running))
+        if (cap := self.limits.launchers.get(launcher)) is not None:
+            caps.append((("launcher", launcher), cap))
+        executor_name = self.assignments.get(launcher)
+        if executor_name is not None:
+            if (cap := self.limits.executors.get(executor_name)) is not None:
+                caps.append((("executor", executor_name), cap))
+        return caps
+
+    def _launcher(self, loc: Loc) -> str:
+        if loc not in self._launchers:
+            # Started before this scheduler existed, e.g. when resuming.
+            node = self.storage.read_node_def(loc)
+            name = node.function_name if node.type == "function" else ""
+            self._launchers[loc] = launcher_name(name)
+        return self._launchers[loc]
+
+    def admit(
+        self, inputs_ready: list[NodeRunData], running: list[Loc]
+    ) -> tuple[list[NodeRunData], list[NodeRunData]]:
+        """Split the ready nodes into the ones to start now and the pending ones.
+
+        `running` are the function nodes that have started but not finished."""
+        running_set = set(running)
+        self._launchers = {k: v for k, v in self._launchers.items() if k in running_set}
+        counts = Counter(
+            key for loc in running for key, _ in self._caps(self._launcher(loc))
+        )
+
+        admitted: list[NodeRunData] = []
+        pending: list[NodeRunData] = []
+        for node_run_data in inputs_ready:
+            node = node_run_data.node
+            if (
+                node.type != "function"
+                or node_run_data.node_location in self._launchers
+            ):
+                admitted.append(node_run_data)
+                continue
+
+            launcher = launcher_name(node.function_name)
+            caps = self._caps(launcher)
+            if any(counts[key] >= cap for key, cap in caps):
+                pending.append(node_run_data)
+                continue
+
+            counts.update(key for key, _ in caps)
+            self._launchers[node_run_data.node_location] = launcher
+            admitted.append(node_run_data)
+
+        if pending:
+            logger.debug(f"{len(pending)} nodes pending, {len(running)} running.")
+        return admitted, pending
@@ -1,21 +1,36 @@
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import dataclass, field
+import json
 from logging import getLogger
 import logging
 from pathlib import Path
 import subprocess
 import sys
 
-from tierkreis.controller.data.core import PortID
-from tierkreis.controller.data.types import bytes_from_ptype, ptype_from_bytes
+from tierkreis.controller.cache import ResultCache
+from tierkreis.controller.data.core import NodeIndex, PortID
+from tierkreis.controller.data.types import bytes_from_ptype
+from tierkreis.controller.executor.builtins_executor import BuiltinsExecutor
 from tierkreis.controller.executor.in_memory_executor import InMemoryExecutor
+from tierkreis.controller.executor.multiple import MultipleExecutor
 from tierkreis.controller.storage.adjacency import outputs_iter
 from typing_extensions import assert_never
 
 from tierkreis.consts import PACKAGE_PATH
-from tierkreis.controller.data.graph import Eval, GraphData, NodeDef
-from tierkreis.controller.data.location import Loc, OutputLoc
-from tierkreis.controller.executor.protocol import ControllerExecutor
+from tierkreis.controller.data.graph import (
+    Eval,
+    GraphData,
+    NodeDef,
+    graph_from_bytes,
+)
+from tierkreis.controller.data.location import Loc, OutputLoc, WorkerCallArgs
+from tierkreis.controller.executor.protocol import (
+    ArrayExecutor,
+    ControllerExecutor,
+    FusingExecutor,
+)
 from tierkreis.controller.storage.protocol import ControllerStorage
+from tierkreis.controller.trace import span
 from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
 from tierkreis.labels import Labels
 from tierkreis.exceptions import TierkreisError
@@ -28,19 +43,95 @@ class NodeRunData:
     node_location: Loc
     node: NodeDef
     output_list: list[PortID]
+    fused: list["NodeRunData"] = field(default_factory=list)
+    """Function nodes started with this one and run in the same invocation."""
+
+
+def _runs_array(executor: ControllerExecutor | None, launcher_name: str) -> bool:
+    """Whether the executor that ends up running the launcher is an `ArrayExecutor`."""
+    if isinstance(executor, BuiltinsExecutor):
+        if launcher_name == "builtins":
+            return False
+        return _runs_array(executor.executor, launcher_name)
+    if isinstance(executor, MultipleExecutor):
+        return _runs_array(executor.executor_for(launcher_name), launcher_name)
+    return isinstance(executor, ArrayExecutor)
+
+
+class _ArrayCalls:
+    """Collects the calls started in a tick to hand them to an `ArrayExecutor`.
+
+    Calls that the executor passes on to an executor without job arrays,
+    e.g. builtins or launchers a `MultipleExecutor` assigns elsewhere,
+    are launched directly. A group that fails to launch marks its nodes
+    as errored without stopping the other groups."""
+
+    def __init__(self, storage: ControllerStorage, executor: ArrayExecutor) -> None:
+        self.storage = storage
+        self.executor = executor
+        self.calls: defaultdict[str, list[Path]] = defaultdict(list)
+
+    def run(self, launcher_name: str, worker_call_args_path: Path) -> None:
+        if not _runs_array(self.executor, launcher_name):
+            return self.executor.run(launcher_name, worker_call_args_path)
+        self.calls[launcher_name].append(worker_call_args_path)
+
+    def runs_fused(self, launcher_name: str) -> bool:
+        return isinstance(self.executor, FusingExecutor) and self.executor.runs_fused(
+            launcher_name
+        )
+
+    def flush(self) -> None:
+        for launcher_name, worker_call_args_paths in self.calls.items():
+            with span(
+                "launch_array",
+                "executor",
+                launcher=launcher_name,
+                calls=len(worker_call_args_paths),
+            ):
+                try:
+                    self.executor.run_array(launcher_name, worker_call_args_paths)
+                except Exception as exc:
+                    logger.error(f"Could not launch {launcher_name}: {exc}")
+                    self._mark_failed(worker_call_args_paths, f"{exc}")
+        self.calls.clear()
+
+    def _mark_failed(self, worker_call_args_paths: list[Path], error: str) -> None:
+        for worker_call_args_path in worker_call_args_paths:
+            call_args = WorkerCallArgs(
+                **json.loads(
+                    self.storage.read(self.storage.tkr_dir / worker_call_args_path)
+                )
+            )
+            self.storage.write(
+                self.storage.tkr_dir / call_args.error_path, error.encode()
+            )
 
 
 def start_nodes(
     storage: ControllerStorage,
     executor: ControllerExecutor,
     node_run_data: list[NodeRunData],
+    cache: ResultCache | None = None,
 ) -> None:
+    """Start the nodes in a single storage batch.
+
+    Workers are launched once the batch has been written.
+    An `ArrayExecutor` gets the function nodes grouped by launcher."""
+    array_calls = None
+    if isinstance(executor, ArrayExecutor):
+        array_calls = _ArrayCalls(storage, executor)
+        executor = array_calls
+
     started_locs: set[Loc] = set()
-    for node_run_datum in node_run_data:
-        if node_run_datum.node_location in started_locs:
-            continue
-        start(storage, executor, node_run_datum)
-        started_locs.add(node_run_datum.node_location)
+    with storage.batch():
+        for node_run_datum in node_run_data:
+            if node_run_datum.node_location in started_locs:
+                continue
+            start(storage, executor, node_run_datum, cache)
+            started_locs.add(node_run_datum.node_location)
+        if array_calls is not None:
+            storage.after_batch(array_calls.flush)
 
 
 def run_builtin(def_path: Path, logs_path: Path) -> None:
@@ -68,7 +159,23 @@ def run_builtin(def_path: Path, logs_path: Path) -> None:
 
 
 def start(
-    storage: ControllerStorage, executor: ControllerExecutor, node_run_data: NodeRunData
+    storage: ControllerStorage,
+    executor: ControllerExecutor,
+    node_run_data: NodeRunData,
+    cache: ResultCache | None = None,
+) -> None:
+    node = node_run_data.node
+    function = node.function_name if node.type == "function" else None
+    loc = node_run_data.node_location
+    with span("start", "controller", loc=loc, type=node.type, function=function):
+        _start(storage, executor, node_run_data, cache)
+
+
+def _start(
+    storage: ControllerStorage,
+    executor: ControllerExecutor,
+    node_run_data: NodeRunData,
+    cache: ResultCache | None = None,
 ) -> None:
     node_location = node_run_data.node_location
     node = node_run_data.node
@@ -87,19 +194,37 @@ def start(
         name = node.function_name
         launcher_name = ".".join(name.split(".")[:-1])
         name = name.split(".")[-1]
+        cached = False
+        if cache is not None and cache.may_cache(node.function_name):
+            key = cache.key(storage, node.function_name, ins)
+            cached = cache.restore(
+                storage, node_location, node.function_name, key, output_list
+            )
+        # The rest of a cached chain, or of a chain on a launcher that does not
+        # run fused calls, is started on its own once its inputs are ready.
+        fused = (
+            [_start_fused(storage, x) for x in node_run_data.fused]
+            if not cached and _runs_fused(storage, executor, launcher_name)
+            else []
+        )
         call_args_path = storage.write_worker_call_args(
-            node_location, name, ins, output_list
+            node_location, name, ins, output_list, fused
         )
+        if cached:
+            return
         logger.debug(f"Executing {(str(node_location), name, ins, output_list)}")
 
-        if isinstance(storage, ControllerInMemoryStorage) and isinstance(
-            executor, InMemoryExecutor
-        ):
-            executor.run(launcher_name, call_args_path)
-        elif launcher_name == "builtins":
-            run_builtin(call_args_path, storage.logs_path)
-        else:
-            executor.run(launcher_name, call_args_path)
+        in_process = _in_process(storage, executor)
+        logs_path = storage.logs_path
+
+        def launch() -> None:
+            with span("launch", "executor", loc=node_location, launcher=launcher_name):
+                if launcher_name == "builtins" and not in_process:
+                    run_builtin(call_args_path, logs_path)
+                else:
+                    executor.run(launcher_name, call_args_path)
+
+        storage.after_batch(launch)
 
     elif node.type == "input":
         input_loc = parent.N(-1)
@@ -119,7 +244,7 @@ def start(
 
     elif node.type == "eval":
         message = storage.read_output(parent.N(node.graph[0]), node.graph[1])
-        g = ptype_from_bytes(message, GraphData)
+        g = graph_from_bytes(message)
         ins["body"] = (parent.N(node.graph[0]), node.graph[1])
         ins.update(g.fixed_inputs)
 
@@ -140,6 +265,7 @@ def start(
                 Eval((-1, "body"), {k: (-1, k) for k, _ in ins.items()}, node.outputs),
                 output_list,
             ),
+            cache,
         )
 
     elif node.type == "map":
@@ -162,6 +288,12 @@ def start(
             storage.write_node_def(
                 node_location.M(idx), Eval((-1, "body"), node.inputs, node.outputs)
             )
+        if node.chunk_size is not None and map_eles:
+            body = graph_from_bytes(
+                storage.read_output(parent.N(node.body[0]), node.body[1])
+            )
+            elements = [node_location.M(idx) for idx, _ in map_eles]
+            _start_chunks(storage, executor, elements, body, node.chunk_size, cache)
 
     elif node.type == "ifelse":
         pass
@@ -172,6 +304,94 @@ def start(
         assert_never(node)
 
 
+def _in_process(storage: ControllerStorage, executor: ControllerExecutor) -> bool:
+    """Whether builtins are run by the executor in the controller process,
+    rather than by starting the builtins worker."""
+    if isinstance(executor, _ArrayCalls):
+        executor = executor.executor
+    return isinstance(executor, BuiltinsExecutor) or (
+        isinstance(storage, ControllerInMemoryStorage)
+        and isinstance(executor, InMemoryExecutor)
+    )
+
+
+def _runs_fused(
+    storage: ControllerStorage, executor: ControllerExecutor, launcher_name: str
+) -> bool:
+    """Whether the calls fused to a call of the launcher are run,
+    see :py:class:`tierkreis.controller.executor.protocol.FusingExecutor`."""
+    if launcher_name == "builtins" and not _in_process(storage, executor):
+        return True  # The builtins worker is started by `run_builtin`.
+    return isinstance(executor, FusingExecutor) and executor.runs_fused(launcher_name)
+
+
+def _single_function(g: GraphData) -> NodeIndex | None:
+    """The function node of a graph that has no other nodes besides its inputs,
+    constants and output."""
+    funcs = [i for i, n in enumerate(g.nodes) if n.type == "function"]
+    others = [n for n in g.nodes if n.type not in ("function", "input", "const")]
+    if len(funcs) != 1 or len(others) != 1:
+        return None
+    return funcs[0]
+
+
+def _start_chunks(
+    storage: ControllerStorage,
+    executor: ControllerExecutor,
+    elements: list[Loc],
+    body: GraphData,
+    chunk_size: int,
+    cache: ResultCache | None,
+) -> None:
+    """Start the map elements in calls of `chunk_size` elements each.
+
+    If the body is a single function, the calls for a chunk are fused into one
+    worker invocation. Other bodies, and functions of launchers that do not run
+    fused calls, are left to the walk, element by element."""
+    func_idx = _single_function(body)
+    if func_idx is None:
+        return
+
+    func = body.nodes[func_idx]
+    launcher_name = ".".join(func.function_name.split(".")[:-1])
+    if not _runs_fused(storage, executor, launcher_name):
+        logger.warning(
+            f"Not chunking map over {func.function_name}:"
+            f" {launcher_name} does not run fused calls."
+        )
+        return
+    calls: list[NodeRunData] = []
+    for element in elements:
+        for i, n in enumerate(body.nodes):
+            if n.type in ("input", "const"):
+                start(storage, executor, NodeRunData(element.N(i), n, []), cache)
+        calls.append(NodeRunData(element.N(func_idx), func, list(func.outputs)))
+
+    for i in range(0, len(calls), chunk_size):
+        head, *rest = calls[i : i + chunk_size]
+        head.fused = rest
+        start(storage, executor, head, cache)
+
+
+def _start_fused(storage: ControllerStorage, node_run_data: NodeRunData) -> Path:
+    """Write the call args of a function node run by the worker of an earlier node."""
+    node_location = node_run_data.node_location
+    node = node_run_data.node
+    parent = node_location.parent()
+    if node.type != "function" or parent is None:
+        raise TierkreisError(f"Cannot fuse {node.type} node at {node_location}.")
+
+    function = node.function_name
+    with span(
+        "start", "controller", loc=node_location, type=node.type, function=function
+    ):
+        storage.write_node_def(node_location, node)
+        ins = {k: (parent.N(idx), p) for k, (idx, p) in node.inputs.items()}
+        return storage.write_worker_call_args(
+            node_location, function.split(".")[-1], ins, node_run_data.output_list
+        )
+
+
 def pipe_inputs_to_output_location(
     storage: ControllerStorage,
     output_loc: Loc,
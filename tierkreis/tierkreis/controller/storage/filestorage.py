@@ -1,14 +1,18 @@
+import logging
 import os
 import shutil
 from pathlib import Path
-from time import time_ns
+from time import sleep, time_ns
 from uuid import UUID
 
+from tierkreis.controller.storage.inotify import NodeDirectoryWatcher
 from tierkreis.controller.storage.protocol import (
     StorageEntryMetadata,
     ControllerStorage,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class ControllerFileStorage(ControllerStorage):
     def __init__(
@@ -21,16 +25,44 @@ class ControllerFileStorage(ControllerStorage):
         self.tkr_dir = tierkreis_directory
         self.workflow_id = workflow_id
         self.name = name
+        self._watcher: NodeDirectoryWatcher | None = None
+        self._watcher_failed = False
+        self._batch_dirs: set[Path] | None = None
         if do_cleanup:
             self.delete(self.workflow_dir)
 
+    def _begin_batch(self) -> None:
+        self._batch_dirs = set()
+
+    def _end_batch(self, error: BaseException | None) -> bool:
+        self._batch_dirs = None
+        return True
+
+    def _ensure_dir(self, path: Path) -> None:
+        """Create the directory, once per batch."""
+        if self._batch_dirs is not None and path in self._batch_dirs:
+            return
+        path.mkdir(parents=True, exist_ok=True)
+        if self._batch_dirs is not None:
+            self._batch_dirs.add(path)
+
     def delete(self, path: Path) -> None:
+        if self._batch_dirs is not None:
+            self._batch_dirs.clear()
         uid = os.getuid()
         tmp_dir = Path(f"/tmp/{uid}/tierkreis/archive/{self.workflow_id}/{time_ns()}")
         tmp_dir.mkdir(parents=True, exist_ok=True)
         if self.exists(path):
             shutil.move(path, tmp_dir)
 
+    def free(self, path: Path) -> None:
+        if self._batch_dirs is not None:
+            self._batch_dirs.clear()
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
     def exists(self, path: Path) -> bool:
         return path.exists()
 
@@ -38,13 +70,13 @@ class ControllerFileStorage(ControllerStorage):
         return [sub_path for sub_path in path.iterdir()]
 
     def link(self, src: Path, dst: Path) -> None:
-        dst.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(dst.parent)
         if dst.exists() and dst.resolve() == src:
             return  # We have already linked correctly
         os.link(src, dst)
 
     def mkdir(self, path: Path) -> None:
-        return path.mkdir(parents=True, exist_ok=True)
+        return self._ensure_dir(path)
 
     def read(self, path: Path) -> bytes:
         with open(path, "rb") as fh:
@@ -52,16 +84,42 @@ class ControllerFileStorage(ControllerStorage):
 
     def touch(self, path: Path, is_dir: bool = False) -> None:
         if is_dir:
-            path.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(path)
             return
 
-        path.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(path.parent)
         path.touch()
 
     def stat(self, path: Path) -> StorageEntryMetadata:
         return StorageEntryMetadata(path.stat().st_mtime)
 
     def write(self, path: Path, value: bytes) -> None:
-        path.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(path.parent)
         with open(path, "wb+") as fh:
             fh.write(value)
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Use inotify to wait for `_done` and `_error` markers.
+
+        Falls back to sleeping if inotify is unavailable.
+        Writes made from other hosts (e.g. on a network filesystem)
+        are not reported, so `timeout` should remain finite."""
+        if self._watcher is None and not self._watcher_failed:
+            try:
+                self._watcher = NodeDirectoryWatcher(self.workflow_dir)
+            except OSError as e:
+                logger.warning(f"Could not watch {self.workflow_dir}, polling: {e}")
+                self._watcher_failed = True
+
+        if self._watcher is None:
+            sleep(timeout)
+            return True
+
+        try:
+            return len(self._watcher.wait(timeout)) > 0
+        except OSError as e:
+            logger.warning(f"Stopped watching {self.workflow_dir}, polling: {e}")
+            self._watcher.close()
+            self._watcher = None
+            self._watcher_failed = True
+            return True
@@ -91,6 +91,7 @@ class GraphDataStorage(ControllerStorage):
         function_name: str,
         inputs: dict[PortID, OutputLoc],
         output_list: list[PortID],
+        fused: list[Path] | None = None,
     ) -> Path:
         raise NotImplementedError("GraphDataStorage is read only storage.")
 
@@ -1,4 +1,5 @@
 from pathlib import Path
+from threading import Event
 from uuid import UUID
 from time import time
 
@@ -19,6 +20,11 @@ class InMemoryFileData:
 
 
 class ControllerInMemoryStorage(ControllerStorage):
+    """Keeps the storage entries in a dictionary.
+
+    Next to the entries we index the children of every directory,
+    so that `exists` and `list_subpaths` do not scan all the entries."""
+
     def __init__(
         self,
         workflow_id: UUID,
@@ -30,27 +36,43 @@ class ControllerInMemoryStorage(ControllerStorage):
         self.name = name
 
         self.files: dict[Path, InMemoryFileData] = {}
+        self._children: dict[Path, set[Path]] = {}
+        self._changed = Event()
+
+    def _add(self, path: Path, data: InMemoryFileData) -> None:
+        self.files[path] = data
+        child, parent = path, path.parent
+        while child != parent:
+            siblings = self._children.setdefault(parent, set())
+            if child in siblings:
+                break
+            siblings.add(child)
+            child, parent = parent, parent.parent
 
     def delete(self, path: Path) -> None:
-        self.files = {}
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            self.files.pop(current, None)
+            stack.extend(self._children.pop(current, ()))
+
+        child, parent = path, path.parent
+        while child != parent and parent in self._children:
+            siblings = self._children[parent]
+            siblings.discard(child)
+            if siblings or parent in self.files:
+                break
+            del self._children[parent]
+            child, parent = parent, parent.parent
 
     def exists(self, path: Path) -> bool:
-        return path in list(self.files.keys())
+        return path in self.files or path in self._children
 
     def list_subpaths(self, path: Path) -> list[Path]:
-        if path == self.workflow_dir:
-            nodes = set(
-                [
-                    Path("/".join(str(x).split("/")[:2]))
-                    for x in self.files.keys()
-                    if str(x).startswith(str(path) + "/")
-                ]
-            )
-            return list(nodes)
-        return [x for x in self.files.keys() if str(x).startswith(str(path) + "/")]
+        return list(self._children.get(path, ()))
 
     def link(self, src: Path, dst: Path) -> None:
-        self.files[dst] = self.files[src]
+        self._add(dst, self.files[src])
 
     def mkdir(self, path: Path) -> None:
         return
@@ -59,10 +81,21 @@ class ControllerInMemoryStorage(ControllerStorage):
         return self.files[path].value
 
     def touch(self, path: Path, is_dir: bool = False) -> None:
-        self.files[path] = InMemoryFileData(b"")
+        self._add(path, InMemoryFileData(b""))
+        self._notify(path)
 
     def stat(self, path: Path) -> StorageEntryMetadata:
         return self.files[path].stats
 
     def write(self, path: Path, value: bytes) -> None:
-        self.files[path] = InMemoryFileData(value)
+        self._add(path, InMemoryFileData(value))
+        self._notify(path)
+
+    def _notify(self, path: Path) -> None:
+        if path.name in ("_done", "_error"):
+            self._changed.set()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        return changed
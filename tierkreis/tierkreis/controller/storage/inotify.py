@@ -0,0 +1,118 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT_HEADER = struct.Struct("iIII")
+_NODE_MASK = IN_CREATE | IN_MOVED_TO | IN_ATTRIB | IN_CLOSE_WRITE
+_ROOT_MASK = IN_CREATE | IN_MOVED_TO | IN_ONLYDIR
+MARKER_FILES = ("_done", "_error")
+
+
+def _load_libc() -> ctypes.CDLL:
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("inotify is not available on this platform.")
+    return libc
+
+
+class NodeDirectoryWatcher:
+    """Watches the node directories of a workflow for `_done` and `_error` markers.
+
+    Node directories are direct children of the workflow directory,
+    so one watch on the workflow directory picks up newly started nodes
+    and one watch per node directory picks up their completion.
+
+    Raises `OSError` if inotify is unavailable.
+    """
+
+    def __init__(self, workflow_dir: Path) -> None:
+        self.workflow_dir = workflow_dir
+        self._libc = _load_libc()
+        self._fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed.")
+        self._dirs: dict[int, str] = {}
+        self._pending: set[str] = set()
+
+        workflow_dir.mkdir(parents=True, exist_ok=True)
+        self._add_watch(workflow_dir, _ROOT_MASK)
+        for sub_path in workflow_dir.iterdir():
+            if sub_path.is_dir():
+                self._watch_node_dir(sub_path.name)
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Could not watch {path}.")
+        return wd
+
+    def _watch_node_dir(self, name: str) -> None:
+        node_dir = self.workflow_dir / name
+        try:
+            wd = self._add_watch(node_dir, _NODE_MASK | IN_ONLYDIR)
+        except FileNotFoundError:
+            return
+        self._dirs[wd] = name
+        # The marker may have been written before the watch existed.
+        if any((node_dir / marker).exists() for marker in MARKER_FILES):
+            self._pending.add(name)
+
+    def _read_events(self) -> None:
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            self._parse_events(buffer)
+
+    def _parse_events(self, buffer: bytes) -> None:
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0").decode()
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._pending.add("")
+            elif wd not in self._dirs:
+                if mask & IN_ISDIR:
+                    self._watch_node_dir(name)
+            elif name in MARKER_FILES:
+                self._pending.add(self._dirs[wd])
+
+    def wait(self, timeout: float) -> set[str]:
+        """Wait for at most `timeout` seconds for node directories to change.
+
+        Returns the names of the node directories in which a marker appeared.
+        An empty string in the result means that events were dropped by the kernel.
+        """
+        self._read_events()
+        if not self._pending:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if ready:
+                self._read_events()
+
+        changed, self._pending = self._pending, set()
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
@@ -1,11 +1,19 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime
 import json
 import logging
 from pathlib import Path
-from typing import Any, assert_never
+from time import sleep
+from typing import Any, Callable, Iterator, assert_never
 from uuid import UUID
+from tierkreis.consts import CACHEABLE_MARKER
+from tierkreis.controller.data.compression import (
+    CompressionStats,
+    compress_output,
+    decompress,
+)
 from tierkreis.controller.data.graph import NodeDef, NodeDefModel
 from tierkreis.controller.data.location import Loc, OutputLoc, WorkerCallArgs
 from tierkreis.controller.data.core import PortID
@@ -37,6 +45,16 @@ class ControllerStorage(ABC):
     tkr_dir: Path
     workflow_id: UUID
     name: str | None
+    _batch_depth: int = 0
+    _compression_stats: CompressionStats | None = None
+
+    @property
+    def compression_stats(self) -> CompressionStats:
+        """Sizes of the outputs written through `write_output`,
+        see :py:mod:`tierkreis.controller.data.compression`."""
+        if self._compression_stats is None:
+            self._compression_stats = CompressionStats()
+        return self._compression_stats
 
     @abstractmethod
     def delete(self, path: Path) -> None:
@@ -81,6 +99,82 @@ class ControllerStorage(ABC):
     def write(self, path: Path, value: bytes) -> None:
         """Write the given bytes to the storage entry at the specified path."""
 
+    def free(self, path: Path) -> None:
+        """Remove the storage entry at the specified path to reclaim its space.
+
+        Unlike `delete` nothing needs to be kept for recovery.
+        Also remove any related data of the form \"{path}/**/*\"."""
+        self.delete(path)
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Block until a node may have finished or errored, or `timeout` seconds pass.
+
+        Returns True if a change was observed.
+        Storage implementations that cannot observe changes sleep for the whole timeout
+        and report a change, so that the controller falls back to polling."""
+        sleep(timeout)
+        return True
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the storage operations made inside the block.
+
+        Implementations may hold back or coalesce work until the outermost batch exits,
+        e.g. by committing a single transaction.
+        Entries written inside the batch can be read back before it exits,
+        but other processes may not see them until then.
+        Anything that depends on them being visible, such as launching a worker,
+        should be passed to `after_batch`.
+
+        Touches of parent `_metadata` entries are made once per batch.
+
+        If the block raises, implementations that can roll back the batch do so
+        and drop the calls passed to `after_batch`, so that nothing is left
+        started without being launched. Otherwise the entries written so far
+        are kept and the calls are still made before the exception propagates."""
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self._after_batch: list[Callable[[], None]] = []
+            self._touched_metadata: set[Loc] = set()
+            self._begin_batch()
+        error: BaseException | None = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                try:
+                    [self.touch(self._metadata_path(x)) for x in self._touched_metadata]
+                finally:
+                    kept = self._end_batch(error)
+                if kept:
+                    [fn() for fn in self._after_batch]
+
+    def _begin_batch(self) -> None:
+        """Called when the outermost batch is entered."""
+
+    def _end_batch(self, error: BaseException | None) -> bool:
+        """Called when the outermost batch exits, with the exception if it raised.
+
+        Returns False if the entries written in the batch were rolled back."""
+        return True
+
+    def after_batch(self, fn: Callable[[], None]) -> None:
+        """Call `fn` once the current batch has exited, or straight away if there is none."""
+        if self._batch_depth == 0:
+            fn()
+        else:
+            self._after_batch.append(fn)
+
+    def _touch_metadata(self, node_location: Loc) -> None:
+        if self._batch_depth == 0:
+            self.touch(self._metadata_path(node_location))
+        else:
+            self._touched_metadata.add(node_location)
+
     @property
     def workflow_dir(self) -> Path:
         return self.tkr_dir / str(self.workflow_id)
@@ -89,6 +183,10 @@ class ControllerStorage(ABC):
     def logs_path(self) -> Path:
         return self.workflow_dir / "logs"
 
+    @property
+    def trace_path(self) -> Path:
+        return self.workflow_dir / "trace"
+
     @property
     def debug_path(self) -> Path:
         return self.workflow_dir / "debug"
@@ -114,6 +212,9 @@ class ControllerStorage(ABC):
     def _error_path(self, node_location: Loc) -> Path:
         return self.workflow_dir / str(node_location) / "_error"
 
+    def _cacheable_path(self, node_location: Loc) -> Path:
+        return self.workflow_dir / str(node_location) / CACHEABLE_MARKER
+
     def _error_logs_path(self, node_location: Loc) -> Path:
         return self.workflow_dir / str(node_location) / "errors"
 
@@ -134,6 +235,7 @@ class ControllerStorage(ABC):
         function_name: str,
         inputs: dict[PortID, OutputLoc],
         output_list: list[PortID],
+        fused: list[Path] | None = None,
     ) -> Path:
         call_args_path = self._worker_call_args_path(node_location)
         node_definition = WorkerCallArgs(
@@ -150,12 +252,13 @@ class ControllerStorage(ABC):
             done_path=self._done_path(node_location).relative_to(self.tkr_dir),
             error_path=self._error_path(node_location).relative_to(self.tkr_dir),
             logs_path=self.logs_path.relative_to(self.tkr_dir),
+            fused=fused or [],
         )
         self.write(call_args_path, node_definition.model_dump_json().encode())
         self.mkdir(self._outputs_dir(node_location))
 
         if (parent := node_location.parent()) is not None:
-            self.touch(self._metadata_path(parent))
+            self._touch_metadata(parent)
 
         return call_args_path.relative_to(self.tkr_dir)
 
@@ -187,11 +290,12 @@ class ControllerStorage(ABC):
         self, node_location: Loc, output_name: PortID, value: bytes
     ) -> Path:
         output_path = self._output_path(node_location, output_name)
-        self.write(output_path, bytes(value))
+        value = compress_output(output_name, bytes(value), self.compression_stats)
+        self.write(output_path, value)
         return output_path
 
     def read_output(self, node_location: Loc, output_name: PortID) -> bytes:
-        return self.read(self._output_path(node_location, output_name))
+        return decompress(self.read(self._output_path(node_location, output_name)))
 
     def read_errors(self, node_location: Loc) -> str:
         if not self.exists(self._error_logs_path(node_location)):
@@ -218,8 +322,11 @@ class ControllerStorage(ABC):
     def is_node_finished(self, node_location: Loc) -> bool:
         return self.exists(self._done_path(node_location))
 
-    def latest_loop_iteration(self, loc: Loc) -> Loc:
-        i = 0
+    def latest_loop_iteration(self, loc: Loc, start: int = 0) -> Loc:
+        """The latest started iteration of the loop at `loc`.
+
+        Iterations before `start` are assumed to have been started."""
+        i = start
         while self.is_node_started(loc.L(i + 1)):
             i += 1
         return loc.L(i)
@@ -231,7 +338,13 @@ class ControllerStorage(ABC):
         self.touch(self._done_path(node_location))
 
         if (parent := node_location.parent()) is not None:
-            self.touch(self._metadata_path(parent))
+            self._touch_metadata(parent)
+
+    def mark_node_errored(self, node_location: Loc) -> None:
+        self.touch(self._error_path(node_location))
+
+        if (parent := node_location.parent()) is not None:
+            self._touch_metadata(parent)
 
     def write_metadata(self, node_location: Loc) -> None:
         j = json.dumps({"name": self.name, "start_time": datetime.now().isoformat()})
@@ -0,0 +1,253 @@
+import errno
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from time import time, time_ns
+from typing import Iterator
+from uuid import UUID
+
+from tierkreis.controller.storage.protocol import (
+    StorageEntryMetadata,
+    ControllerStorage,
+)
+
+DATABASE_NAME = "storage.db"
+FILESYSTEM_ENTRIES = ("_done", "_error", "errors", "logs")
+"""Entries that executors write to the filesystem directly, e.g. from shell wrappers.
+
+They are looked up on the filesystem if they are not in the database."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (id INTEGER PRIMARY KEY, value BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    blob INTEGER REFERENCES blobs(id),
+    mtime REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def entry_key(tierkreis_dir: Path, path: Path | str) -> str:
+    """Paths are stored relative to the checkpoints directory."""
+    path = Path(path)
+    if path.is_absolute() or path.is_relative_to(tierkreis_dir):
+        path = path.relative_to(tierkreis_dir)
+    return path.as_posix()
+
+
+def database_path(tierkreis_dir: Path, path: Path | str) -> Path:
+    """The database of the workflow that `path` is in."""
+    workflow_id = entry_key(tierkreis_dir, path).split("/")[0]
+    return tierkreis_dir / workflow_id / DATABASE_NAME
+
+
+def prefix_range(key: str) -> tuple[str, str]:
+    """Bounds of the keys strictly below `key` in the path hierarchy.
+
+    Keys in the half-open interval share the prefix `key/`,
+    which makes prefix queries a range scan of the primary key."""
+    return key + "/", key + chr(ord("/") + 1)
+
+
+def connect(database: Path) -> sqlite3.Connection:
+    database.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(database, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def not_found(path: Path | str, path2: Path | str | None = None) -> FileNotFoundError:
+    return FileNotFoundError(
+        errno.ENOENT, os.strerror(errno.ENOENT), str(path), None, path2 and str(path2)
+    )
+
+
+class ControllerSQLiteStorage(ControllerStorage):
+    """Keeps the entries of a workflow in a single SQLite database.
+
+    The database lives at `{workflow_dir}/storage.db` and uses WAL mode,
+    so that workers in other processes can read inputs and write outputs
+    through a :py:class:`tierkreis.worker.storage.sqlite.WorkerSQLiteStorage`
+    while the controller is running.
+    Links share the value of the source entry rather than copying it.
+    A `batch` is a single transaction, which is rolled back if the batch raises.
+
+    Directories created with `mkdir` and the logs are still real files,
+    because executors redirect the output of workers into them.
+    """
+
+    def __init__(
+        self,
+        workflow_id: UUID,
+        name: str | None = None,
+        tierkreis_directory: Path = Path.home() / ".tierkreis" / "checkpoints",
+        do_cleanup: bool = False,
+    ) -> None:
+        self.tkr_dir = tierkreis_directory
+        self.workflow_id = workflow_id
+        self.name = name
+        self.database = self.workflow_dir / DATABASE_NAME
+        self._local = threading.local()
+        if do_cleanup:
+            self.delete(self.workflow_dir)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.database)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the block in a transaction, unless we are already in one from `batch`."""
+        conn = self._conn
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _begin_batch(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def _end_batch(self, error: BaseException | None) -> bool:
+        if error is not None:
+            self._conn.execute("ROLLBACK")
+            return False
+        self._conn.execute("COMMIT")
+        return True
+
+    def _key(self, path: Path) -> str:
+        return entry_key(self.tkr_dir, path)
+
+    def _on_filesystem(self, path: Path) -> bool:
+        return path.name in FILESYSTEM_ENTRIES and path.exists()
+
+    def delete(self, path: Path) -> None:
+        key = self._key(path)
+        start, end = prefix_range(key)
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)",
+                (key, start, end),
+            )
+            conn.execute(
+                "DELETE FROM blobs WHERE id NOT IN"
+                " (SELECT blob FROM entries WHERE blob IS NOT NULL)"
+            )
+        self._delete_files(path)
+
+    def _delete_files(self, path: Path) -> None:
+        """Archive the files next to the database as in `ControllerFileStorage`."""
+        if not path.exists():
+            return
+        uid = os.getuid()
+        tmp_dir = Path(f"/tmp/{uid}/tierkreis/archive/{self.workflow_id}/{time_ns()}")
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        if path != self.workflow_dir:
+            shutil.move(path, tmp_dir)
+            return
+        for sub_path in path.iterdir():
+            if not sub_path.name.startswith(DATABASE_NAME):
+                shutil.move(sub_path, tmp_dir)
+
+    def exists(self, path: Path) -> bool:
+        key = self._key(path)
+        start, end = prefix_range(key)
+        conn = self._conn
+        if conn.execute("SELECT 1 FROM entries WHERE path = ?", (key,)).fetchone():
+            return True
+        if self._on_filesystem(path):
+            return True
+        query = "SELECT 1 FROM entries WHERE path >= ? AND path < ? LIMIT 1"
+        return conn.execute(query, (start, end)).fetchone() is not None
+
+    def list_subpaths(self, path: Path) -> list[Path]:
+        start, end = prefix_range(self._key(path))
+        rows = self._conn.execute(
+            "SELECT path FROM entries WHERE path >= ? AND path < ?", (start, end)
+        )
+        children = {key[len(start) :].split("/")[0] for (key,) in rows}
+        return [path / child for child in sorted(children)]
+
+    def link(self, src: Path, dst: Path) -> None:
+        src_key, dst_key = self._key(src), self._key(dst)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT blob FROM entries WHERE path = ?", (src_key,)
+            ).fetchone()
+            if row is None:
+                raise not_found(src, dst)
+            existing = conn.execute(
+                "SELECT blob FROM entries WHERE path = ?", (dst_key,)
+            ).fetchone()
+            if existing is not None:
+                if existing[0] == row[0]:
+                    return  # We have already linked correctly
+                raise FileExistsError(
+                    errno.EEXIST, os.strerror(errno.EEXIST), str(src), None, str(dst)
+                )
+            conn.execute(
+                "INSERT INTO entries (path, blob, mtime) VALUES (?, ?, ?)",
+                (dst_key, row[0], time()),
+            )
+
+    def mkdir(self, path: Path) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+
+    def read(self, path: Path) -> bytes:
+        row = self._conn.execute(
+            "SELECT blobs.value FROM entries LEFT JOIN blobs ON entries.blob = blobs.id"
+            " WHERE entries.path = ?",
+            (self._key(path),),
+        ).fetchone()
+        if row is not None:
+            return row[0] or b""
+        if self._on_filesystem(path):
+            return path.read_bytes()
+        raise not_found(path)
+
+    def touch(self, path: Path, is_dir: bool = False) -> None:
+        if is_dir:
+            return self.mkdir(path)
+
+        self._conn.execute(
+            "INSERT INTO entries (path, blob, mtime) VALUES (?, NULL, ?)"
+            " ON CONFLICT(path) DO UPDATE SET mtime = excluded.mtime",
+            (self._key(path), time()),
+        )
+
+    def stat(self, path: Path) -> StorageEntryMetadata:
+        row = self._conn.execute(
+            "SELECT mtime FROM entries WHERE path = ?", (self._key(path),)
+        ).fetchone()
+        if row is not None:
+            return StorageEntryMetadata(row[0])
+        if self._on_filesystem(path):
+            return StorageEntryMetadata(path.stat().st_mtime)
+        raise not_found(path)
+
+    def write(self, path: Path, value: bytes) -> None:
+        with self._transaction() as conn:
+            blob = conn.execute(
+                "INSERT INTO blobs (value) VALUES (?)", (bytes(value),)
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO entries (path, blob, mtime) VALUES (?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE"
+                " SET blob = excluded.blob, mtime = excluded.mtime",
+                (self._key(path), blob, time()),
+            )
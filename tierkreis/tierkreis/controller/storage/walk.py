@@ -3,7 +3,7 @@ from logging import getLogger
 from typing import assert_never
 
 from tierkreis.controller.consts import BODY_PORT
-from tierkreis.controller.data.core import NodeIndex
+from tierkreis.controller.data.core import NodeIndex, PortID, ValueRef
 from tierkreis.controller.data.graph import (
     EagerIfElse,
     Eval,
@@ -11,11 +11,12 @@ from tierkreis.controller.data.graph import (
     Loop,
     Map,
     NodeDef,
+    graph_from_bytes,
 )
 from tierkreis.controller.data.location import Loc
 from tierkreis.controller.data.types import ptype_from_bytes
 from tierkreis.controller.start import NodeRunData
-from tierkreis.controller.storage.adjacency import outputs_iter, unfinished_inputs
+from tierkreis.controller.storage.adjacency import in_edges, outputs_iter
 from tierkreis.controller.storage.protocol import ControllerStorage
 from tierkreis.labels import Labels
 
@@ -34,153 +35,233 @@ class WalkResult:
         self.errored.extend(walk_result.errored)
 
 
-def unfinished_results(
-    result: WalkResult,
-    storage: ControllerStorage,
-    parent: Loc,
-    node: NodeDef,
-    graph: GraphData,
-) -> int:
-    unfinished = unfinished_inputs(storage, parent, node)
-    [result.extend(walk_node(storage, parent, x[0], graph)) for x in unfinished]
-    return len(unfinished)
-
-
-def walk_node(
-    storage: ControllerStorage, parent: Loc, idx: NodeIndex, graph: GraphData
-) -> WalkResult:
-    """Should only be called when a node has not finished."""
-    loc = parent.N(idx)
-    if storage.node_has_error(loc):
-        logger.error(f"Node {loc} has encountered an error:")
-        logger.error(f"\n\n{storage.read_errors(loc)}\n\n")
-        return WalkResult([], [], [loc])
-
-    node = graph.nodes[idx]
-    node_run_data = NodeRunData(loc, node, list(node.outputs))
-
-    result = WalkResult([], [])
-    if unfinished_results(result, storage, parent, node, graph):
+class GraphWalker:
+    """Finds the nodes of a graph that are ready to start.
+
+    The walker is kept between controller ticks and remembers the frontier of
+    the previous walk: the running function nodes and whether the walk itself
+    made progress. Only function nodes are progressed outside of the controller,
+    so if none of them has finished or errored since the last walk and nothing
+    was started, the graph is not walked again.
+    Finished nodes, map elements and loop iterations are cached
+    so that a walk only visits the unfinished part of the graph.
+
+    Ready nodes that the controller holds back are remembered with `defer`.
+
+    The caches assume that nodes are not restarted while the walker is in use.
+    """
+
+    def __init__(self, storage: ControllerStorage, graph: GraphData) -> None:
+        self.storage = storage
+        self.graph = graph
+        self.running: list[Loc] = []
+        self._finished: set[Loc] = set()
+        self._map_elements: dict[Loc, list[tuple[int, PortID]]] = {}
+        self._loop_iterations: dict[Loc, int] = {}
+        self._pending: list[NodeRunData] = []
+        self._stale = True
+        self._progressed = False
+
+    def walk(self) -> WalkResult:
+        """Walk the graph from its output node unless the frontier is unchanged."""
+        if not self._stale and not self._frontier_changed():
+            return WalkResult(list(self._pending), list(self.running))
+
+        self._progressed = False
+        result = self.walk_node(Loc(), self.graph.output_idx(), self.graph)
+        self.running = list(result.started)
+        self._pending = []
+        self._stale = len(result.inputs_ready) > 0 or self._progressed
         return result
 
-    if not storage.is_node_started(loc):
-        return WalkResult([node_run_data], [])
-
-    match node.type:
-        case "eval":
-            message = storage.read_output(parent.N(node.graph[0]), node.graph[1])
-            g = ptype_from_bytes(message, GraphData)
-            return walk_node(storage, loc, g.output_idx(), g)
-
-        case "output":
+    def defer(self, pending: list[NodeRunData], any_started: bool) -> None:
+        """Record the ready nodes of the last walk that were not started.
+
+        If nothing was started either, the graph is not walked again
+        until the frontier changes and the pending nodes are reported as ready instead."""
+        self._pending = pending
+        if not any_started:
+            self._stale = self._progressed
+
+    def _frontier_changed(self) -> bool:
+        return any(
+            self.is_node_finished(loc) or self.storage.node_has_error(loc)
+            for loc in self.running
+        )
+
+    def is_node_finished(self, loc: Loc) -> bool:
+        if loc in self._finished:
+            return True
+        if self.storage.is_node_finished(loc):
+            self._finished.add(loc)
+            return True
+        return False
+
+    def mark_node_finished(self, loc: Loc) -> None:
+        self.storage.mark_node_finished(loc)
+        self._finished.add(loc)
+        self._progressed = True
+
+    def unfinished_inputs(self, loc: Loc, node: NodeDef) -> list[ValueRef]:
+        ins = in_edges(node).values()
+        ins = [x for x in ins if x[0] >= 0]  # inputs at -1 already finished
+        return [x for x in ins if not self.is_node_finished(loc.N(x[0]))]
+
+    def unfinished_results(
+        self, result: WalkResult, parent: Loc, node: NodeDef, graph: GraphData
+    ) -> int:
+        unfinished = self.unfinished_inputs(parent, node)
+        [result.extend(self.walk_node(parent, x[0], graph)) for x in unfinished]
+        return len(unfinished)
+
+    def walk_node(self, parent: Loc, idx: NodeIndex, graph: GraphData) -> WalkResult:
+        """Should only be called when a node has not finished."""
+        storage = self.storage
+        loc = parent.N(idx)
+        if storage.node_has_error(loc):
+            logger.error(f"Node {loc} has encountered an error:")
+            logger.error(f"\n\n{storage.read_errors(loc)}\n\n")
+            return WalkResult([], [], [loc])
+
+        node = graph.nodes[idx]
+        node_run_data = NodeRunData(loc, node, list(node.outputs))
+
+        result = WalkResult([], [])
+        if self.unfinished_results(result, parent, node, graph):
+            return result
+
+        if not storage.is_node_started(loc):
+            for i in graph.fused.get(idx, []):
+                fused = NodeRunData(
+                    parent.N(i), graph.nodes[i], list(graph.nodes[i].outputs)
+                )
+                node_run_data.fused.append(fused)
             return WalkResult([node_run_data], [])
 
-        case "const":
-            return WalkResult([node_run_data], [])
+        match node.type:
+            case "eval":
+                message = storage.read_output(parent.N(node.graph[0]), node.graph[1])
+                g = graph_from_bytes(message)
+                return self.walk_node(loc, g.output_idx(), g)
 
-        case "loop":
-            return walk_loop(storage, parent, idx, node)
+            case "output":
+                return WalkResult([node_run_data], [])
 
-        case "map":
-            return walk_map(storage, parent, idx, node)
+            case "const":
+                return WalkResult([node_run_data], [])
 
-        case "ifelse":
-            pred = storage.read_output(parent.N(node.pred[0]), node.pred[1])
-            next_node = node.if_true if pred == b"true" else node.if_false
-            next_loc = parent.N(next_node[0])
-            if storage.is_node_finished(next_loc):
-                storage.link_outputs(loc, Labels.VALUE, next_loc, next_node[1])
-                storage.mark_node_finished(loc)
-                return WalkResult([], [])
-            else:
-                return walk_node(storage, parent, next_node[0], graph)
+            case "loop":
+                return self.walk_loop(parent, idx, node)
 
-        case "eifelse":
-            return walk_eifelse(storage, parent, idx, node)
+            case "map":
+                return self.walk_map(parent, idx, node)
 
-        case "function":
-            return WalkResult([], [loc])
+            case "ifelse":
+                pred = storage.read_output(parent.N(node.pred[0]), node.pred[1])
+                is_true = ptype_from_bytes(pred, bool)
+                next_node = node.if_true if is_true else node.if_false
+                next_loc = parent.N(next_node[0])
+                if self.is_node_finished(next_loc):
+                    storage.link_outputs(loc, Labels.VALUE, next_loc, next_node[1])
+                    self.mark_node_finished(loc)
+                    return WalkResult([], [])
+                else:
+                    return self.walk_node(parent, next_node[0], graph)
 
-        case "input":
-            return WalkResult([], [])
-        case _:
-            assert_never(node)
+            case "eifelse":
+                return self.walk_eifelse(parent, idx, node)
 
+            case "function":
+                return WalkResult([], [loc])
 
-def walk_loop(
-    storage: ControllerStorage, parent: Loc, idx: NodeIndex, loop: Loop
-) -> WalkResult:
-    loc = parent.N(idx)
-    if storage.is_node_finished(loc):
-        return WalkResult([], [], [])
-
-    new_location = storage.latest_loop_iteration(loc)
-
-    message = storage.read_output(loc.N(-1), BODY_PORT)
-    g = ptype_from_bytes(message, GraphData)
-    loop_outputs = g.nodes[g.output_idx()].inputs
-
-    if not storage.is_node_finished(new_location):
-        return walk_node(storage, new_location, g.output_idx(), g)
-
-    # Latest iteration is finished. Do we BREAK or CONTINUE?
-    should_continue = ptype_from_bytes(
-        storage.read_output(new_location, loop.continue_port), bool
-    )
-    if should_continue is False:
-        for k in loop_outputs:
-            storage.link_outputs(loc, k, new_location, k)
-        storage.mark_node_finished(loc)
-        return WalkResult([], [])
-
-    ins = {k: (-1, k) for k in loop.inputs.keys()}
-    ins.update(loop_outputs)
-    node_run_data = NodeRunData(
-        loc.L(new_location.peek_index() + 1),
-        Eval((-1, BODY_PORT), ins, loop.outputs),
-        list(loop_outputs.keys()),
-    )
-    return WalkResult([node_run_data], [])
-
-
-def walk_map(
-    storage: ControllerStorage, parent: Loc, idx: NodeIndex, map: Map
-) -> WalkResult:
-    loc = parent.N(idx)
-    result = WalkResult([], [])
-    if storage.is_node_finished(loc):
-        return result
+            case "input":
+                return WalkResult([], [])
+            case _:
+                assert_never(node)
+
+    def walk_loop(self, parent: Loc, idx: NodeIndex, loop: Loop) -> WalkResult:
+        storage = self.storage
+        loc = parent.N(idx)
+        if self.is_node_finished(loc):
+            return WalkResult([], [], [])
+
+        known = self._loop_iterations.get(loc, 0)
+        new_location = storage.latest_loop_iteration(loc, known)
+        self._loop_iterations[loc] = new_location.peek_index()
+
+        message = storage.read_output(loc.N(-1), BODY_PORT)
+        g = graph_from_bytes(message)
+        loop_outputs = g.nodes[g.output_idx()].inputs
+
+        if not self.is_node_finished(new_location):
+            return self.walk_node(new_location, g.output_idx(), g)
+
+        # Latest iteration is finished. Do we BREAK or CONTINUE?
+        should_continue = ptype_from_bytes(
+            storage.read_output(new_location, loop.continue_port), bool
+        )
+        if should_continue is False:
+            for k in loop_outputs:
+                storage.link_outputs(loc, k, new_location, k)
+            self.mark_node_finished(loc)
+            return WalkResult([], [])
 
-    first_ref = next(x for x in map.inputs.values() if x[1] == "*")
-    map_eles = outputs_iter(storage, parent.N(first_ref[0]))
-    unfinished = [i for i, _ in map_eles if not storage.is_node_finished(loc.M(i))]
-    message = storage.read_output(loc.M(0).N(-1), BODY_PORT)
-    g = ptype_from_bytes(message, GraphData)
-    [result.extend(walk_node(storage, loc.M(p), g.output_idx(), g)) for p in unfinished]
+        ins = {k: (-1, k) for k in loop.inputs.keys()}
+        ins.update(loop_outputs)
+        node_run_data = NodeRunData(
+            loc.L(new_location.peek_index() + 1),
+            Eval((-1, BODY_PORT), ins, loop.outputs),
+            list(loop_outputs.keys()),
+        )
+        return WalkResult([node_run_data], [])
 
-    if len(unfinished) > 0:
+    def walk_map(self, parent: Loc, idx: NodeIndex, map: Map) -> WalkResult:
+        storage = self.storage
+        loc = parent.N(idx)
+        result = WalkResult([], [])
+        if self.is_node_finished(loc):
+            return result
+
+        map_eles = self._map_elements.get(loc)
+        if map_eles is None:
+            first_ref = next(x for x in map.inputs.values() if x[1] == "*")
+            map_eles = outputs_iter(storage, parent.N(first_ref[0]))
+            self._map_elements[loc] = map_eles
+
+        unfinished = [i for i, _ in map_eles if not self.is_node_finished(loc.M(i))]
+        message = storage.read_output(loc.M(0).N(-1), BODY_PORT)
+        g = graph_from_bytes(message)
+        [result.extend(self.walk_node(loc.M(p), g.output_idx(), g)) for p in unfinished]
+
+        if len(unfinished) > 0:
+            return result
+
+        map_outputs = g.nodes[g.output_idx()].inputs
+        for i, j in map_eles:
+            for output in map_outputs.keys():
+                storage.link_outputs(loc, f"{output}-{j}", loc.M(i), output)
+
+        self.mark_node_finished(loc)
         return result
 
-    map_outputs = g.nodes[g.output_idx()].inputs
-    for i, j in map_eles:
-        for output in map_outputs.keys():
-            storage.link_outputs(loc, f"{output}-{j}", loc.M(i), output)
+    def walk_eifelse(
+        self, parent: Loc, idx: NodeIndex, node: EagerIfElse
+    ) -> WalkResult:
+        storage = self.storage
+        loc = parent.N(idx)
+        pred = storage.read_output(parent.N(node.pred[0]), node.pred[1])
+        next_node = node.if_true if ptype_from_bytes(pred, bool) else node.if_false
+        next_loc = parent.N(next_node[0])
+        storage.link_outputs(loc, Labels.VALUE, next_loc, next_node[1])
+        self.mark_node_finished(loc)
 
-    storage.mark_node_finished(loc)
-    return result
+        return WalkResult([], [])
 
 
-def walk_eifelse(
-    storage: ControllerStorage,
-    parent: Loc,
-    idx: NodeIndex,
-    node: EagerIfElse,
+def walk_node(
+    storage: ControllerStorage, parent: Loc, idx: NodeIndex, graph: GraphData
 ) -> WalkResult:
-    loc = parent.N(idx)
-    pred = storage.read_output(parent.N(node.pred[0]), node.pred[1])
-    next_node = node.if_true if pred == b"true" else node.if_false
-    next_loc = parent.N(next_node[0])
-    storage.link_outputs(loc, Labels.VALUE, next_loc, next_node[1])
-    storage.mark_node_finished(loc)
-
-    return WalkResult([], [])
+    """Walk a node without keeping any state between calls.
+
+    Should only be called when a node has not finished."""
+    return GraphWalker(storage, graph).walk_node(parent, idx, graph)
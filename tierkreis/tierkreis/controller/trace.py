@@ -0,0 +1,122 @@
+"""Spans of the work done for a workflow, in the Chrome trace event format.
+
+The controller, the executors and the workers record spans while tracing is
+enabled, each process into its own JSON lines file in the trace directory of
+the workflow. Workers find the directory in the `TKR_TRACE` environment
+variable, which executors pass on to the processes they start.
+The files can be loaded with :py:func:`read_trace` and written as a single
+Chrome trace or Perfetto JSON file with :py:func:`write_chrome_trace`.
+"""
+
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import threading
+from time import time_ns
+from typing import Any, Iterator, TextIO
+
+from tierkreis.consts import TKR_TRACE_KEY
+
+type TraceEvent = dict[str, Any]
+
+
+class Tracer:
+    """Appends complete ("X") events to `<directory>/<pid>.jsonl`."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._fh: TextIO | None = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, cat: str, start_ns: int, end_ns: int, **args: Any):
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        }
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            if self._fh is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self.directory / f"{os.getpid()}.jsonl"
+                self._fh = open(path, "a", buffering=1)
+            self._fh.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+_tracer: Tracer | None = None
+_from_environment = False
+
+
+def active_tracer() -> Tracer | None:
+    """The tracer of this process, set up from the environment on first use."""
+    global _tracer, _from_environment
+    if not _from_environment:
+        _from_environment = True
+        if _tracer is None and (directory := os.environ.get(TKR_TRACE_KEY)):
+            _tracer = Tracer(Path(directory))
+    return _tracer
+
+
+@contextmanager
+def span(name: str, cat: str, **args: Any) -> Iterator[None]:
+    """Record the time spent in the block if tracing is enabled."""
+    tracer = active_tracer()
+    if tracer is None:
+        yield
+        return
+    start_ns = time_ns()
+    try:
+        yield
+    finally:
+        tracer.record(name, cat, start_ns, time_ns(), **args)
+
+
+@contextmanager
+def tracing(directory: Path) -> Iterator[Tracer]:
+    """Trace this process and the workers it starts into `directory`."""
+    global _tracer, _from_environment
+    previous = _tracer, _from_environment, os.environ.get(TKR_TRACE_KEY)
+    _tracer, _from_environment = Tracer(directory), True
+    os.environ[TKR_TRACE_KEY] = str(directory)
+    try:
+        yield _tracer
+    finally:
+        _tracer.close()
+        _tracer, _from_environment, environment = previous
+        if environment is None:
+            os.environ.pop(TKR_TRACE_KEY, None)
+        else:
+            os.environ[TKR_TRACE_KEY] = environment
+
+
+def read_trace(directory: Path) -> list[TraceEvent]:
+    """The events recorded in `directory`, ordered by their start."""
+    events: list[TraceEvent] = []
+    for path in directory.glob("*.jsonl"):
+        with open(path) as fh:
+            for line in fh:
+                # The last line of a process that was killed may be incomplete.
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    events.sort(key=lambda e: e["ts"])
+    return events
+
+
+def write_chrome_trace(events: list[TraceEvent], path: Path) -> None:
+    """Write the events as a Chrome trace, which Perfetto opens as well."""
+    with open(path, "w") as fh:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh)
@@ -9,9 +9,12 @@ from tierkreis.controller.storage.filestorage import (
 from tierkreis.controller.storage.in_memory import (
     ControllerInMemoryStorage as InMemoryStorage,
 )
+from tierkreis.controller.storage.sqlite import (
+    ControllerSQLiteStorage as SQLiteStorage,
+)
 from tierkreis.exceptions import TierkreisError
 
-__all__ = ["FileStorage", "InMemoryStorage"]
+__all__ = ["FileStorage", "InMemoryStorage", "SQLiteStorage"]
 
 
 def read_outputs(
@@ -0,0 +1,54 @@
+import fnmatch
+import json
+from pathlib import Path
+from typing import Iterable
+
+from tierkreis.controller.data.compression import (
+    CompressionStats,
+    compress_output,
+    decompress,
+)
+from tierkreis.controller.data.location import WorkerCallArgs
+from tierkreis.controller.storage.protocol import ControllerStorage
+
+
+class ControllerWorkerStorage:
+    """Gives a worker in the controller process access to any ControllerStorage."""
+
+    def __init__(self, controller_storage: ControllerStorage) -> None:
+        self.controller_storage = controller_storage
+        self.compression_stats = CompressionStats()
+
+    def resolve(self, path: Path | str) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else self.controller_storage.tkr_dir / path
+
+    def read_call_args(self, path: Path) -> WorkerCallArgs:
+        bs = self.controller_storage.read(self.resolve(path))
+        return WorkerCallArgs(**json.loads(bs))
+
+    def read_input(self, path: Path) -> bytes:
+        return decompress(self.controller_storage.read(self.resolve(path)))
+
+    def write_output(self, path: Path, value: bytes) -> None:
+        value = compress_output(Path(path).name, value, self.compression_stats)
+        self.controller_storage.write(self.resolve(path), value)
+
+    def write_output_chunks(self, path: Path, chunks: Iterable[bytes]) -> None:
+        self.write_output(path, b"".join(chunks))
+
+    def glob(self, path_string: str) -> list[str]:
+        pattern = self.resolve(path_string)
+        files = self.controller_storage.list_subpaths(pattern.parent)
+        return fnmatch.filter([str(x) for x in files], str(pattern))
+
+    def list_dir(self, path: Path) -> list[str]:
+        directory = self.resolve(path)
+        files = self.controller_storage.list_subpaths(directory)
+        return [x.name for x in files if x.parent == directory]
+
+    def mark_done(self, path: Path) -> None:
+        self.controller_storage.touch(self.resolve(path))
+
+    def write_error(self, path: Path, error_logs: str) -> None:
+        self.controller_storage.write(self.resolve(path), error_logs.encode())
@@ -2,8 +2,15 @@ import json
 from glob import glob
 import os
 from pathlib import Path
+from typing import Iterable
 
 from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.controller.data.compression import (
+    CompressionStats,
+    compress_output,
+    decompress,
+    default_compression,
+)
 from tierkreis.controller.data.location import WorkerCallArgs
 
 
@@ -15,6 +22,7 @@ class WorkerFileStorage:
             self.tierkreis_dir = Path(tierkreis_dir_str).resolve()
         else:
             self.tierkreis_dir = Path.home() / ".tierkreis" / "checkpoints"
+        self.compression_stats = CompressionStats()
 
     def resolve(self, path: Path | str) -> Path:
         path = Path(path)
@@ -26,15 +34,27 @@ class WorkerFileStorage:
 
     def read_input(self, path: Path) -> bytes:
         with open(self.resolve(path), "rb") as fh:
-            return fh.read()
+            return decompress(fh.read())
 
     def write_output(self, path: Path, value: bytes) -> None:
+        value = compress_output(Path(path).name, value, self.compression_stats)
         with open(self.resolve(path), "wb+") as fh:
             fh.write(value)
 
+    def write_output_chunks(self, path: Path, chunks: Iterable[bytes]) -> None:
+        if default_compression() is not None:
+            # Codecs need the whole value, only uncompressed values are streamed.
+            return self.write_output(path, b"".join(chunks))
+        with open(self.resolve(path), "wb+") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+
     def glob(self, path_string: str) -> list[str]:
         return glob(str(self.resolve(path_string)))
 
+    def list_dir(self, path: Path) -> list[str]:
+        return os.listdir(self.resolve(path))
+
     def mark_done(self, path: Path) -> None:
         self.resolve(path).touch()
 
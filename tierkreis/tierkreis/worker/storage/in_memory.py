@@ -2,12 +2,15 @@ import fnmatch
 import json
 import logging
 from pathlib import Path
+from typing import Iterable
 
-from tierkreis.controller.data.location import WorkerCallArgs
-from tierkreis.controller.storage.in_memory import (
-    ControllerInMemoryStorage,
-    InMemoryFileData,
+from tierkreis.controller.data.compression import (
+    CompressionStats,
+    compress_output,
+    decompress,
 )
+from tierkreis.controller.data.location import WorkerCallArgs
+from tierkreis.controller.storage.in_memory import ControllerInMemoryStorage
 from tierkreis.exceptions import TierkreisError
 
 
@@ -17,25 +20,37 @@ logger = logging.getLogger(__name__)
 class InMemoryWorkerStorage:
     def __init__(self, controller_storage: ControllerInMemoryStorage) -> None:
         self.controller_storage = controller_storage
+        self.compression_stats = CompressionStats()
 
     def resolve(self, path: Path | str) -> Path:
         return Path(path)
 
     def read_call_args(self, path: Path) -> WorkerCallArgs:
-        bs = self.controller_storage.files[path].value
+        bs = self.controller_storage.read(path)
         return WorkerCallArgs(**json.loads(bs))
 
     def read_input(self, path: Path) -> bytes:
-        return self.controller_storage.files[path].value
+        return decompress(self.controller_storage.read(path))
 
     def write_output(self, path: Path, value: bytes) -> None:
-        self.controller_storage.files[path] = InMemoryFileData(value)
+        value = compress_output(Path(path).name, value, self.compression_stats)
+        self.controller_storage.write(path, value)
+
+    def write_output_chunks(self, path: Path, chunks: Iterable[bytes]) -> None:
+        self.write_output(path, b"".join(chunks))
 
     def glob(self, path_string: str) -> list[str]:
-        files = [str(x) for x in self.controller_storage.files.keys()]
+        directory = Path(path_string).parent
+        if any(c in str(directory) for c in "*?["):
+            files = [str(x) for x in self.controller_storage.files.keys()]
+        else:
+            files = [str(x) for x in self.controller_storage.list_subpaths(directory)]
         matching = fnmatch.filter(files, path_string)
         return matching
 
+    def list_dir(self, path: Path) -> list[str]:
+        return [x.name for x in self.controller_storage.list_subpaths(Path(path))]
+
     def mark_done(self, path: Path) -> None:
         self.controller_storage.touch(path)
 
@@ -1,10 +1,15 @@
 from pathlib import Path
-from typing import Protocol
+from typing import Iterable, Protocol, runtime_checkable
 
 from tierkreis.controller.data.location import WorkerCallArgs
 
 
 class WorkerStorage(Protocol):
+    """Where a worker reads its inputs and writes its outputs.
+
+    Storages that compress outputs may count them in a `compression_stats`
+    attribute, see :py:mod:`tierkreis.controller.data.compression`."""
+
     def resolve(self, path: Path | str) -> Path: ...
     def read_call_args(self, path: Path) -> WorkerCallArgs: ...
     def read_input(self, path: Path) -> bytes: ...
@@ -12,3 +17,17 @@ class WorkerStorage(Protocol):
     def glob(self, path_string: str) -> list[str]: ...
     def mark_done(self, path: Path) -> None: ...
     def write_error(self, path: Path, error_logs: str) -> None: ...
+
+
+@runtime_checkable
+class StreamingWorkerStorage(WorkerStorage, Protocol):
+    """A storage that can write an output without holding all of it in memory."""
+
+    def write_output_chunks(self, path: Path, chunks: Iterable[bytes]) -> None: ...
+
+
+@runtime_checkable
+class ListingWorkerStorage(WorkerStorage, Protocol):
+    """A storage that can list a directory without matching a glob."""
+
+    def list_dir(self, path: Path) -> list[str]: ...
@@ -0,0 +1,117 @@
+import fnmatch
+import json
+import os
+import sqlite3
+from pathlib import Path
+from time import time
+from typing import Iterable
+
+from tierkreis.consts import TKR_DIR_KEY
+from tierkreis.controller.data.compression import (
+    CompressionStats,
+    compress_output,
+    decompress,
+)
+from tierkreis.controller.data.location import WorkerCallArgs
+from tierkreis.controller.storage.sqlite import (
+    connect,
+    database_path,
+    entry_key,
+    not_found,
+    prefix_range,
+)
+
+
+class WorkerSQLiteStorage:
+    """Worker counterpart of :py:class:`tierkreis.controller.storage.sqlite.ControllerSQLiteStorage`.
+
+    Paths are relative to the checkpoints directory and the first component
+    is the workflow id, which determines the database to use."""
+
+    def __init__(self, tierkreis_dir: Path | None = None) -> None:
+        if tierkreis_dir is not None:
+            self.tierkreis_dir = tierkreis_dir
+        elif tierkreis_dir_str := os.environ.get(TKR_DIR_KEY):
+            self.tierkreis_dir = Path(tierkreis_dir_str).resolve()
+        else:
+            self.tierkreis_dir = Path.home() / ".tierkreis" / "checkpoints"
+        self._connections: dict[Path, sqlite3.Connection] = {}
+        self.compression_stats = CompressionStats()
+
+    def _conn(self, key: str) -> sqlite3.Connection:
+        database = database_path(self.tierkreis_dir, Path(key))
+        if database not in self._connections:
+            self._connections[database] = connect(database)
+        return self._connections[database]
+
+    def _read(self, path: Path | str) -> bytes:
+        key = entry_key(self.tierkreis_dir, path)
+        row = (
+            self._conn(key)
+            .execute(
+                "SELECT blobs.value FROM entries"
+                " LEFT JOIN blobs ON entries.blob = blobs.id WHERE entries.path = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            raise not_found(self.resolve(path))
+        return row[0] or b""
+
+    def _write(self, path: Path | str, value: bytes | None) -> None:
+        key = entry_key(self.tierkreis_dir, path)
+        with self._conn(key) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            blob = None
+            if value is not None:
+                blob = conn.execute(
+                    "INSERT INTO blobs (value) VALUES (?)", (value,)
+                ).lastrowid
+            conn.execute(
+                "INSERT INTO entries (path, blob, mtime) VALUES (?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE"
+                " SET blob = excluded.blob, mtime = excluded.mtime",
+                (key, blob, time()),
+            )
+
+    def resolve(self, path: Path | str) -> Path:
+        path = Path(path)
+        return path if path.is_absolute() else self.tierkreis_dir / path
+
+    def read_call_args(self, path: Path) -> WorkerCallArgs:
+        return WorkerCallArgs(**json.loads(self._read(path)))
+
+    def read_input(self, path: Path) -> bytes:
+        return decompress(self._read(path))
+
+    def write_output(self, path: Path, value: bytes) -> None:
+        value = compress_output(Path(path).name, bytes(value), self.compression_stats)
+        self._write(path, value)
+
+    def write_output_chunks(self, path: Path, chunks: Iterable[bytes]) -> None:
+        self.write_output(path, b"".join(chunks))
+
+    def glob(self, path_string: str) -> list[str]:
+        pattern = entry_key(self.tierkreis_dir, path_string)
+        prefix = pattern.split("*")[0].rsplit("/", 1)[0]
+        start, end = prefix_range(prefix)
+        rows = self._conn(pattern).execute(
+            "SELECT path FROM entries WHERE path >= ? AND path < ?", (start, end)
+        )
+        return fnmatch.filter([key for (key,) in rows], pattern)
+
+    def list_dir(self, path: Path) -> list[str]:
+        key = entry_key(self.tierkreis_dir, path)
+        start, end = prefix_range(key)
+        rows = self._conn(key).execute(
+            "SELECT path FROM entries WHERE path >= ? AND path < ?", (start, end)
+        )
+        names = (entry[len(start) :] for (entry,) in rows)
+        return [name for name in names if "/" not in name]
+
+    def mark_done(self, path: Path) -> None:
+        self._write(path, None)
+
+    def write_error(self, path: Path, error_logs: str) -> None:
+        self._write(path, error_logs.encode())
@@ -1,11 +1,20 @@
+from contextlib import redirect_stdout
 from inspect import Signature, signature
 import logging
 from logging import getLogger
 from pathlib import Path
 import sys
 from types import TracebackType
-from typing import Callable, TypeVar
-
+from typing import Any, Callable, TextIO, TypeVar
+
+from tierkreis.consts import CACHEABLE_MARKER
+from tierkreis.controller.data.compiled import (
+    Decoder,
+    Encoder,
+    compile_decoder,
+    compile_encoder,
+)
+from tierkreis.controller.data.compression import is_compressed_file
 from tierkreis.controller.data.core import PortID
 from tierkreis.controller.data.location import WorkerCallArgs
 from tierkreis.controller.data.models import (
@@ -13,16 +22,19 @@ from tierkreis.controller.data.models import (
     annotations_from_pmodel,
     dict_from_pmodel,
 )
+from tierkreis.controller.trace import span
 from tierkreis.controller.data.types import (
     PType,
-    bytes_from_ptype,
     has_default,
-    ptype_from_bytes,
+    is_npy_annotation,
+    ndarray_from_npy_file,
 )
 from tierkreis.exceptions import TierkreisError
 from tierkreis.namespace import Namespace, WorkerFunction
+from tierkreis.controller.storage.sqlite import database_path
 from tierkreis.worker.storage.filestorage import WorkerFileStorage
 from tierkreis.worker.storage.protocol import WorkerStorage
+from tierkreis.worker.storage.sqlite import WorkerSQLiteStorage
 
 logger = getLogger(__name__)
 PrimitiveTask = Callable[[WorkerCallArgs, WorkerStorage], None]
@@ -67,18 +79,29 @@ class Worker:
     :param name: The name of the worker.
     :type name: str
     :param storage: Storage layer for the worker to interact with the ControllerStorage.
+        Defaults to the files in the checkpoints directory, or to the SQLite database
+        of the workflow if the controller uses one.
     :type storage: WorkerStorage
     """
 
     functions: dict[str, Callable[[WorkerCallArgs], None]]
     types: dict[MethodName, Signature]
     namespace: Namespace
+    decoders: dict[MethodName, dict[str, Decoder]]
+    encoders: dict[MethodName, dict[PortID, Encoder]]
 
     def __init__(self, name: str, storage: WorkerStorage | None = None) -> None:
         self.name = name
         self.functions = {}
         self.types = {}
+        self.decoders = {}
+        self.encoders = {}
+        self._output_types: dict[MethodName, dict[PortID, Any]] = {}
+        # Outputs of the previous call of a fused chain with their annotations.
+        self._previous: dict[Path, tuple[PType, Any]] = {}
+        self._results: dict[Path, tuple[PType, Any]] | None = None
         self.namespace = Namespace(name=self.name, methods=[])
+        self._detect_storage = storage is None
         if storage is None:
             self.storage: WorkerStorage = WorkerFileStorage()
         else:
@@ -88,32 +111,55 @@ class Worker:
     def _load_args(
         self, f: WorkerFunction, inputs: dict[str, Path]
     ) -> dict[str, PType]:
-        bs: dict[str, bytes] = {}
+        parameters = self.types[f.__name__].parameters
+        decoders = self.decoders[f.__name__]
+        memmap = isinstance(self.storage, WorkerFileStorage)
+        args = {}
         for k, p in inputs.items():
+            if p in self._previous:
+                value, annotation = self._previous[p]
+                if annotation == parameters[k].annotation:
+                    args[k] = value
+                    continue
             try:
-                bs[k] = self.storage.read_input(p)
+                if (
+                    memmap
+                    and is_npy_annotation(parameters[k].annotation)
+                    and not is_compressed_file(self.storage.resolve(p))
+                ):
+                    args[k] = ndarray_from_npy_file(self.storage.resolve(p))
+                    continue
+                bs = self.storage.read_input(p)
             except FileNotFoundError:
-                if not has_default(self.types[f.__name__].parameters[k]):
+                if not has_default(parameters[k]):
                     raise TierkreisError(f"Input {k} not found at {p}.")
-
-        args = {}
-        for k, b in bs.items():
-            args[k] = ptype_from_bytes(
-                b, self.types[f.__name__].parameters[k].annotation
-            )
+                continue
+            args[k] = decoders[k](bs)
         return args
 
     def _save_results(
         self, f: WorkerFunction, outputs: dict[PortID, Path], results: PModel
     ):
         d = dict_from_pmodel(results)
-        ret = annotations_from_pmodel(signature(f).return_annotation)
+        encoders = self.encoders[f.__name__]
         for result_name, path in outputs.items():
-            bs = bytes_from_ptype(d[result_name], ret[result_name])
-            self.storage.write_output(path, bs)
+            self.storage.write_output(path, encoders[result_name](d[result_name]))
+            if self._results is not None:
+                annotation = self._output_types[f.__name__][result_name]
+                self._results[path] = (d[result_name], annotation)
 
     def add_types(self, func: WorkerFunction) -> None:
-        self.types[func.__name__] = signature(func)
+        """Record the signature and compile the (de)serializers of its annotations."""
+        sig = signature(func)
+        self.types[func.__name__] = sig
+        self.decoders[func.__name__] = {
+            k: compile_decoder(p.annotation) for k, p in sig.parameters.items()
+        }
+        output_types = annotations_from_pmodel(sig.return_annotation)
+        self._output_types[func.__name__] = output_types
+        self.encoders[func.__name__] = {
+            k: compile_encoder(v) for k, v in output_types.items()
+        }
 
     def primitive_task(
         self,
@@ -128,30 +174,79 @@ class Worker:
 
         return function_decorator
 
-    def task(self) -> Callable[[F], F]:
-        """Registers a python function as a task with the worker."""
+    def task(self, cacheable: bool = False) -> Callable[[F], F]:
+        """Registers a python function as a task with the worker.
+
+        :param cacheable: The outputs only depend on the inputs,
+            so a :py:class:`tierkreis.controller.cache.ResultCache` may reuse them
+            for calls with the same inputs.
+        :type cacheable: bool
+        """
 
         def function_decorator(func: F) -> F:
             self.namespace.add_function(func)
             self.add_types(func)
 
             def wrapper(node_definition: WorkerCallArgs):
-                kwargs = self._load_args(func, node_definition.inputs)
-                results = func(**kwargs)
-                self._save_results(func, node_definition.outputs, results)
+                loc = node_definition.done_path.parent.name
+                with span("load_inputs", "worker", loc=loc):
+                    kwargs = self._load_args(func, node_definition.inputs)
+                with span("compute", "worker", loc=loc):
+                    results = func(**kwargs)
+                with span("write_outputs", "worker", loc=loc):
+                    self._save_results(func, node_definition.outputs, results)
+                if cacheable:
+                    marker = node_definition.done_path.with_name(CACHEABLE_MARKER)
+                    self.storage.write_output(marker, b"")
 
             self.functions[func.__name__] = wrapper
             return func
 
         return function_decorator
 
+    def _run_call(self, node_definition: WorkerCallArgs) -> bool:
+        """Run a single call and report whether it succeeded."""
+        logger.info(node_definition.model_dump())
+        try:
+            function = self.functions.get(node_definition.function_name, None)
+            if function is None:
+                raise TierkreisError(
+                    f"{self.name}: function name {node_definition.function_name} not found"
+                )
+            logger.info(f"running: {node_definition.function_name} in {self.name}")
+
+            with span(
+                "call",
+                "worker",
+                loc=node_definition.done_path.parent.name,
+                function=f"{self.name}.{node_definition.function_name}",
+            ):
+                function(node_definition)
+
+            self.storage.mark_done(node_definition.done_path)
+            return True
+        except Exception as err:
+            logger.error("encountered error", exc_info=err)
+            self.storage.write_error(node_definition.error_path, str(err))
+            return False
+
     def run(self, worker_definition_path: Path) -> None:
         """Run a function with the parameters defined in worker_definition_path.
 
+        The calls fused to it are run afterwards, see
+        :py:func:`tierkreis.controller.data.fusion.fuse_chains`.
+        Their inputs from the previous call are passed on without reading them
+        from storage if the annotations agree; all outputs are written regardless.
+
         :param worker_definition_path: The worker call args written by the controller.
         :type worker_definition_path: Path
         :raises TierkreisError: When the function execution results in an error.
         """
+        if self._detect_storage and isinstance(self.storage, WorkerFileStorage):
+            tierkreis_dir = self.storage.tierkreis_dir
+            if database_path(tierkreis_dir, worker_definition_path).exists():
+                self.storage = WorkerSQLiteStorage(tierkreis_dir)
+
         node_definition = self.storage.read_call_args(worker_definition_path)
 
         logs_path = node_definition.logs_path
@@ -162,26 +257,48 @@ class Worker:
             filemode="a",
             level=logging.INFO,
         )
-        logger.info(node_definition.model_dump())
 
+        fused = node_definition.fused
         try:
-            function = self.functions.get(node_definition.function_name, None)
-            if function is None:
-                raise TierkreisError(
-                    f"{self.name}: function name {node_definition.function_name} not found"
-                )
-            logger.info(f"running: {node_definition.function_name} in {self.name}")
-
-            function(node_definition)
-
-            self.storage.mark_done(node_definition.done_path)
-        except Exception as err:
-            logger.error("encountered error", exc_info=err)
-            self.storage.write_error(node_definition.error_path, str(err))
+            self._results = {} if fused else None
+            succeeded = self._run_call(node_definition)
+            for i, path in enumerate(fused):
+                if not succeeded:
+                    break
+                self._previous = self._results or {}
+                self._results = {} if i + 1 < len(fused) else None
+                succeeded = self._run_call(self.storage.read_call_args(path))
+        finally:
+            self._previous, self._results = {}, None
+            stats = getattr(self.storage, "compression_stats", None)
+            if stats is not None and stats.compressed:
+                logger.info(f"Outputs: {stats}")
+
+    def serve(self, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> None:
+        """Run the worker call args paths read line by line from stdin.
+
+        Each path is written back to stdout once its call has finished.
+        Anything the functions print goes to stderr instead.
+
+        :param stdin: Stream of worker call args paths.
+        :type stdin: TextIO
+        :param stdout: Stream on which finished paths are reported.
+        :type stdout: TextIO
+        """
+        with redirect_stdout(sys.stderr):
+            for line in stdin:
+                worker_definition_path = line.strip()
+                if not worker_definition_path:
+                    continue
+                self.run(Path(worker_definition_path))
+                stdout.write(worker_definition_path + "\n")
+                stdout.flush()
 
     def app(self, argv: list[str]) -> None:
         """Wrapper for UV execution."""
         if argv[1] == "--stubs-path":
             self.namespace.write_stubs(Path(argv[2]))
+        elif argv[1] == "--serve":
+            self.serve()
         else:
             self.run(Path(argv[1]))
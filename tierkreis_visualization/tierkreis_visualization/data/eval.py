@@ -1,9 +1,8 @@
-import json
 from typing import Optional, assert_never
 
 from tierkreis.controller.data.core import NodeIndex
 from tierkreis.controller.data.location import Loc
-from tierkreis.controller.data.graph import GraphData, IfElse, NodeDef
+from tierkreis.controller.data.graph import IfElse, NodeDef, graph_from_bytes
 from tierkreis.controller.data.types import ptype_from_bytes
 from tierkreis.controller.storage.adjacency import in_edges
 from tierkreis.controller.storage.protocol import ControllerStorage
@@ -40,7 +39,7 @@ def add_conditional_edges(
     py_edges: list[PyEdge],
 ):
     try:
-        pred = json.loads(storage.read_output(loc.N(node.pred[0]), node.pred[1]))
+        pred = ptype_from_bytes(storage.read_output(loc.N(node.pred[0]), node.pred[1]))
     except (FileNotFoundError, TierkreisError):
         pred = None
 
@@ -66,7 +65,7 @@ def get_eval_node(
     storage: ControllerStorage, node_location: Loc, errored_nodes: list[Loc]
 ) -> PyGraph:
     thunk = storage.read_output(node_location.N(-1), "body")
-    graph = ptype_from_bytes(thunk, GraphData)
+    graph = graph_from_bytes(thunk)
 
     pynodes: list[PyNode] = []
     py_edges: list[PyEdge] = []
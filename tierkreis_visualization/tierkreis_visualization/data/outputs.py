@@ -1,13 +1,24 @@
+import json
+
+from tierkreis.controller.data.binary import decode_binary, is_binary
+from tierkreis.controller.data.types import TierkreisEncoder
 from tierkreis.controller.storage.protocol import ControllerStorage
 from tierkreis.controller.data.location import Loc
 from tierkreis.exceptions import TierkreisError
 
 
+def value_to_str(bs: bytes) -> str:
+    """Values in the binary encoding are shown as JSON."""
+    if is_binary(bs):
+        return json.dumps(decode_binary(bs), cls=TierkreisEncoder)
+    return bs.decode()
+
+
 def outputs_from_loc(
     storage: ControllerStorage, loc: Loc, port_name: str
 ) -> str | None:
     try:
         bs = storage.read_output(loc, port_name)
-        return bs.decode()
+        return value_to_str(bs)
     except (FileNotFoundError, TierkreisError):
         return None
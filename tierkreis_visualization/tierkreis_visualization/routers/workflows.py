@@ -8,11 +8,12 @@ from fastapi import APIRouter, HTTPException, Query, status
 from starlette.responses import JSONResponse, PlainTextResponse
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
+from tierkreis.controller.data.compression import decompress
 from tierkreis.controller.data.location import Loc
 from tierkreis.controller.storage.protocol import ControllerStorage
 from tierkreis_visualization.app_config import Request
 from tierkreis_visualization.data.graph import get_node_data, parse_node_location
-from tierkreis_visualization.data.outputs import outputs_from_loc
+from tierkreis_visualization.data.outputs import outputs_from_loc, value_to_str
 from watchfiles import awatch  # type: ignore
 
 from tierkreis_visualization.data.workflows import WorkflowDisplay, get_workflows
@@ -110,7 +111,7 @@ def get_input(
         definition = storage.read_worker_call_args(node_location)
 
         with open(definition.inputs[port_name], "rb") as fh:
-            return JSONResponse(json.loads(fh.read()))
+            return JSONResponse(json.loads(value_to_str(decompress(fh.read()))))
     except FileNotFoundError as e:
         return PlainTextResponse(str(e))
 